@@ -0,0 +1,627 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+from helper_funcs import (
+    MultisetCombinations,
+    calculate_hash,
+    calculate_spec_hash,
+    create_graph_from_schema,
+    open_query_sink,
+    write_queries_to_file,
+)
+from join.join_connections import find_max_joins, generate_connections
+from query_generator_from_specifications import query_generator
+from specification_generator_using_ht import generate_spec_space
+from read_schema import open_schema_catalog
+from read_schema.read_schema import (
+    SchemaCatalog,
+    bucket_columns_by_table,
+    construct_foreign_keys,
+    construct_primary_keys,
+    construct_schema,
+    construct_schema_types,
+    stream_database_record,
+    update_list_of_lists,
+)
+
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+current_dir = os.path.dirname(__file__)
+default_db_file = os.path.join(current_dir, "../spider/tables.json")
+default_config_file = os.path.join(current_dir, "config_file.json")
+
+
+def time_function(func, repeat):
+    """
+    Time a function over a number of repetitions.
+
+    Args:
+        func (function): The function to time, called without arguments.
+        repeat (int): The number of repetitions.
+
+    Returns:
+        tuple: The best wall time in seconds and the result of the last call.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def print_comparison(name, old_time, new_time):
+    """
+    Print the timings of the previous and the current implementation of a benchmark.
+
+    Args:
+        name (str): The name of the benchmark.
+        old_time (float): The best wall time of the previous implementation in seconds.
+        new_time (float): The best wall time of the current implementation in seconds.
+
+    Returns:
+        None
+    """
+    print(
+        f"{name}: previous {old_time * 1000:.2f} ms, current {new_time * 1000:.2f} ms, "
+        f"speedup {old_time / new_time:.1f}x"
+    )
+
+
+def _legacy_construct_schema(db):
+    return {
+        table_name: [
+            column[1] for column in db["column_names_original"] if column[0] == index
+        ]
+        for index, table_name in enumerate(db["table_names_original"])
+    }
+
+
+def _legacy_construct_foreign_keys(db):
+    foreign_keys = {}
+    if db["foreign_keys"]:
+        counting_tables = []
+        pairs = []
+
+        for foreign_key in db["foreign_keys"]:
+            local_column_index = foreign_key[0]
+            local_column_index2 = foreign_key[1]
+
+            table1 = db["table_names_original"][
+                db["column_names_original"][local_column_index][0]
+            ]
+            column1 = db["column_names_original"][local_column_index][1]
+            table2 = db["table_names_original"][
+                db["column_names_original"][local_column_index2][0]
+            ]
+            column2 = db["column_names_original"][local_column_index2][1]
+
+            update_list_of_lists(counting_tables, table1)
+            update_list_of_lists(counting_tables, table2)
+            pairs.append((table1, column1, table2, column2))
+
+        sorted_counting_tables = sorted(
+            counting_tables, key=lambda x: x[1], reverse=True
+        )
+
+        for table in sorted_counting_tables:
+            flag = False
+            foreign_keys[table[0]] = {}
+
+            for pair in pairs:
+                if pair[0] == table[0]:
+                    flag = True
+                    foreign_keys[table[0]][pair[1]] = (pair[2], pair[3])
+                    pairs.remove(pair)
+                elif pair[2] == table[0]:
+                    flag = True
+                    foreign_keys[table[0]][pair[3]] = (pair[0], pair[1])
+                    pairs.remove(pair)
+
+            if not flag:
+                foreign_keys.pop(table[0])
+
+    return foreign_keys
+
+
+def _legacy_construct_schema_types(db):
+    schema_types = {}
+    for index, table_name in enumerate(db["table_names_original"]):
+        columns_for_table = [
+            column for column in db["column_names_original"] if column[0] == index
+        ]
+        schema_types[table_name] = {
+            column[1]: db["column_types"][db["column_names_original"].index(column)]
+            for column in columns_for_table
+        }
+    return schema_types
+
+
+def benchmark_schema_construction(db_file=default_db_file, repeat=5):
+    """
+    Compare the previous quadratic schema construction with the bucketed one over every database of a JSON file.
+
+    The outputs of both implementations are asserted to be identical, including the order of the keys.
+
+    Args:
+        db_file (str, optional): The path to the JSON file containing the database schemas. Defaults to spider/tables.json.
+        repeat (int, optional): The number of repetitions, the best one is reported. Defaults to 5.
+
+    Returns:
+        None
+    """
+    with open(db_file, "r") as f:
+        json_data = json.load(f)
+
+    def build_legacy():
+        return [
+            (
+                _legacy_construct_schema(db),
+                construct_primary_keys(db),
+                _legacy_construct_foreign_keys(db),
+                _legacy_construct_schema_types(db),
+            )
+            for db in json_data
+        ]
+
+    def build_current():
+        all_db = []
+        for db in json_data:
+            buckets = bucket_columns_by_table(db)
+            all_db.append(
+                (
+                    construct_schema(db, buckets),
+                    construct_primary_keys(db),
+                    construct_foreign_keys(db),
+                    construct_schema_types(db, buckets),
+                )
+            )
+        return all_db
+
+    old_time, old_result = time_function(build_legacy, repeat)
+    new_time, new_result = time_function(build_current, repeat)
+    assert repr(old_result) == repr(new_result), "Schema construction output changed"
+    print_comparison(f"schema construction ({len(json_data)} databases)", old_time, new_time)
+
+    largest = max(json_data, key=lambda db: len(db["column_names_original"]))
+    old_time, _ = time_function(lambda: _legacy_construct_schema_types(largest), repeat)
+    new_time, _ = time_function(lambda: construct_schema_types(largest), repeat)
+    print_comparison(
+        f"schema types of {largest['db_id']} ({len(largest['column_names_original'])} columns)",
+        old_time,
+        new_time,
+    )
+
+
+def benchmark_schema_streaming(db_file=default_db_file, repeat=5):
+    """
+    Compare loading the whole JSON file with streaming it up to one database, for the first, middle and last database.
+
+    Args:
+        db_file (str, optional): The path to the JSON file containing the database schemas. Defaults to spider/tables.json.
+        repeat (int, optional): The number of repetitions, the best one is reported. Defaults to 5.
+
+    Returns:
+        None
+    """
+    with open(db_file, "r") as f:
+        db_ids = [db["db_id"] for db in json.load(f)]
+
+    def load_whole_file(db_name):
+        with open(db_file, "r") as f:
+            return next(db for db in json.load(f) if db["db_id"] == db_name)
+
+    for position in (0, len(db_ids) // 2, len(db_ids) - 1):
+        db_name = db_ids[position]
+        old_time, old_result = time_function(lambda: load_whole_file(db_name), repeat)
+        new_time, new_result = time_function(
+            lambda: stream_database_record(db_file, db_name), repeat
+        )
+        assert old_result == new_result, f"Streamed record of {db_name} changed"
+        print_comparison(
+            f"record of {db_name} (database {position + 1} of {len(db_ids)})",
+            old_time,
+            new_time,
+        )
+
+
+def _legacy_generate_connections(join_definitions, num_tables):
+    G = nx.Graph()
+    G.add_edges_from((join["table1"], join["table2"]) for join in join_definitions)
+
+    connections = []
+    for combination in itertools.combinations(G.nodes, num_tables):
+        subgraph = G.subgraph(combination)
+        if nx.is_connected(subgraph):
+            connection = [
+                join[key]
+                for join in join_definitions
+                if join["table1"] in combination and join["table2"] in combination
+                for key in ("table1", "table2", "first_key", "second_key")
+            ]
+
+            connections.append(connection)
+    return connections
+
+
+def benchmark_join_connections(db_file=default_db_file, repeat=3, num_schemas=3):
+    """
+    Compare checking every combination of tables for connectivity with enumerating the connected subsets directly,
+    on the schemas with the most joinable tables. The previous implementation uses networkx, and the benchmark is
+    skipped if it is not installed.
+
+    Args:
+        db_file (str, optional): The path to the JSON file containing the database schemas. Defaults to spider/tables.json.
+        repeat (int, optional): The number of repetitions, the best one is reported. Defaults to 3.
+        num_schemas (int, optional): The number of schemas to benchmark. Defaults to 3.
+
+    Returns:
+        None
+    """
+    if nx is None:
+        print("join_connections: skipped, networkx is not installed")
+        return
+    catalog = SchemaCatalog.from_file(db_file)
+    join_definitions = {
+        db_name: create_graph_from_schema(
+            catalog[db_name]["schema"], catalog[db_name]["foreign_keys"]
+        )
+        for db_name in catalog
+    }
+
+    def count_tables(db_name):
+        return len(
+            {
+                table
+                for join in join_definitions[db_name]
+                for table in (join["table1"], join["table2"])
+            }
+        )
+
+    for db_name in sorted(join_definitions, key=count_tables, reverse=True)[:num_schemas]:
+        for num_tables in (2, 3, 4):
+            definitions = join_definitions[db_name]
+            old_time, old_result = time_function(
+                lambda: _legacy_generate_connections(definitions, num_tables), repeat
+            )
+            new_time, new_result = time_function(
+                lambda: generate_connections(definitions, num_tables), repeat
+            )
+            assert old_result == new_result, f"Connections of {db_name} changed"
+            print_comparison(
+                f"{num_tables}-table connections of {db_name} "
+                f"({count_tables(db_name)} tables, {len(new_result)} connections)",
+                old_time,
+                new_time,
+            )
+
+
+def _legacy_find_max_joins(join_definitions):
+    G = nx.Graph()
+    for join in join_definitions:
+        table1 = join["table1"]
+        table2 = join["table2"]
+        G.add_edge(table1, table2)
+    return max(len(component) - 1 for component in nx.connected_components(G))
+
+
+def benchmark_max_joins(db_file=default_db_file, repeat=5):
+    """
+    Compare finding the maximum number of joins with networkx and with union-find, over every database with
+    foreign keys of a JSON file. The benchmark is skipped if networkx is not installed.
+
+    Args:
+        db_file (str, optional): The path to the JSON file containing the database schemas. Defaults to spider/tables.json.
+        repeat (int, optional): The number of repetitions, the best one is reported. Defaults to 5.
+
+    Returns:
+        None
+    """
+    if nx is None:
+        print("max_joins: skipped, networkx is not installed")
+        return
+    catalog = SchemaCatalog.from_file(db_file)
+    all_join_definitions = [
+        create_graph_from_schema(
+            catalog[db_name]["schema"], catalog[db_name]["foreign_keys"]
+        )
+        for db_name in catalog
+        if catalog[db_name]["foreign_keys"]
+    ]
+    old_time, old_result = time_function(
+        lambda: [_legacy_find_max_joins(jd) for jd in all_join_definitions], repeat
+    )
+    new_time, new_result = time_function(
+        lambda: [find_max_joins(jd) for jd in all_join_definitions], repeat
+    )
+    assert old_result == new_result, "Maximum number of joins changed"
+    print_comparison(
+        f"maximum joins ({len(all_join_definitions)} databases)", old_time, new_time
+    )
+
+
+def _legacy_select_combinations(elements_list, num_combinations):
+    combinations = list(itertools.product(elements_list, repeat=num_combinations))
+    unique_combinations = {tuple(sorted(combination)) for combination in combinations}
+    return [list(combination) for combination in unique_combinations]
+
+
+def benchmark_value_exp_combinations(repeat=3):
+    """
+    Compare deduplicating the Cartesian product of the value expression types with generating their combinations
+    with repetition directly, and with drawing one combination at random by unranking.
+
+    Args:
+        repeat (int, optional): The number of repetitions, the best one is reported. Defaults to 3.
+
+    Returns:
+        None
+    """
+    value_exp_types = [
+        "single_exp_number",
+        "single_exp_text",
+        "alias_exp",
+        "arithmatic_exp",
+        "string_func_exp",
+        "agg_exp",
+        "count_distinct_exp",
+        "subquery_exp_alias",
+        "agg_exp_alias",
+    ]
+    for length in (2, 4, 6):
+        old_time, old_result = time_function(
+            lambda: _legacy_select_combinations(value_exp_types, length), repeat
+        )
+        new_time, new_result = time_function(
+            lambda: list(MultisetCombinations(value_exp_types, length)), repeat
+        )
+        assert sorted(old_result) == new_result, "Combinations changed"
+        print_comparison(
+            f"{len(new_result)} combinations of {length} value expressions",
+            old_time,
+            new_time,
+        )
+        combinations = MultisetCombinations(value_exp_types, length)
+        draw_time, _ = time_function(
+            lambda: [random.choice(combinations) for _ in range(1000)], repeat
+        )
+        print(f"  1000 random combinations by unranking: {draw_time * 1000:.2f} ms")
+
+
+def benchmark_spec_hashing(
+    db_file=default_db_file, config_file=default_config_file, num=1000000
+):
+    """
+    Compare the SHA-1 hashes of the JSON encoding of specifications with the 128-bit specification ids, computed
+    from the specifications and from their numbers in the specification space, over a million specifications.
+
+    The ids are checked to be distinct exactly when the SHA-1 hashes are, and to be faster to compute.
+
+    Args:
+        db_file (str, optional): The path to the JSON file containing the database schemas. Defaults to spider/tables.json.
+        config_file (str, optional): The path to the configuration file. Defaults to config_file.json.
+        num (int, optional): The number of specifications to hash. Defaults to 1000000.
+
+    Returns:
+        None
+    """
+    catalog = SchemaCatalog.from_file(db_file)
+    with open(config_file, "r") as f:
+        config = json.load(f)
+    space = generate_spec_space(
+        catalog["farm"]["schema"], catalog["farm"]["foreign_keys"], config["first_query"]
+    )
+    random.seed(0)
+    indexes = [random.randrange(space.size) for _ in range(num)]
+    specs = [space[index] for index in indexes]
+
+    old_time, old_result = time_function(
+        lambda: [calculate_hash(spec) for spec in specs], 1
+    )
+    new_time, new_result = time_function(
+        lambda: [calculate_spec_hash(spec) for spec in specs], 1
+    )
+    assert len(set(old_result)) == len(set(new_result)), "Specification ids collide"
+    print_comparison(f"{num} specification hashes", old_time, new_time)
+    assert new_time < old_time, "Specification ids are slower than SHA-1 hashes"
+
+    new_time, space_result = time_function(
+        lambda: [space.spec_hash(index) for index in indexes], 1
+    )
+    assert space_result == new_result, "Specification ids of the space changed"
+    print_comparison(
+        f"{num} specification hashes from the space", old_time, new_time
+    )
+    assert (
+        new_time < old_time
+    ), "Specification ids of the space are slower than SHA-1 hashes"
+
+
+def benchmark_covering_array(
+    db_file=default_db_file, config_file=default_config_file, strength=2, max_num=100000
+):
+    """
+    Compare the number of specifications a covering array and random sampling need to cover every combination of the
+    levels of `strength` fields.
+
+    Args:
+        db_file (str, optional): The path to the JSON file containing the database schemas. Defaults to spider/tables.json.
+        config_file (str, optional): The path to the configuration file. Defaults to config_file.json.
+        strength (int, optional): The number of fields whose levels are combined. Defaults to 2.
+        max_num (int, optional): The largest number of random specifications tried. Defaults to 100000.
+
+    Returns:
+        None
+    """
+    catalog = SchemaCatalog.from_file(db_file)
+    with open(config_file, "r") as f:
+        config = json.load(f)
+    space = generate_spec_space(
+        catalog["farm"]["schema"], catalog["farm"]["foreign_keys"], config["first_query"]
+    )
+    random.seed(0)
+    covering_time, indexes = time_function(lambda: space.covering_indexes(strength), 1)
+    report = space.coverage(indexes, strength)
+    assert report["covered"] == report["tuples"], "The covering array misses tuples"
+    print(
+        f"covering array: {len(indexes)} specs in {covering_time * 1000:.2f} ms "
+        f"(at least {report['lower_bound']} needed)"
+    )
+
+    random_report = space.coverage(space.sample_indexes(len(indexes)), strength)
+    print(
+        f"random sampling: {random_report['covered']}/{random_report['tuples']} tuples "
+        f"with {len(indexes)} specs"
+    )
+    num = len(indexes)
+    while num < max_num:
+        num *= 2
+        random_report = space.coverage(space.sample_indexes(num), strength)
+        if random_report["covered"] == random_report["tuples"]:
+            print(f"random sampling: every tuple covered with {num} specs")
+            break
+    else:
+        print(
+            f"random sampling: {random_report['covered']}/{random_report['tuples']} "
+            f"tuples with {num} specs"
+        )
+
+
+def benchmark_query_output(num_specs=1000, queries_per_spec=3, repeat=3):
+    """
+    Compare rewriting the whole CSV file after every specification with appending the rows through a query sink.
+
+    Args:
+        num_specs (int, optional): The number of specifications. Defaults to 1000.
+        queries_per_spec (int, optional): The number of queries of every specification. Defaults to 3.
+        repeat (int, optional): The number of repetitions. Defaults to 3.
+    """
+    records = [
+        (
+            f"{spec_index:040x}",
+            {"table_exp_type": "single_table", "limit_type": spec_index},
+            f"SELECT Name FROM city WHERE City_ID = {spec_index} LIMIT {query_index}",
+        )
+        for spec_index in range(num_specs)
+        for query_index in range(queries_per_spec)
+    ]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        old_file_name = os.path.join(output_dir, "old.csv")
+        new_file_name = os.path.join(output_dir, "new.csv")
+
+        def rewrite_after_every_spec():
+            merged_queries = {}
+            previous_hash = None
+            for spec_hash, spec, query in records:
+                if previous_hash is not None and spec_hash != previous_hash:
+                    write_queries_to_file(merged_queries, file_name=old_file_name)
+                previous_hash = spec_hash
+                if str(spec) in merged_queries:
+                    merged_queries[str(spec)] += "\n" + query
+                else:
+                    merged_queries[str(spec)] = query
+            write_queries_to_file(merged_queries, file_name=old_file_name)
+
+        def append_through_sink():
+            with open_query_sink(new_file_name) as sink:
+                for spec_hash, spec, query in records:
+                    sink.write(spec_hash, spec, query)
+
+        old_time, _ = time_function(rewrite_after_every_spec, 1)
+        new_time, _ = time_function(append_through_sink, repeat)
+        with open(old_file_name, "rb") as old_file, open(new_file_name, "rb") as new_file:
+            assert old_file.read() == new_file.read()
+    print_comparison(f"query output ({num_specs} specs)", old_time, new_time)
+
+
+def benchmark_query_logging(db_file=default_db_file, num_specs=50, repeat=3):
+    """
+    Compare the query generation throughput with every step logged, as every step used to be printed, and with
+    logging at its quiet default.
+
+    Args:
+        db_file (str, optional): The schema file. Defaults to default_db_file.
+        num_specs (int, optional): The number of specifications of output/farm.json to generate queries for.
+            Defaults to 50.
+        repeat (int, optional): The number of repetitions. Defaults to 3.
+    """
+    schema, pk, fk, schema_types = open_schema_catalog(db_file).read_schema_pk_fk_types(
+        "farm"
+    )
+    with open(os.path.join(current_dir, "output/farm.json")) as json_file:
+        specs = json.load(json_file)
+    specs = {"farm": dict(itertools.islice(specs["farm"].items(), num_specs))}
+
+    def generate():
+        return query_generator(
+            "farm",
+            schema,
+            pk,
+            fk,
+            schema_types,
+            specs=specs,
+            write_to_csv=False,
+            testing_with_one_spec=True,
+            random_choice=True,
+            seed=7,
+        )
+
+    root_logger = logging.getLogger()
+    previous_level = root_logger.level
+    with open(os.devnull, "w") as devnull:
+        handler = logging.StreamHandler(devnull)
+        root_logger.addHandler(handler)
+        root_logger.setLevel(logging.DEBUG)
+        try:
+            old_time, old_queries = time_function(generate, repeat)
+        finally:
+            root_logger.removeHandler(handler)
+            root_logger.setLevel(previous_level)
+    new_time, new_queries = time_function(generate, repeat)
+    assert old_queries == new_queries
+    num_queries = sum(len(queries.split("\n")) for queries in new_queries.values())
+    print_comparison(f"query generation ({num_queries} queries)", old_time, new_time)
+    print(
+        f"throughput: {num_queries / old_time:.0f} queries/s logged, "
+        f"{num_queries / new_time:.0f} queries/s quiet"
+    )
+
+
+BENCHMARKS = {
+    "schema_construction": benchmark_schema_construction,
+    "schema_streaming": benchmark_schema_streaming,
+    "join_connections": benchmark_join_connections,
+    "max_joins": benchmark_max_joins,
+    "value_exp_combinations": benchmark_value_exp_combinations,
+    "spec_hashing": benchmark_spec_hashing,
+    "covering_array": benchmark_covering_array,
+    "query_output": benchmark_query_output,
+    "query_logging": benchmark_query_logging,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the micro-benchmarks.")
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        metavar="benchmark",
+        help=f"The benchmarks to run, among {', '.join(BENCHMARKS)}. Defaults to all of them.",
+    )
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -1 +1,2 @@
 from .helper_funcs import *
+from .query_sink import *
@@ -3,9 +3,18 @@ import hashlib
 import itertools
 
 #     return colms
+import bisect
 import json
+import logging
+import math
 import os
 import random
+import shutil
+from collections.abc import Sequence
+
+from read_schema.schema_model import Schema
+
+logger = logging.getLogger(__name__)
 
 
 def generate_like_pattern(criteria):
@@ -304,7 +313,7 @@ def read_random_specs(
     spec["orderby_type"] = "none"
 
     if min_max_depth_in_subquery[0] > 1:
-        print("min_max_depth_in_subquery[0] > 0")
+        logger.debug("min_max_depth_in_subquery[0] > 0")
         spec["min_max_depth_in_subquery"] = [
             min_max_depth_in_subquery[0] - 1,
             min_max_depth_in_subquery[1] - 1,
@@ -320,7 +329,7 @@ def read_random_specs(
         )
         spec[where_or_having] = subquery_type
     elif min_max_depth_in_subquery[1] > 1:
-        print("min_max_depth_in_subquery[1] > 0")
+        logger.debug("min_max_depth_in_subquery[1] > 0")
         if where_or_having == "where_type":
             if spec["where_type"] in [
                 "in_with_subquery",
@@ -368,7 +377,7 @@ def read_random_specs(
             ]
             min_max_depth_in_subquery[1] -= 1
     elif min_max_depth_in_subquery[1] == -1:
-        print("min_max_depth_in_subquery[1] == -1")
+        logger.debug("min_max_depth_in_subquery[1] == -1")
         if where_or_having == "where_type":
             if isinstance(spec["where_type"], dict):
                 if "logical_operator" in spec["where_type"]:
@@ -433,12 +442,12 @@ def read_random_specs(
                 )
 
                 spec["min_max_depth_in_subquery"] = [0, 0]
-    print("After: ")
+    logger.debug("After: ")
     if temp_completed_spec is not None:
         return temp_completed_spec, temp_spec_hash, temp_must_be_in_where
 
     completed_spec = {"first_query": spec, "set_op_type": "none"}
-    print(completed_spec)
+    logger.debug("%s", completed_spec)
     return completed_spec, spec_hash, must_be_in_where
 
 
@@ -522,20 +531,22 @@ def get_corresponding_fk_table(table_of_pk, join_definitions):
     return possible_tables_and_pk
 
 
-def write_queries_to_file(merged_queries):
+def write_queries_to_file(merged_queries, file_name=None):
     """
     Write the merged queries to a CSV file.
 
     Args:
         merged_queries (dict): Dictionary containing the merged queries, with specification as keys and partial queries as values.
+        file_name (str, optional): Name of the CSV file. Defaults to output/res.csv.
 
     Returns:
         None
     """
-    current_dir = os.path.dirname(__file__)
-    output_dir = os.path.abspath(os.path.join(current_dir, "../output"))
-    csv_file = os.path.join(output_dir, "res.csv")
-    with open(csv_file, mode="w", newline="") as csv_file:
+    if file_name is None:
+        current_dir = os.path.dirname(__file__)
+        output_dir = os.path.abspath(os.path.join(current_dir, "../output"))
+        file_name = os.path.join(output_dir, "res.csv")
+    with open(file_name, mode="w", newline="") as csv_file:
         fieldnames = ["Specification", "Partial Query"]
         writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
         writer.writeheader()
@@ -548,13 +559,113 @@ def write_queries_to_file(merged_queries):
             writer.writerow(query_data)
 
 
+def first_generated_query(records):
+    """
+    Get the first query of the (specification hash, query, metadata) records of iter_queries, without generating the
+    other queries.
+
+    Args:
+        records (iterable): The records of the queries.
+
+    Returns:
+        tuple: The query and its metadata.
+
+    Raises:
+        ValueError: If no query was generated.
+
+    Examples:
+        >>> first_generated_query(iter([("a1b2", "SELECT * FROM city", {"spec": {}})]))
+        ('SELECT * FROM city', {'spec': {}})
+    """
+    for _, query, metadata in records:
+        return query, metadata
+    raise ValueError("No query could be generated for the specification")
+
+
+def merge_query_files(shard_file_names, file_name):
+    """
+    Concatenate the CSV or JSON Lines files of the shards of a query generation into one file.
+
+    The shards hold consecutive ranges of the specifications (see shard_bounds), so concatenating them in shard order
+    gives the file a single run over every specification writes. The header of CSV files is only kept once.
+
+    Args:
+        shard_file_names (list): Names of the files of the shards, in shard order.
+        file_name (str): Name of the merged file. Files ending in .jsonl are JSON Lines files.
+
+    Returns:
+        None
+    """
+    if file_name.lower().endswith(".jsonl"):
+        with open(file_name, mode="wb") as merged_file:
+            for shard_file_name in shard_file_names:
+                with open(shard_file_name, mode="rb") as shard_file:
+                    shutil.copyfileobj(shard_file, merged_file)
+        return
+    with open(file_name, mode="w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        for shard_index, shard_file_name in enumerate(shard_file_names):
+            with open(shard_file_name, newline="") as shard_file:
+                rows = csv.reader(shard_file)
+                header = next(rows, None)
+                if shard_index == 0 and header is not None:
+                    writer.writerow(header)
+                writer.writerows(rows)
+
+
+def shard_bounds(num_items, shard_index, num_shards):
+    """
+    Get the range of the items of a shard, when items are split into consecutive ranges of nearly equal sizes.
+
+    Args:
+        num_items (int): The number of items.
+        shard_index (int): The index of the shard, from 0 to num_shards - 1.
+        num_shards (int): The number of shards.
+
+    Returns:
+        tuple: The start and end of the range of the items of the shard.
+
+    Examples:
+        >>> [shard_bounds(10, shard_index, 3) for shard_index in range(3)]
+        [(0, 3), (3, 6), (6, 10)]
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f"Shard {shard_index} is not in the {num_shards} shards")
+    return (
+        num_items * shard_index // num_shards,
+        num_items * (shard_index + 1) // num_shards,
+    )
+
+
+def derive_spec_seed(seed, spec_hash):
+    """
+    Derive the seed of the random stream of a specification from a global seed.
+
+    The seed only depends on the global seed and the specification id, so the queries of a specification are the
+    same whatever specifications are generated before it, in which order, or in which process.
+
+    Args:
+        seed (int or str): The global seed.
+        spec_hash (str): The id of the specification.
+
+    Returns:
+        int: The 64-bit seed of the specification.
+
+    Examples:
+        >>> derive_spec_seed(0, "fb1612d2d7e70b4e98d726d30f6c649b") == derive_spec_seed(0, "fb1612d2d7e70b4e98d726d30f6c649b")
+        True
+    """
+    digest = hashlib.blake2b(f"{seed}:{spec_hash}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
 def get_table_name_from_column(column, schema):
     """
     Get the table name(s) associated with a given column in the schema.
 
     Args:
         column (str): Column name.
-        schema (dict): Dictionary containing the schema information.
+        schema (dict or Schema): Dictionary containing the schema information.
 
     Returns:
         list: List of table names associated with the column.
@@ -576,6 +687,12 @@ def get_table_name_from_column(column, schema):
         tables.append(column.split(".")[0])
         col = column.split(".")[1]
 
+    if isinstance(schema, Schema):
+        tables.extend(
+            table for table in schema.tables_of_column(col) if table not in tables
+        )
+        return tables
+
     for table in schema:
         if col in schema[table] and table not in tables:
             tables.append(table)
@@ -713,6 +830,157 @@ def write_hash_table_to_json(hash_table, file_name):
         outfile.write(json_object)
 
 
+def spec_index_file_name(file_name):
+    """
+    Get the name of the index of the specification ids of a JSON file written by append_hash_table_to_json.
+
+    Args:
+        file_name (str): Name of the JSON file of the specifications.
+
+    Returns:
+        str: Name of the index file, the JSON file name with the extension ".ids".
+
+    Examples:
+        >>> spec_index_file_name("output/farm.json")
+        'output/farm.ids'
+    """
+    return os.path.splitext(file_name)[0] + ".ids"
+
+
+def spec_id_scheme(spec_id):
+    """
+    Get the kind of a specification id returned by calculate_spec_hash.
+
+    Args:
+        spec_id (str): The id.
+
+    Returns:
+        str: "sha1" for a SHA-1 hash, "fast" for a 128-bit fast id.
+
+    Raises:
+        ValueError: If the id is neither.
+
+    Examples:
+        >>> spec_id_scheme("6fefca8fd9b4070669b2bca16cfa1ddc433acfdd"), spec_id_scheme("fb1612d2d7e70b4e98d726d30f6c649b")
+        ('sha1', 'fast')
+    """
+    if len(spec_id) == 40:
+        return "sha1"
+    if len(spec_id) == 32:
+        return "fast"
+    raise ValueError(f"Unknown kind of specification id {spec_id!r}")
+
+
+def read_spec_index(file_name, sha1=False):
+    """
+    Read the ids of the specifications of a JSON file from its index.
+
+    The index starts with the size and modification time of the JSON file it describes and the kind of its ids
+    (see spec_id_scheme), followed by one id per line. If it is missing or the JSON file has changed since it was
+    written, the JSON file is parsed once and the index is rebuilt. As the ids of a specification differ between the
+    two kinds, the ids of a file must all be of the kind used to generate new specifications, so that they can be
+    compared.
+
+    Args:
+        file_name (str): Name of the JSON file of the specifications, as written by write_hash_table_to_json.
+        sha1 (bool, optional): Whether the new specifications are identified by SHA-1 hashes instead of fast ids.
+            Defaults to False.
+
+    Returns:
+        set: The ids of the specifications, empty if the JSON file does not exist.
+
+    Raises:
+        ValueError: If the ids of the file are of the other kind.
+    """
+    if not os.path.exists(file_name):
+        return set()
+    scheme = "sha1" if sha1 else "fast"
+    index_file_name = spec_index_file_name(file_name)
+    spec_ids = None
+    try:
+        with open(index_file_name, "r") as index_file:
+            file_size, mtime, index_scheme = index_file.readline().split()
+            file_stat = os.stat(file_name)
+            if (int(file_size), int(mtime)) == (file_stat.st_size, file_stat.st_mtime_ns):
+                spec_ids = {line.rstrip("\n") for line in index_file if line.strip()}
+    except (OSError, ValueError):
+        pass
+
+    if spec_ids is None:
+        with open(file_name, "r") as json_file:
+            hash_table = json.load(json_file)
+        spec_ids = {spec_id for specs in hash_table.values() for spec_id in specs}
+        schemes = {spec_id_scheme(spec_id) for spec_id in spec_ids}
+        if len(schemes) > 1:
+            raise ValueError(f"{file_name} mixes SHA-1 hashes and fast ids")
+        index_scheme = schemes.pop() if schemes else scheme
+        with open(index_file_name, "w") as index_file:
+            index_file.write(_spec_index_header(file_name, index_scheme))
+            index_file.writelines(f"{spec_id}\n" for spec_id in spec_ids)
+    if index_scheme != scheme:
+        raise ValueError(
+            f"{file_name} is keyed by {index_scheme} ids, but {scheme} ids were requested"
+        )
+    return spec_ids
+
+
+def append_hash_table_to_json(hash_table, file_name, sha1=False):
+    """
+    Append specifications to a JSON file written by write_hash_table_to_json and record their ids in its index.
+
+    The file is extended in place: only its closing braces are rewritten, so the specifications already in the file
+    are neither read nor held in memory, and the file keeps the layout of write_hash_table_to_json. The file is
+    created if it does not exist.
+
+    Args:
+        hash_table (dict): Dictionary mapping the name of the database of the file to the new specifications. Their
+            ids must not be in the file yet.
+        file_name (str): Name of the JSON file.
+        sha1 (bool, optional): Whether the specifications are identified by SHA-1 hashes instead of fast ids, as the
+            specifications of the file. Defaults to False.
+
+    Returns:
+        None
+    """
+    ((db_name, specs),) = hash_table.items()
+    if not os.path.exists(file_name):
+        write_hash_table_to_json({db_name: {}}, file_name)
+        read_spec_index(file_name, sha1)
+    if not specs:
+        return
+    # The new entries, indented as entries of the inner dictionary
+    entry_lines = json.dumps(specs, indent=4).split("\n")[1:-1]
+    entries = "\n".join("    " + line for line in entry_lines)
+
+    with open(file_name, "r+b") as json_file:
+        json_file.seek(max(0, os.path.getsize(file_name) - 64))
+        tail = json_file.read()
+        end = len(tail.rstrip())
+        if not tail[:end].endswith(b"}"):
+            raise ValueError(f"{file_name} does not end with a JSON object")
+        inner_end = len(tail[: end - 1].rstrip())
+        if not tail[:inner_end].endswith(b"}"):
+            raise ValueError(f"{file_name} does not contain a dictionary of specifications")
+        # Cut the file after the last entry, or after the opening brace if there is none
+        last_entry = tail[: inner_end - 1].rstrip()
+        separator = "\n" if last_entry.endswith(b"{") else ",\n"
+        json_file.seek(json_file.tell() - len(tail) + len(last_entry))
+        json_file.truncate()
+        json_file.write(f"{separator}{entries}\n    }}\n}}".encode())
+
+    index_file_name = spec_index_file_name(file_name)
+    with open(index_file_name, "a") as index_file:
+        index_file.writelines(f"{spec_id}\n" for spec_id in specs)
+    with open(index_file_name, "r+") as index_file:
+        index_file.write(_spec_index_header(file_name, "sha1" if sha1 else "fast"))
+
+
+def _spec_index_header(file_name, scheme):
+    # Fixed width, so that the header can be rewritten in place when specifications are appended
+    file_stat = os.stat(file_name)
+    return f"{file_stat.st_size:020d} {file_stat.st_mtime_ns:020d} {scheme:<4}\n"
+
+
 import hashlib
 import json
 
@@ -737,6 +1005,174 @@ def calculate_hash(d):
     return hash_object.hexdigest()
 
 
+# The maximum number of entries of every cache of calculate_spec_hash, a cache is cleared when it is exceeded
+SPEC_HASH_CACHE_SIZE = 1 << 16
+
+_value_codes = {}
+
+
+def _cache_value_code(key, code):
+    if len(_value_codes) >= SPEC_HASH_CACHE_SIZE:
+        _value_codes.clear()
+    _value_codes[key] = code
+
+
+def spec_value_code(value):
+    """
+    Calculate the 128-bit code of a JSON value, from which the encodings of the choices of specifications are built.
+
+    Scalars are coded from their JSON encoding, lists from the codes of their items and dictionaries from their
+    spec_encoding, so the code is stable across processes. The codes of strings, of other scalars and of lists of
+    strings are cached.
+
+    Args:
+        value: The JSON value.
+
+    Returns:
+        bytes: The 16-byte code.
+    """
+    value_type = type(value)
+    if value_type is str:
+        code = _value_codes.get(value)
+        if code is None:
+            code = hashlib.blake2b(json.dumps(value).encode(), digest_size=16).digest()
+            _cache_value_code(value, code)
+        return code
+    if value_type is dict:
+        return hashlib.blake2b(spec_encoding(value), digest_size=16).digest()
+    if value_type is list or value_type is tuple:
+        if all(type(item) is str for item in value):
+            key = ("[",) + tuple(value)
+            code = _value_codes.get(key)
+            if code is None:
+                code = hashlib.blake2b(
+                    b"[" + b"".join(spec_value_code(item) for item in value),
+                    digest_size=16,
+                ).digest()
+                _cache_value_code(key, code)
+            return code
+        return hashlib.blake2b(
+            b"[" + b"".join(spec_value_code(item) for item in value), digest_size=16
+        ).digest()
+    key = (value_type, value)
+    code = _value_codes.get(key)
+    if code is None:
+        code = hashlib.blake2b(json.dumps(value).encode(), digest_size=16).digest()
+        _cache_value_code(key, code)
+    return code
+
+
+_spec_item_encodings = {}
+_sorted_fields = {}
+
+
+def spec_item_encoding(field, value):
+    """
+    Encode a field of a specification and its value, as a part of the encoding of spec_encoding.
+
+    The encodings of the fields are cached by the field and the value, strings and lists of scalars as they are and
+    other values by their representation, so every choice of a field is encoded once. Dictionaries with several
+    items, such as the specifications of the queries of a set operation, are encoded item by item instead.
+
+    Args:
+        field (str): The field.
+        value: The value of the field.
+
+    Returns:
+        bytes: The code of the field followed by the encoding of the value.
+    """
+    value_type = type(value)
+    if value_type is str:
+        choice = (field, value)
+    elif value_type is dict and len(value) > 1:
+        return spec_value_code(field) + spec_encoding(value)
+    elif value_type is list:
+        # The types tell apart the values that are equal but encoded differently, such as 1 and true
+        choice = (field, tuple(value), tuple(map(type, value)))
+        try:
+            hash(choice)
+        except TypeError:
+            choice = (field, repr(value), None)
+    else:
+        choice = (field, repr(value), None)
+    encoding = _spec_item_encodings.get(choice)
+    if encoding is None:
+        if value_type is dict:
+            encoding = spec_value_code(field) + spec_encoding(value)
+        else:
+            encoding = spec_value_code(field) + b"=" + spec_value_code(value)
+        if len(_spec_item_encodings) >= SPEC_HASH_CACHE_SIZE:
+            _spec_item_encodings.clear()
+        _spec_item_encodings[choice] = encoding
+    return encoding
+
+
+def spec_encoding(spec):
+    """
+    Encode a specification canonically, as the flat sequence of the codes of its fields and of their choices.
+
+    The fields are sorted, and dictionaries are encoded in place between braces, so two specifications have the
+    same encoding if and only if they have the same JSON representation with sorted keys.
+
+    Args:
+        spec (dict): The specification.
+
+    Returns:
+        bytes: The encoding.
+    """
+    order = tuple(spec)
+    fields = _sorted_fields.get(order)
+    if fields is None:
+        fields = sorted(order)
+        if len(_sorted_fields) >= SPEC_HASH_CACHE_SIZE:
+            _sorted_fields.clear()
+        _sorted_fields[order] = fields
+    return b"{" + b"".join([spec_item_encoding(field, spec[field]) for field in fields]) + b"}"
+
+
+def hash_spec_items(item_encodings):
+    """
+    Calculate the id of a specification from the encodings of its fields, as calculate_spec_hash does.
+
+    Args:
+        item_encodings (list): The encodings of the fields sorted by field, as returned by spec_item_encoding.
+
+    Returns:
+        str: The 128-bit id as a hexadecimal string.
+    """
+    return hashlib.blake2b(
+        b"{" + b"".join(item_encodings) + b"}", digest_size=16
+    ).hexdigest()
+
+
+def calculate_spec_hash(spec, sha1=False):
+    """
+    Calculate the id of a specification.
+
+    The id is the 128-bit BLAKE2b digest of the canonical encoding of spec_encoding, which is built from the cached
+    encodings of the choices of the specification instead of a JSON encoding of the whole specification. Two
+    specifications have the same id if and only if they have the same JSON representation with sorted keys, in any
+    process.
+
+    Args:
+        spec (dict): The specification.
+        sha1 (bool, optional): Whether to return the SHA-1 hash of calculate_hash instead, for compatibility with
+            specification files keyed by SHA-1 hashes. Defaults to False.
+
+    Returns:
+        str: The 128-bit id as a hexadecimal string, or the SHA-1 hash value if sha1 is True.
+
+    Examples:
+        >>> calculate_spec_hash({"key1": "value1", "key2": "value2"})
+        'e6b5a1d20170473269faf86385eeba04'
+        >>> calculate_spec_hash({"key1": "value1", "key2": "value2"}, sha1=True)
+        '6fefca8fd9b4070669b2bca16cfa1ddc433acfdd'
+    """
+    if sha1:
+        return calculate_hash(spec)
+    return hashlib.blake2b(spec_encoding(spec), digest_size=16).hexdigest()
+
+
 def write_detail_to_json(details, file_name):
     """
     Write the details to a JSON file.
@@ -758,7 +1194,7 @@ def create_graph_from_schema(schema, fk):
     Create a graph representation of the foreign key relationships from the given schema.
 
     Args:
-        schema (dict): Dictionary containing the schema information.
+        schema (dict or Schema): Dictionary containing the schema information.
         fk (dict): Dictionary mapping tables to their foreign key relationships.
 
     Returns:
@@ -785,6 +1221,9 @@ def create_graph_from_schema(schema, fk):
             {'table1': 'table1', 'table2': 'table2', 'first_key': 'fk2', 'second_key': 'pk2'}
         ]
     """
+    if isinstance(schema, Schema) and fk is schema.foreign_keys:
+        return list(schema.join_definitions())
+
     graph = []
     for table in fk:
         fk_for_tables = list(fk[table].keys())
@@ -807,7 +1246,7 @@ def all_colms(schema, schema_type, unique_tables, alias=None):
     Generate a dictionary of columns categorized as "number" or "text" based on the provided schema and schema_type.
 
     Args:
-        schema (dict): Dictionary containing the schema information.
+        schema (dict or Schema): Dictionary containing the schema information.
         schema_type (dict): Dictionary mapping column names to their corresponding types.
         unique_tables (list): List of unique table names.
         alias (list, optional): List of table aliases. Defaults to None.
@@ -830,7 +1269,16 @@ def all_colms(schema, schema_type, unique_tables, alias=None):
         {'number': ['alias1.col1', 'alias2.col3'], 'text': ['alias1.col2', 'alias2.col4']}
     """
     columns = {"number": [], "text": []}
-    if len(unique_tables) == 1:
+    if (
+        len(unique_tables) == 1
+        and isinstance(schema, Schema)
+        and schema_type is schema.schema_types
+    ):
+        table = schema.table(unique_tables[0])
+        prefix = f"{alias[0]}." if alias else ""
+        columns["number"] = [prefix + col_name for col_name in table.number_columns]
+        columns["text"] = [prefix + col_name for col_name in table.text_columns]
+    elif len(unique_tables) == 1:
         table = unique_tables[0]
         for col_name in schema[table]:
             if schema_type[table][col_name] == "number":
@@ -943,31 +1391,183 @@ def select_combinations(elements_list, num_combinations):
         >>> select_combinations(elements_list, num_combinations)
         [['A', 'A', 'A'], ['A', 'A', 'B'], ['A', 'B', 'B'], ['B', 'B', 'B']]
     """
-    combinations = list(itertools.product(elements_list, repeat=num_combinations))
-    unique_combinations = {tuple(sorted(combination)) for combination in combinations}
-    return [list(combination) for combination in unique_combinations]
+    return list(MultisetCombinations(elements_list, num_combinations))
+
+
+class MultisetCombinations(Sequence):
+    """
+    Lazy sequence of the sorted combinations with repetition of a list of elements, in lexicographic order.
+
+    The combinations are the ones returned by select_combinations, but they are generated on demand: iterating costs
+    O(length) per combination, and the combination at a position (unranking) or the position of a combination
+    (ranking) are computed in O(length * number of elements) without enumerating the others. A random combination
+    can therefore be drawn with random.choice.
+
+    Attributes:
+        elements (list): The sorted distinct elements.
+        length (int): The number of elements in each combination.
+
+    Examples:
+        >>> combinations = MultisetCombinations(["B", "A", "C"], 2)
+        >>> len(combinations)
+        6
+        >>> combinations[4]
+        ['B', 'C']
+        >>> combinations.index(["B", "C"])
+        4
+    """
+
+    def __init__(self, elements_list, length):
+        self.elements = sorted(set(elements_list))
+        self.length = length
+        self._positions = {
+            element: index for index, element in enumerate(self.elements)
+        }
+        self._size = self._count(0, length)
+
+    def _count(self, first_element, length):
+        # Number of combinations of a given length of the elements from first_element on
+        num_elements = len(self.elements) - first_element
+        if length == 0:
+            return 1
+        if num_elements <= 0:
+            return 0
+        return math.comb(num_elements + length - 1, length)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for combination in itertools.combinations_with_replacement(
+            self.elements, self.length
+        ):
+            yield list(combination)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("combination index out of range")
+        combination = []
+        element = 0
+        for remaining in range(self.length - 1, -1, -1):
+            # Skip the combinations whose next element is smaller than the one at the index
+            count = self._count(element, remaining)
+            while index >= count:
+                index -= count
+                element += 1
+                count = self._count(element, remaining)
+            combination.append(self.elements[element])
+        return combination
+
+    def __contains__(self, combination):
+        try:
+            self.index(combination)
+        except ValueError:
+            return False
+        return True
+
+    def index(self, combination, start=0, stop=None):
+        """
+        Get the position of a combination.
+
+        Args:
+            combination (list): The combination, in any order.
+
+        Returns:
+            int: The position of the combination.
+
+        Raises:
+            ValueError: If the combination is not in the sequence.
+        """
+        try:
+            positions = sorted(self._positions[element] for element in combination)
+        except (KeyError, TypeError):
+            raise ValueError(f"{combination!r} is not in the combinations") from None
+        if len(positions) != self.length:
+            raise ValueError(f"{combination!r} is not in the combinations")
+        index = 0
+        element = 0
+        for remaining, position in zip(range(self.length - 1, -1, -1), positions):
+            for skipped in range(element, position):
+                index += self._count(skipped, remaining)
+            element = position
+        if not start <= index < (self._size if stop is None else stop):
+            raise ValueError(f"{combination!r} is not in the combinations")
+        return index
+
+    def __repr__(self):
+        return f"MultisetCombinations({self.elements!r}, {self.length})"
+
+
+class ChainedSequence(Sequence):
+    """
+    Lazy concatenation of sequences.
+
+    Args:
+        sequences (list): The sequences, each supporting len and indexing.
+
+    Examples:
+        >>> choices = ChainedSequence([["*"], MultisetCombinations(["A", "B"], 2)])
+        >>> len(choices)
+        4
+        >>> choices[0], choices[3]
+        ('*', ['B', 'B'])
+    """
+
+    def __init__(self, sequences):
+        self.sequences = list(sequences)
+        self._offsets = []
+        self._size = 0
+        for sequence in self.sequences:
+            self._offsets.append(self._size)
+            self._size += len(sequence)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for sequence in self.sequences:
+            yield from sequence
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("index out of range")
+        position = bisect.bisect_right(self._offsets, index) - 1
+        # Skip the empty sequences that share the offset
+        while index - self._offsets[position] >= len(self.sequences[position]):
+            position += 1
+        return self.sequences[position][index - self._offsets[position]]
+
+    def __repr__(self):
+        return f"ChainedSequence({self.sequences!r})"
 
 
 def print_attributes(**kwargs):
     """
-    Print the key-value pairs of the provided attributes.
+    Log the key-value pairs of the provided attributes at the DEBUG level.
+
+    The attributes are only formatted when DEBUG messages are logged, as they can be whole partial queries.
 
     Args:
         **kwargs: Key-value pairs of attributes.
 
     Examples:
+        >>> import sys
+        >>> handler = logging.StreamHandler(sys.stdout)
+        >>> logger.addHandler(handler)
+        >>> logger.setLevel(logging.DEBUG)
         >>> print_attributes(name="John", age=30, city="New York")
         name: John
         age: 30
         city: New York
-
-        >>> print_attributes(color="blue", size="large")
-        color: blue
-        size: large
+        >>> logger.removeHandler(handler)
+        >>> logger.setLevel(logging.NOTSET)
     """
-    for key, value in kwargs.items():
-        print(f"{key}: {value}")
-    print()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("\n".join(f"{key}: {value}" for key, value in kwargs.items()))
 
 
 schema = {
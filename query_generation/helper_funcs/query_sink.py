@@ -0,0 +1,195 @@
+import abc
+import csv
+import json
+import os
+import signal
+import threading
+
+# The number of rows a query sink keeps in memory before writing them to its file
+DEFAULT_WRITE_BUFFER_SIZE = 1000
+
+# The signals that make a query sink flush its rows before the process exits
+FLUSH_SIGNALS = (signal.SIGTERM,)
+
+
+class QuerySink(abc.ABC):
+    """
+    An append-only output file for generated queries.
+
+    The file is opened once and the rows are buffered and written when the buffer is full, when the sink is flushed
+    or closed, and when the process receives one of FLUSH_SIGNALS while the sink is used as a context manager, so the
+    cost of writing the queries is linear in their number. Subclasses define the file format by implementing write
+    and _write_rows.
+
+    Attributes:
+        file_name (str): The name of the output file.
+        buffer_size (int): The number of rows kept in memory before they are written.
+        num_rows (int): The number of rows written or buffered so far.
+    """
+
+    def __init__(self, file_name, buffer_size=DEFAULT_WRITE_BUFFER_SIZE):
+        self.file_name = file_name
+        self.buffer_size = max(1, buffer_size)
+        self.num_rows = 0
+        self._rows = []
+        self._file = open(file_name, mode="w", newline="")
+        self._previous_handlers = {}
+        self._write_header()
+
+    @abc.abstractmethod
+    def write(self, spec_hash, spec, query):
+        """
+        Add a generated query to the output.
+
+        Args:
+            spec_hash (str): The hash of the specification of the query.
+            spec (dict): The specification of the query.
+            query (str): The query.
+
+        Returns:
+            None
+        """
+
+    def flush(self):
+        """
+        Write the buffered rows to the file.
+
+        Returns:
+            None
+        """
+        self._write_rows(self._rows)
+        self._rows = []
+        self._file.flush()
+
+    def close(self):
+        """
+        Write the remaining rows and close the file.
+
+        Returns:
+            None
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def _add_row(self, row):
+        self._rows.append(row)
+        self.num_rows += 1
+        if len(self._rows) >= self.buffer_size:
+            self.flush()
+
+    def _write_header(self):
+        pass
+
+    @abc.abstractmethod
+    def _write_rows(self, rows):
+        # Write rows added by _add_row to the file
+        pass
+
+    def _exit_on_signal(self, signum, frame):
+        # Unwind the stack, so the with statement closes the sink, and exit with the status of the signal
+        raise SystemExit(128 + signum)
+
+    def __enter__(self):
+        if threading.current_thread() is threading.main_thread():
+            for signum in FLUSH_SIGNALS:
+                self._previous_handlers[signum] = signal.signal(
+                    signum, self._exit_on_signal
+                )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        self._previous_handlers = {}
+        self.close()
+
+
+class CsvQuerySink(QuerySink):
+    """
+    A query sink writing the CSV format of write_queries_to_file: one row per specification, with the specification
+    and its queries separated by new lines.
+
+    The queries of a specification are consecutive in the output of iter_queries, so a row is complete when a query
+    of another specification is written.
+    """
+
+    fieldnames = ["Specification", "Partial Query"]
+
+    def __init__(self, file_name, buffer_size=DEFAULT_WRITE_BUFFER_SIZE):
+        self._pending_hash = None
+        self._pending_row = None
+        super().__init__(file_name, buffer_size)
+
+    def write(self, spec_hash, spec, query):
+        if self._pending_row is not None and spec_hash == self._pending_hash:
+            self._pending_row["Partial Query"] += "\n" + query
+            return
+        self._complete_pending_row()
+        self._pending_hash = spec_hash
+        self._pending_row = {"Specification": str(spec), "Partial Query": query}
+
+    def close(self):
+        if not self._file.closed:
+            self._complete_pending_row()
+        super().close()
+
+    def _complete_pending_row(self):
+        if self._pending_row is not None:
+            self._add_row(self._pending_row)
+            self._pending_row = None
+
+    def _write_header(self):
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+
+    def _write_rows(self, rows):
+        self._writer.writerows(rows)
+
+
+class JsonLinesQuerySink(QuerySink):
+    """
+    A query sink writing one JSON object per line and per query, with the "spec_hash", "spec" and "query".
+    """
+
+    def write(self, spec_hash, spec, query):
+        self._add_row({"spec_hash": spec_hash, "spec": spec, "query": query})
+
+    def _write_rows(self, rows):
+        self._file.writelines(json.dumps(row) + "\n" for row in rows)
+
+
+# The query sink of every file extension
+QUERY_SINK_FORMATS = {
+    ".csv": CsvQuerySink,
+    ".jsonl": JsonLinesQuerySink,
+}
+
+
+def open_query_sink(file_name=None, buffer_size=DEFAULT_WRITE_BUFFER_SIZE):
+    """
+    Open the query sink of an output file, in the format of its extension.
+
+    Args:
+        file_name (str, optional): Name of the output file, ending in .csv or .jsonl. Defaults to output/res.csv.
+        buffer_size (int, optional): The number of rows kept in memory before they are written. Defaults to
+            DEFAULT_WRITE_BUFFER_SIZE.
+
+    Returns:
+        QuerySink: The sink, to be closed or used as a context manager.
+
+    Raises:
+        ValueError: If the extension is not one of QUERY_SINK_FORMATS.
+    """
+    if file_name is None:
+        current_dir = os.path.dirname(__file__)
+        output_dir = os.path.abspath(os.path.join(current_dir, "../output"))
+        file_name = os.path.join(output_dir, "res.csv")
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in QUERY_SINK_FORMATS:
+        raise ValueError(
+            f"Unknown query output format {extension!r}, expected one of "
+            f"{sorted(QUERY_SINK_FORMATS)}"
+        )
+    return QUERY_SINK_FORMATS[extension](file_name, buffer_size)
@@ -0,0 +1 @@
+from .stage_stats import *
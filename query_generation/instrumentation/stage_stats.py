@@ -0,0 +1,321 @@
+import json
+import time
+
+from spec_space import spec_choice_levels
+
+# The fields of a specification whose values the time of the specifications is broken down by
+DEFAULT_DIMENSIONS = (
+    "set_op_type",
+    "meaningful_joins",
+    "table_exp_type",
+    "where_type",
+    "number_of_value_exp_in_group_by",
+    "having_type",
+    "value_exp_types",
+    "distinct_type",
+    "orderby_type",
+    "limit_type",
+)
+
+# The statistics being recorded, set while a StageStats is used as a context manager
+_active_stats = None
+
+
+class _Stage:
+    # The record of one call of a stage, returned by StageStats.stage
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.candidates = 0
+
+    def produced(self, candidates):
+        self.candidates += candidates
+
+    def __enter__(self):
+        self.stats._enter(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats._exit(self.name, self.candidates, exc_value)
+        return False
+
+
+class _NullStage:
+    # The stage returned when no statistics are recorded, which does nothing
+    def produced(self, candidates):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageStats:
+    """
+    The wall time and counters of the stages of query generation, and of the specifications by the values of their
+    fields.
+
+    Recording is opt-in: the stages are only recorded while a StageStats is used as a context manager, and stage()
+    does nothing otherwise. Every stage records its calls, the candidates it produced, the exceptions raised out of
+    it, which the query generator swallows to move on to the next candidate, its total time and its self time, the
+    total time without the stages called from it. Stages nest: the stages of a subquery are recorded inside the stage
+    that generates the subquery, and the total time of a stage called recursively is only counted for the outermost
+    call, so that it is not counted twice.
+
+    Attributes:
+        stages (dict): The "calls", "candidates", "exceptions", "total_time" and "self_time" of every stage.
+        dimensions (dict): For every field, the "specs", "queries", "exceptions" and "time" of the specifications of
+            every value of the field. An exception counts once, however many stages it unwinds through. A value with several levels, such as a list of value expression types, counts
+            for each of its levels (see spec_choice_levels).
+        dimension_fields (tuple): The fields the specifications are broken down by.
+
+    Examples:
+        >>> with StageStats() as stats:
+        ...     with stage("where") as where_stage:
+        ...         where_stage.produced(3)
+        >>> stats.stages["where"]["calls"], stats.stages["where"]["candidates"]
+        (1, 3)
+    """
+
+    def __init__(self, dimension_fields=DEFAULT_DIMENSIONS):
+        self.stages = {}
+        self.dimensions = {}
+        self.dimension_fields = dimension_fields
+        self._stack = []
+        self._spec = None
+        self._spec_counters = None
+        self._last_exception = None
+        self._previous_stats = None
+
+    def stage(self, name):
+        """
+        Record a call of a stage, as a context manager.
+
+        Args:
+            name (str): The name of the stage.
+
+        Returns:
+            context manager: The record of the call. Its produced(n) method adds n candidates.
+        """
+        return _Stage(self, name)
+
+    def begin_spec(self, spec):
+        """
+        Start attributing the time, queries and exceptions of the stages to a specification, until the next one.
+
+        Specifications begun inside a stage are the specifications of subqueries, which are part of that stage, and
+        are ignored.
+
+        Args:
+            spec (dict): The specification.
+
+        Returns:
+            None
+        """
+        if self._stack:
+            return
+        self._end_spec()
+        self._spec = spec
+        self._spec_counters = {"queries": 0, "exceptions": 0, "time": 0.0}
+
+    def count_query(self):
+        """
+        Count a query generated for the current specification. Queries of subqueries are ignored.
+
+        Returns:
+            None
+        """
+        if not self._stack and self._spec_counters is not None:
+            self._spec_counters["queries"] += 1
+
+    def to_dict(self):
+        """
+        Get the statistics as a JSON serializable dictionary.
+
+        Returns:
+            dict: The "stages" and the "dimensions".
+        """
+        self._end_spec()
+        return {"stages": self.stages, "dimensions": self.dimensions}
+
+    def write_json(self, file_name):
+        """
+        Write the statistics to a JSON file.
+
+        Args:
+            file_name (str): Name of the JSON file.
+
+        Returns:
+            None
+        """
+        with open(file_name, "w") as json_file:
+            json.dump(self.to_dict(), json_file, indent=2)
+
+    def format_report(self, max_values=10):
+        """
+        Format the statistics as ASCII tables, the stages by total time, then the values of every field by time.
+
+        Args:
+            max_values (int, optional): The largest number of values shown for every field. Defaults to 10.
+
+        Returns:
+            str: The report.
+        """
+        statistics = self.to_dict()
+        lines = [
+            f"{'stage':<20} {'calls':>8} {'candidates':>10} {'exceptions':>10} "
+            f"{'total s':>9} {'self s':>9} {'ms/call':>9}"
+        ]
+        for name, counters in sorted(
+            statistics["stages"].items(), key=lambda item: -item[1]["total_time"]
+        ):
+            lines.append(
+                f"{name:<20} {counters['calls']:>8} {counters['candidates']:>10} "
+                f"{counters['exceptions']:>10} {counters['total_time']:>9.3f} "
+                f"{counters['self_time']:>9.3f} "
+                f"{1000 * counters['total_time'] / counters['calls']:>9.2f}"
+            )
+        for field, values in statistics["dimensions"].items():
+            lines.append("")
+            lines.append(
+                f"{field:<40} {'specs':>6} {'queries':>8} {'exceptions':>10} "
+                f"{'time s':>9} {'ms/spec':>9}"
+            )
+            for value, counters in sorted(
+                values.items(), key=lambda item: -item[1]["time"]
+            )[:max_values]:
+                lines.append(
+                    f"  {value[:38]:<38} {counters['specs']:>6} {counters['queries']:>8} "
+                    f"{counters['exceptions']:>10} {counters['time']:>9.3f} "
+                    f"{1000 * counters['time'] / counters['specs']:>9.2f}"
+                )
+        return "\n".join(lines)
+
+    def _enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self, name, candidates, exception):
+        raised = exception is not None
+        _, start, child_time = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        counters = self.stages.setdefault(
+            name,
+            {
+                "calls": 0,
+                "candidates": 0,
+                "exceptions": 0,
+                "total_time": 0.0,
+                "self_time": 0.0,
+            },
+        )
+        counters["calls"] += 1
+        counters["candidates"] += candidates
+        counters["exceptions"] += raised
+        counters["self_time"] += elapsed - child_time
+        if all(frame[0] != name for frame in self._stack):
+            counters["total_time"] += elapsed
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        if self._spec_counters is not None:
+            # An exception unwinds through every enclosing stage, it only counts once for the specification
+            if raised and exception is not self._last_exception:
+                self._spec_counters["exceptions"] += 1
+            if not self._stack:
+                self._spec_counters["time"] += elapsed
+        # Remember the exception, so that the enclosing stages it unwinds through do not count it again
+        self._last_exception = exception if self._stack else None
+
+    def _end_spec(self):
+        # Add the counters of the current specification to the values of its fields
+        if self._spec is None:
+            return
+        query_spec = self._spec.get("first_query", self._spec)
+        for field in self.dimension_fields:
+            value = self._spec.get(field, query_spec.get(field))
+            if value is None:
+                continue
+            for level in spec_choice_levels(field, value):
+                counters = self.dimensions.setdefault(field, {}).setdefault(
+                    str(level), {"specs": 0, "queries": 0, "exceptions": 0, "time": 0.0}
+                )
+                counters["specs"] += 1
+                for key, count in self._spec_counters.items():
+                    counters[key] += count
+        self._spec = None
+        self._spec_counters = None
+
+    def __enter__(self):
+        global _active_stats
+        self._previous_stats = _active_stats
+        _active_stats = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active_stats
+        _active_stats = self._previous_stats
+        self._end_spec()
+        return False
+
+
+def stage(name):
+    """
+    Record a call of a stage in the active StageStats, if any.
+
+    Args:
+        name (str): The name of the stage, e.g. "where".
+
+    Returns:
+        context manager: The record of the call. Its produced(n) method adds n candidates.
+    """
+    if _active_stats is None:
+        return _NULL_STAGE
+    return _active_stats.stage(name)
+
+
+def run_stage(name, func, *args, **kwargs):
+    """
+    Call a function as a stage of the active StageStats, if any, counting the candidates it returns.
+
+    Args:
+        name (str): The name of the stage.
+        func (function): The function.
+        *args: The positional arguments of the function.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        The result of the function. A list counts as that many candidates, anything else as one.
+    """
+    with stage(name) as stage_record:
+        result = func(*args, **kwargs)
+        stage_record.produced(len(result) if isinstance(result, list) else 1)
+    return result
+
+
+def begin_spec(spec):
+    """
+    Start attributing the stages of the active StageStats, if any, to a specification. See StageStats.begin_spec.
+
+    Args:
+        spec (dict): The specification.
+
+    Returns:
+        None
+    """
+    if _active_stats is not None:
+        _active_stats.begin_spec(spec)
+
+
+def count_query():
+    """
+    Count a query generated for the current specification of the active StageStats, if any.
+
+    Returns:
+        None
+    """
+    if _active_stats is not None:
+        _active_stats.count_query()
@@ -1,20 +1,25 @@
-import itertools
 import random
+from collections import OrderedDict
 
-import networkx as nx
 from helper_funcs import create_graph_from_schema
 
 # TODO self join
 
+# The maximum number of join indexes kept in memory, the least recently used ones are dropped first
+JOIN_INDEX_CACHE_SIZE = 64
+
+_join_indexes = OrderedDict()
+
 
 def get_max_joins_and_join_definitions(schema, fk):
     """
     Get the maximum number of joins possible and the join definitions.
+
+    The join definitions are shared through the join index of the schema and must not be modified.
     """
 
-    join_definitions = create_graph_from_schema(schema, fk)
-    max_num_joins = find_max_joins(join_definitions)
-    return max_num_joins, join_definitions
+    join_index = get_join_index(schema, fk)
+    return join_index.max_joins, join_index.join_definitions
 
 
 def find_max_joins(join_definitions):
@@ -25,7 +30,7 @@ def find_max_joins(join_definitions):
         join_definitions (list): List of join definitions.
 
     Returns:
-        int: The maximum number of joins possible.
+        int: The maximum number of joins possible, 0 if there are no join definitions.
 
     Examples:
         >>> join_definitions = [
@@ -46,13 +51,34 @@ def find_max_joins(join_definitions):
         ... ]
         >>> find_max_joins(join_definitions)
         1
+        >>> find_max_joins([])
+        0
     """
-    G = nx.Graph()
+    # Union-find over the tables, with path halving and union by size
+    parents = {}
+    sizes = {}
+
+    def find(table):
+        while parents[table] != table:
+            parents[table] = parents[parents[table]]
+            table = parents[table]
+        return table
+
     for join in join_definitions:
-        table1 = join["table1"]
-        table2 = join["table2"]
-        G.add_edge(table1, table2)
-    return max(len(component) - 1 for component in nx.connected_components(G))
+        for table in (join["table1"], join["table2"]):
+            if table not in parents:
+                parents[table] = table
+                sizes[table] = 1
+        root1 = find(join["table1"])
+        root2 = find(join["table2"])
+        if root1 != root2:
+            if sizes[root1] < sizes[root2]:
+                root1, root2 = root2, root1
+            parents[root2] = root1
+            sizes[root1] += sizes[root2]
+    return max(
+        (sizes[table] - 1 for table in parents if parents[table] == table), default=0
+    )
 
 
 def generate_connections(join_definitions, num_tables):
@@ -83,22 +109,360 @@ def generate_connections(join_definitions, num_tables):
         [['farm_competition', 'city', 'Host_city_ID', 'City_ID'], ['farm_competition', 'competition_record', 'Competition_ID', 'Competition_ID'], ['competition_record', 'farm', 'Farm_ID', 'Farm_ID']]
 
     """
-    G = nx.Graph()
-    G.add_edges_from((join["table1"], join["table2"]) for join in join_definitions)
-
-    connections = []
-    for combination in itertools.combinations(G.nodes, num_tables):
-        subgraph = G.subgraph(combination)
-        if nx.is_connected(subgraph):
-            connection = [
-                join[key]
-                for join in join_definitions
-                if join["table1"] in combination and join["table2"] in combination
-                for key in ("table1", "table2", "first_key", "second_key")
+    neighbors, joins_by_table = build_join_graph(join_definitions)
+
+    # Sorting the connected subsets gives the order of itertools.combinations over the tables
+    return [
+        collect_connection(join_definitions, joins_by_table, combination)
+        for combination in sorted(iter_connected_subsets(neighbors, num_tables))
+    ]
+
+
+def build_join_graph(join_definitions):
+    """
+    Build the adjacency list of the tables of the join definitions.
+
+    The tables are numbered in the order in which they first appear in the join definitions.
+
+    Args:
+        join_definitions (list): List of join definitions.
+
+    Returns:
+        tuple: The set of the neighbouring tables of every table, and for every table the list of
+            (join index, other table) of the join definitions whose first table it is.
+    """
+    table_indexes = {}
+    for join in join_definitions:
+        table_indexes.setdefault(join["table1"], len(table_indexes))
+        table_indexes.setdefault(join["table2"], len(table_indexes))
+    neighbors = [set() for _ in table_indexes]
+    joins_by_table = [[] for _ in table_indexes]
+    for join_index, join in enumerate(join_definitions):
+        index1 = table_indexes[join["table1"]]
+        index2 = table_indexes[join["table2"]]
+        if index1 != index2:
+            neighbors[index1].add(index2)
+            neighbors[index2].add(index1)
+        joins_by_table[index1].append((join_index, index2))
+    return neighbors, joins_by_table
+
+
+def collect_connection(join_definitions, joins_by_table, combination):
+    """
+    Collect the join definitions between a set of tables into a connection.
+
+    Args:
+        join_definitions (list): List of join definitions.
+        joins_by_table (list): The join definitions of every table, as returned by build_join_graph.
+        combination (tuple): The indexes of the tables.
+
+    Returns:
+        list: The table1, table2, first_key and second_key of every join definition between the tables,
+            in the order of the join definitions.
+    """
+    members = set(combination)
+    join_indexes = sorted(
+        join_index
+        for index in combination
+        for join_index, other in joins_by_table[index]
+        if other in members
+    )
+    return [
+        join_definitions[join_index][key]
+        for join_index in join_indexes
+        for key in ("table1", "table2", "first_key", "second_key")
+    ]
+
+
+def iter_connected_subsets(neighbors, size):
+    """
+    Enumerate the connected subsets of vertices of a given size of an undirected graph.
+
+    The subsets are grown one neighbouring vertex at a time from their smallest vertex, following the ESU algorithm
+    (Wernicke, 2006), so every connected subset is produced exactly once and the work is proportional to the number of
+    connected subsets instead of to the number of all subsets.
+
+    Args:
+        neighbors (list): The adjacency list of the graph, the set of the neighbours of every vertex 0..n-1.
+        size (int): The number of vertices of the subsets.
+
+    Yields:
+        tuple: The sorted vertices of a connected subset.
+
+    Examples:
+        >>> neighbors = [{1}, {0, 2}, {1, 3}, {2}]
+        >>> sorted(iter_connected_subsets(neighbors, 3))
+        [(0, 1, 2), (1, 2, 3)]
+    """
+    if size < 1:
+        return
+
+    def extend(subset, closed_neighborhood, extension, root):
+        if len(subset) == size:
+            yield tuple(sorted(subset))
+            return
+        extension = list(extension)
+        while extension:
+            vertex = extension.pop()
+            new_extension = extension + [
+                neighbor
+                for neighbor in neighbors[vertex]
+                if neighbor > root and neighbor not in closed_neighborhood
+            ]
+            yield from extend(
+                subset + [vertex],
+                closed_neighborhood | neighbors[vertex],
+                new_extension,
+                root,
+            )
+
+    for root in range(len(neighbors)):
+        yield from extend(
+            [root],
+            neighbors[root] | {root},
+            [neighbor for neighbor in neighbors[root] if neighbor > root],
+            root,
+        )
+
+
+def count_growth_paths(neighbors, subset):
+    """
+    Calculate the probability that random growth from a uniformly chosen vertex produces a given connected subset.
+
+    Random growth starts from a uniformly chosen vertex and repeatedly adds a uniformly chosen vertex of the
+    neighbourhood of the current subset. The probability of a subset is summed over all its growth orders with a
+    dynamic program over its own subsets.
+
+    Args:
+        neighbors (list): The adjacency list of the graph.
+        subset (tuple): The vertices of the connected subset.
+
+    Returns:
+        float: The probability of growing the subset.
+    """
+    bits = {vertex: 1 << position for position, vertex in enumerate(subset)}
+    probabilities = {bits[vertex]: 1 / len(neighbors) for vertex in subset}
+    for _ in range(len(subset) - 1):
+        next_probabilities = {}
+        for mask, probability in probabilities.items():
+            members = [vertex for vertex in subset if mask & bits[vertex]]
+            frontier = set().union(*(neighbors[vertex] for vertex in members))
+            frontier.difference_update(members)
+            probability /= len(frontier)
+            for vertex in frontier:
+                if vertex in bits:
+                    next_mask = mask | bits[vertex]
+                    next_probabilities[next_mask] = (
+                        next_probabilities.get(next_mask, 0) + probability
+                    )
+        probabilities = next_probabilities
+    return sum(probabilities.values())
+
+
+def sample_connected_subset(neighbors, size, max_attempts=100):
+    """
+    Draw a connected subset of vertices of a given size uniformly at random, without enumerating all of them.
+
+    A subset is grown randomly from a uniformly chosen vertex, then accepted with a probability inversely
+    proportional to its growth probability (rejection sampling), which makes every connected subset equally likely.
+    Each attempt costs O(size * degree), plus the growth probability of the drawn subset, which is computed over the
+    2^size subsets of that subset only.
+
+    Args:
+        neighbors (list): The adjacency list of the graph, the set of the neighbours of every vertex 0..n-1.
+        size (int): The number of vertices of the subset.
+        max_attempts (int, optional): The number of attempts before giving up. Defaults to 100.
+
+    Returns:
+        tuple or None: The sorted vertices of the subset, or None if no subset was accepted.
+
+    Examples:
+        >>> neighbors = [{1}, {0, 2}, {1, 3}, {2}]
+        >>> sample_connected_subset(neighbors, 3) in [(0, 1, 2), (1, 2, 3)]
+        True
+    """
+    num_vertices = len(neighbors)
+    if size < 1 or size > num_vertices:
+        return None
+    degrees = sorted((len(vertex_neighbors) for vertex_neighbors in neighbors), reverse=True)
+    # Lower bound of the growth probability of any connected subset. A connected subset of k vertices has at least
+    # 2^(k-1) growth orders, since removing any of its (at least two) non-cut vertices leaves it connected, and the
+    # neighbourhood of i connected vertices has at most the sum of their i largest degrees minus the 2(i-1) degrees
+    # used by the edges of a spanning tree between them
+    lower_bound = 2 ** (size - 1) / num_vertices
+    for step in range(1, size):
+        max_frontier = min(num_vertices - step, sum(degrees[:step]) - 2 * (step - 1))
+        if max_frontier < 1:
+            return None
+        lower_bound /= max_frontier
+
+    for _ in range(max_attempts):
+        subset = [random.randrange(num_vertices)]
+        frontier = set(neighbors[subset[0]])
+        while len(subset) < size and frontier:
+            vertex = random.choice(sorted(frontier))
+            subset.append(vertex)
+            frontier |= neighbors[vertex]
+            frontier.difference_update(subset)
+        if len(subset) < size:
+            continue
+        subset = tuple(sorted(subset))
+        if random.random() * count_growth_paths(neighbors, subset) <= lower_bound:
+            return subset
+    return None
+
+
+def sample_connection(join_definitions, num_tables):
+    """
+    Draw a connection between a given number of tables uniformly at random among all the connections.
+
+    Falls back to choosing among all the connections of generate_connections if the rejection sampler gives up.
+
+    Args:
+        join_definitions (list): List of join definitions.
+        num_tables (int): Number of tables for join to generate a connection for.
+
+    Returns:
+        list: The connection, in the format of generate_connections.
+
+    Raises:
+        IndexError: If there is no connection between the given number of tables.
+    """
+    neighbors, joins_by_table = build_join_graph(join_definitions)
+    combination = sample_connected_subset(neighbors, num_tables)
+    if combination is None:
+        return random.choice(generate_connections(join_definitions, num_tables))
+    return collect_connection(join_definitions, joins_by_table, combination)
+
+
+class JoinIndex:
+    """
+    Join paths of a database, derived once from its foreign keys.
+
+    The adjacency list of the foreign key graph is built when the index is created. The connected components, the
+    maximum number of joins and the connections of every number of tables are computed the first time they are
+    requested and kept for later calls. The returned lists are shared and must not be modified.
+
+    Attributes:
+        join_definitions (list): The join definitions, as returned by create_graph_from_schema.
+
+    Examples:
+        >>> join_index = JoinIndex(
+        ...     [
+        ...         {"table1": "farm_competition", "table2": "city", "first_key": "Host_city_ID", "second_key": "City_ID"},
+        ...         {"table1": "competition_record", "table2": "farm", "first_key": "Farm_ID", "second_key": "Farm_ID"},
+        ...     ]
+        ... )
+        >>> join_index.max_joins
+        1
+        >>> join_index.connections(2)
+        [['farm_competition', 'city', 'Host_city_ID', 'City_ID'], ['competition_record', 'farm', 'Farm_ID', 'Farm_ID']]
+    """
+
+    def __init__(self, join_definitions):
+        self.join_definitions = join_definitions
+        self._neighbors, self._joins_by_table = build_join_graph(join_definitions)
+        self._components = None
+        self._connections = {}
+
+    @property
+    def components(self):
+        """
+        list: The connected components of the foreign key graph, as lists of table indexes.
+        """
+        if self._components is None:
+            seen = set()
+            self._components = []
+            for root in range(len(self._neighbors)):
+                if root in seen:
+                    continue
+                seen.add(root)
+                component = [root]
+                for table in component:
+                    for neighbor in self._neighbors[table]:
+                        if neighbor not in seen:
+                            seen.add(neighbor)
+                            component.append(neighbor)
+                self._components.append(component)
+        return self._components
+
+    @property
+    def max_joins(self):
+        """
+        int: The maximum number of joins possible, one less than the size of the largest connected component.
+        """
+        return max((len(component) - 1 for component in self.components), default=0)
+
+    def connections(self, num_tables):
+        """
+        Get the connections between a given number of tables, as returned by generate_connections.
+
+        Args:
+            num_tables (int): Number of tables for join to generate connections for.
+
+        Returns:
+            list: List of connections between tables.
+        """
+        if num_tables not in self._connections:
+            self._connections[num_tables] = [
+                collect_connection(
+                    self.join_definitions, self._joins_by_table, combination
+                )
+                for combination in sorted(
+                    iter_connected_subsets(self._neighbors, num_tables)
+                )
             ]
+        return self._connections[num_tables]
+
+    def sample_connection(self, num_tables):
+        """
+        Draw a connection between a given number of tables uniformly at random, as sample_connection does.
+
+        Args:
+            num_tables (int): Number of tables for join to generate a connection for.
+
+        Returns:
+            list: The connection.
 
-            connections.append(connection)
-    return connections
+        Raises:
+            IndexError: If there is no connection between the given number of tables.
+        """
+        combination = sample_connected_subset(self._neighbors, num_tables)
+        if combination is None:
+            return random.choice(self.connections(num_tables))
+        return collect_connection(
+            self.join_definitions, self._joins_by_table, combination
+        )
+
+
+def get_join_index(schema, fk):
+    """
+    Get the join index of a database, building it only the first time its foreign keys are seen.
+
+    The indexes are keyed by the foreign key relationships of the schema, which fully determine its join paths,
+    and at most JOIN_INDEX_CACHE_SIZE of them are kept.
+
+    Args:
+        schema (dict or Schema): Dictionary containing the schema information.
+        fk (dict): Dictionary mapping tables to their foreign key relationships.
+
+    Returns:
+        JoinIndex: The join index of the database.
+    """
+    key = tuple(
+        (table, column, referenced)
+        for table in fk
+        for column, referenced in fk[table].items()
+    )
+    join_index = _join_indexes.get(key)
+    if join_index is None:
+        join_index = JoinIndex(create_graph_from_schema(schema, fk))
+        _join_indexes[key] = join_index
+        if len(_join_indexes) > JOIN_INDEX_CACHE_SIZE:
+            _join_indexes.popitem(last=False)
+    else:
+        _join_indexes.move_to_end(key)
+    return join_index
 
 
 def generate_join_query(schema, fk, join_types, random_choice=False):
@@ -123,24 +487,25 @@ def generate_join_query(schema, fk, join_types, random_choice=False):
 
     """
     num_joins = len(join_types)
-    join_definitions = create_graph_from_schema(schema, fk)
-    connections = generate_connections(join_definitions, num_joins + 1)
-
+    join_index = get_join_index(schema, fk)
     if random_choice:
-        connections = [random.choice(connections)]
+        connections = [join_index.sample_connection(num_joins + 1)]
+    else:
+        connections = join_index.connections(num_joins + 1)
 
     queries = []
     for connection in connections:
         tables = connection[::4]  # Extract table names
         join_conditions = []
-        unique_tables = set()  # Use a set to ensure unique table names
+        # Unique table names, in join order, which a set of strings would not keep across processes
+        unique_tables = {}
         for j in range(len(connection) // 4):
             table1 = connection[j * 4]
             table2 = connection[j * 4 + 1]
             key1 = connection[j * 4 + 2]
             key2 = connection[j * 4 + 3]
-            unique_tables.add(table1)
-            unique_tables.add(table2)
+            unique_tables[table1] = None
+            unique_tables[table2] = None
             join_conditions.append(f"{table1}.{key1} = {table2}.{key2}")
         join_clause = ""
         temp_index = 0
@@ -204,7 +569,7 @@ def generate_meaningless_join(
         tables = random.sample(table_list, num_joins + 1)
 
         join_conditions = []
-        unique_tables = set()
+        unique_tables = {}
 
         for j in range(num_joins):
             table1 = tables[j]
@@ -213,8 +578,8 @@ def generate_meaningless_join(
             key1 = random.choice(schema[table1])
             key2 = random.choice(schema[table2])
 
-            unique_tables.add(table1)
-            unique_tables.add(table2)
+            unique_tables[table1] = None
+            unique_tables[table2] = None
 
             join_conditions.append(f"{table1}.{key1} = {table2}.{key2}")
 
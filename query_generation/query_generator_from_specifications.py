@@ -1,70 +1,96 @@
+import argparse
+import contextlib
 import csv
 import json
+import logging
 import os
 import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Import functions from different modules
 from group_by_having import complete_with_group_by_clause
 from having import complete_with_having_clause
-from helper_funcs import print_attributes, write_queries_to_file
+from helper_funcs import (
+    DEFAULT_WRITE_BUFFER_SIZE,
+    derive_spec_seed,
+    first_generated_query,
+    merge_query_files,
+    open_query_sink,
+    print_attributes,
+    shard_bounds,
+)
+from instrumentation import StageStats, begin_spec, count_query, run_stage
 from limit import complete_query_with_limit
 from order_by import complete_query_with_order_by
-from read_schema import read_schema_pk_fk_types
+from read_schema import Schema, open_schema_catalog
 from select_query import complete_query_with_select
 from table_expression import create_table_expression
 from where import complete_with_where_clause
 
+logger = logging.getLogger(__name__)
 
-def query_generator(
+# The number of consecutive specifications a worker of parallel_query_generator generates the queries of per task
+PARALLEL_CHUNK_SIZE = 32
+
+# The schema of the database a worker process of parallel_query_generator generates queries for, set once by
+# _init_query_worker
+_worker_schema = None
+
+
+def iter_queries(
     db_name,
     schema,
     pk,
     fk,
     schema_types,
     specs=None,
-    max_num=1000,
     must_be_in_select=None,
     must_be_in_where=None,
-    write_to_csv=True,
     is_subquery=False,
     testing_with_one_spec=False,
     random_choice=False,
-    types_of_value_exps_for_set_op=None,
-    return_select_fields=False,
-    return_table_exp_attributes=False,
-    return_unique_tables=False,
-    return_select_fields_dict=False,
+    seed=None,
+    shard=None,
 ):
     """
-    Generate queries based on the specifications provided in the specs dictionary.
+    Generate queries based on the specifications provided in the specs dictionary, one at a time.
+
+    Every query is yielded as soon as it is completed, so the queries do not have to be kept in memory and can be
+    written or executed while the next ones are generated.
 
     Args:
         db_name (str): The name of the database.
-        schema (dict): The schema of the database.
+        schema (dict or Schema): The schema of the database. Dictionaries are converted to a Schema once per call.
         pk (list): The primary key columns.
         fk (list): The foreign key columns.
         schema_types (dict): The data types of the schema.
         specs (dict, optional): The specifications for generating queries. Defaults to None.
-        max_num (int, optional): The maximum number of queries to generate. Defaults to 1000.
         must_be_in_select (list, optional): The attributes that must be included in the SELECT clause. Defaults to None.
         must_be_in_where (list, optional): The attributes that must be included in the WHERE clause. Defaults to None.
-        write_to_csv (bool, optional): Whether to write the generated queries to a CSV file. Defaults to True.
         is_subquery (bool, optional): Whether the generated queries are subqueries. Defaults to False.
         testing_with_one_spec (bool, optional): Whether to test with one specification. Defaults to False.
         random_choice (bool, optional): Whether to use random choice for certain query components. Defaults to False.
+        seed (int or str, optional): The global seed. If given, the random stream is reseeded from the seed and the
+            specification id before every specification (see derive_spec_seed), so the queries of a specification do
+            not depend on the other specifications or on how they are split into shards. Defaults to None.
+        shard (tuple, optional): The (index, number of shards) of the consecutive range of the specifications to
+            generate queries for (see shard_bounds). Defaults to None, for every specification.
 
-    Returns:
-        dict: A dictionary containing the generated queries.
+    Yields:
+        tuple: The (specification hash, query, metadata) of every query. The metadata holds the specification, as
+            "spec", and for queries without set operation the "select_fields", "select_fields_types",
+            "table_exp_attributes" and "unique_tables" of the query.
     """
-    print("Start reading specifications")
+    schema = Schema.from_dicts(schema, pk, fk, schema_types)
+    logger.debug("Start reading specifications")
 
     if not testing_with_one_spec:
-        file_name = f"query_generation/output/{db_name}.json"
+        file_name = os.path.join(os.path.dirname(__file__), f"output/{db_name}.json")
         with open(file_name) as json_file:
             specs = json.load(json_file)
     else:
-        print("Testing with one specification")
-        print(specs)
+        logger.debug("Testing with one specification")
+        logger.debug("%s", specs)
         if specs is None:
             specs = {
                 "farm": {
@@ -168,68 +194,71 @@ def query_generator(
                 # },
             }
 
-    print("Start generating queries")
-    merged_queries = {}
-    return_select_fields_dict = {}
-    print(return_select_fields, return_table_exp_attributes)
-    for i, hash in enumerate(specs[db_name]):
-        print(specs[db_name][hash])
-        print("************ SET OP ************")
+    logger.debug("Start generating queries")
+    spec_hashes = list(specs[db_name])
+    if shard is not None:
+        start, end = shard_bounds(len(spec_hashes), *shard)
+        spec_hashes = spec_hashes[start:end]
+    for i, hash in enumerate(spec_hashes):
+        if seed is not None:
+            random.seed(derive_spec_seed(seed, hash))
+        begin_spec(specs[db_name][hash])
+        logger.debug("%s", specs[db_name][hash])
+        logger.debug("************ SET OP ************")
         if "set_op_type" not in specs[db_name][hash]:
             spec = specs[db_name][hash]
         elif specs[db_name][hash]["set_op_type"] == "none":
             spec = specs[db_name][hash]["first_query"]
         else:
             spec = specs[db_name][hash]
-            print("************ SET OP ************")
+            logger.debug("************ SET OP ************")
 
             spec1 = specs[db_name][hash]["first_query"]
             spec2 = specs[db_name][hash]["second_query"]
-            first_query = query_generator(
-                db_name,
-                schema,
-                pk,
-                fk,
-                schema_types,
-                specs={db_name: {hash: spec1}},
-                write_to_csv=False,
-                is_subquery=False,
-                testing_with_one_spec=True,
-                random_choice=True,
-            )
+            try:
+                first_query, _ = run_stage(
+                    "set_operation",
+                    first_generated_query,
+                    iter_queries(
+                        db_name,
+                        schema,
+                        pk,
+                        fk,
+                        schema_types,
+                        specs={db_name: {hash: spec1}},
+                        is_subquery=False,
+                        testing_with_one_spec=True,
+                        random_choice=True,
+                    ),
+                )
 
-            second_query = query_generator(
-                db_name,
-                schema,
-                pk,
-                fk,
-                schema_types,
-                specs={db_name: {hash: spec2}},
-                write_to_csv=False,
-                is_subquery=False,
-                testing_with_one_spec=True,
-                random_choice=True,
-            )
-            print("_________")
-            print(first_query)
-            first_query = list(first_query.values())[0].split("\n")[0]
-            print("*******")
-            print(first_query)
-            print("_________")
-            print(second_query)
-            second_query = list(second_query.values())[0].split("\n")[0]
+                second_query, _ = run_stage(
+                    "set_operation",
+                    first_generated_query,
+                    iter_queries(
+                        db_name,
+                        schema,
+                        pk,
+                        fk,
+                        schema_types,
+                        specs={db_name: {hash: spec2}},
+                        is_subquery=False,
+                        testing_with_one_spec=True,
+                        random_choice=True,
+                    ),
+                )
+            except ValueError as e:
+                logger.debug("Candidate discarded: %s", e)
+                continue
+            logger.debug("_________")
+            logger.debug("%s", first_query)
+            logger.debug("_________")
+            logger.debug("%s", second_query)
             completed_query = f"({first_query}) {spec['set_op_type']} ({second_query})"
 
-            if str(spec) in merged_queries:
-                merged_queries[str(spec)] += "\n" + completed_query
-            else:
-                merged_queries[str(spec)] = completed_query
-            if write_to_csv:
-                write_queries_to_file(merged_queries=merged_queries)
-
-            print("Done generating queries")
-
-            return merged_queries
+            count_query()
+            yield hash, completed_query, {"spec": spec}
+            continue
 
         table_exp_type = spec["table_exp_type"]
         where_clause_type = spec["where_type"]
@@ -244,28 +273,36 @@ def query_generator(
         if is_subquery:
             random_choice = True
 
-        queries_with_attributes = create_table_expression(
-            schema,
-            pk,
-            fk,
-            schema_types,
-            table_exp_type,
-            meaningful_joins,
-            db_name=db_name,
-            random_choice=random_choice,
-            query_generator_func=query_generator,
-        )
+        try:
+            queries_with_attributes = run_stage(
+                "table_expression",
+                create_table_expression,
+                schema,
+                pk,
+                fk,
+                schema_types,
+                table_exp_type,
+                meaningful_joins,
+                db_name=db_name,
+                random_choice=random_choice,
+                query_generator_func=iter_queries,
+            )
+        except Exception as e:
+            logger.debug("Candidate discarded: %s", e)
+            continue
         random.shuffle(queries_with_attributes)
 
         for query_info in queries_with_attributes:
             partial_query, tables, attributes = query_info
-            print("************TABLE EXPRESSION ************\n")
+            logger.debug("************TABLE EXPRESSION ************")
             print_attributes(
                 partial_query=partial_query, tables=tables, attributes=attributes
             )
 
             try:
-                partial_query_with_attributes = complete_with_where_clause(
+                partial_query_with_attributes = run_stage(
+                    "where",
+                    complete_with_where_clause,
                     schema,
                     schema_types,
                     db_name,
@@ -278,11 +315,11 @@ def query_generator(
                     must_be_in_where,
                     random_choice=random_choice,
                     min_max_depth_in_subquery=min_max_depth_in_subquery,
-                    query_generator_func=query_generator,
+                    query_generator_func=iter_queries,
                 )
-                print("************ WHERE ************")
+                logger.debug("************ WHERE ************")
                 for partial_query, attributes in partial_query_with_attributes:
-                    print("************ WHERE ************")
+                    logger.debug("************ WHERE ************")
                     print_attributes(
                         partial_query=partial_query,
                         tables=tables,
@@ -290,7 +327,9 @@ def query_generator(
                     )
 
                     try:
-                        partial_query_with_attributes = complete_with_group_by_clause(
+                        partial_query_with_attributes = run_stage(
+                            "group_by",
+                            complete_with_group_by_clause,
                             partial_query,
                             attributes,
                             tables,
@@ -298,13 +337,13 @@ def query_generator(
                             group_by_clause_type,
                             random_choice=random_choice,
                         )
-                        print("************ GROUP BY ALL ************")
+                        logger.debug("************ GROUP BY ALL ************")
                         for (
                             partial_query,
                             attributes,
                             must_have_attributes,
                         ) in partial_query_with_attributes:
-                            print("************ GROUP BY ************")
+                            logger.debug("************ GROUP BY ************")
                             if must_be_in_select is None:
                                 must_be_in_select = []
                             temp = must_be_in_select.copy()
@@ -318,7 +357,9 @@ def query_generator(
 
                             must_be_in_select1 = temp.copy()
 
-                            partial_query_with_attributes = complete_with_having_clause(
+                            partial_query_with_attributes = run_stage(
+                                "having",
+                                complete_with_having_clause,
                                 partial_query,
                                 attributes,
                                 must_be_in_select1,
@@ -330,7 +371,7 @@ def query_generator(
                                 fk,
                                 tables,
                                 min_max_depth_in_subquery=min_max_depth_in_subquery,
-                                query_generator_func=query_generator,
+                                query_generator_func=iter_queries,
                                 random_choice=random_choice,
                             )
 
@@ -339,7 +380,7 @@ def query_generator(
                                 attributes,
                                 must_be_in_select1,
                             ) in partial_query_with_attributes:
-                                print("************ Having ************")
+                                logger.debug("************ Having ************")
                                 print_attributes(
                                     partial_query=partial_query,
                                     attributes=attributes,
@@ -347,7 +388,9 @@ def query_generator(
                                 )
 
                                 try:
-                                    partial_query_with_attributes = complete_query_with_select(
+                                    partial_query_with_attributes = run_stage(
+                                        "select",
+                                        complete_query_with_select,
                                         schema,
                                         schema_types,
                                         db_name,
@@ -362,9 +405,9 @@ def query_generator(
                                         is_subquery=is_subquery,
                                         random_choice=random_choice,
                                         min_max_depth_in_subquery=min_max_depth_in_subquery,
-                                        query_generator_func=query_generator,
+                                        query_generator_func=iter_queries,
                                     )
-                                    print("************ SELECT ************")
+                                    logger.debug("************ SELECT ************")
                                     for (
                                         partial_query,
                                         attributes,
@@ -381,93 +424,496 @@ def query_generator(
                                             select_fields_types=select_fields_types,
                                         )
 
-                                        partial_query = complete_query_with_order_by(
+                                        partial_query = run_stage(
+                                            "order_by",
+                                            complete_query_with_order_by,
                                             partial_query,
                                             attributes,
                                             select_clause,
                                             num_value_exps,
                                             order_by_type,
                                         )
-                                        print("************ ORDER BY ************")
+                                        logger.debug(
+                                            "************ ORDER BY ************"
+                                        )
                                         print_attributes(partial_query=partial_query)
 
-                                        partial_query = complete_query_with_limit(
-                                            partial_query, limit_type
+                                        partial_query = run_stage(
+                                            "limit",
+                                            complete_query_with_limit,
+                                            partial_query,
+                                            limit_type,
                                         )
-                                        print(
+                                        logger.debug(
                                             "************ LIMIT & OFFSET ************"
                                         )
 
-                                        if str(spec) in merged_queries:
-                                            merged_queries[str(spec)] += (
-                                                "\n" + partial_query
-                                            )
-                                        else:
-                                            merged_queries[str(spec)] = partial_query
-                                        if return_select_fields:
-                                            return_select_fields_dict[hash] = {
-                                                "select_fields": select_clause
-                                            }
-                                        if return_table_exp_attributes:
-                                            return_select_fields_dict[hash][
-                                                "table_exp_attributes"
-                                            ] = {}
-                                            return_select_fields_dict[hash][
-                                                "table_exp_attributes"
-                                            ] = attributes
-                                        if return_unique_tables:
-                                            return_select_fields_dict[hash][
-                                                "unique_tables"
-                                            ] = tables
-                                        if return_select_fields_dict:
-                                            return_select_fields_dict[hash][
-                                                "select_fields_types"
-                                            ] = select_fields_types
+                                        count_query()
+                                        yield hash, partial_query, {
+                                            "spec": spec,
+                                            "select_fields": select_clause,
+                                            "select_fields_types": select_fields_types,
+                                            "table_exp_attributes": attributes,
+                                            "unique_tables": tables,
+                                        }
                                 except Exception as e:
-                                    print(e)
+                                    logger.debug("Candidate discarded: %s", e)
                                     if random_choice:
                                         break
                                     else:
                                         continue
 
                     except Exception as e:
-                        print(e)
+                        logger.debug("Candidate discarded: %s", e)
                         if random_choice:
                             break
                         else:
                             continue
 
             except Exception as e:
-                print(e)
+                logger.debug("Candidate discarded: %s", e)
                 if random_choice:
                     break
                 else:
                     continue
 
-        if write_to_csv:
-            write_queries_to_file(merged_queries=merged_queries)
 
-    print("Done generating queries")
+def query_generator(
+    db_name,
+    schema,
+    pk,
+    fk,
+    schema_types,
+    specs=None,
+    max_num=1000,
+    must_be_in_select=None,
+    must_be_in_where=None,
+    write_to_csv=True,
+    is_subquery=False,
+    testing_with_one_spec=False,
+    random_choice=False,
+    types_of_value_exps_for_set_op=None,
+    return_select_fields=False,
+    return_table_exp_attributes=False,
+    return_unique_tables=False,
+    return_select_fields_dict=False,
+    seed=None,
+    shard=None,
+    csv_file_name=None,
+    write_buffer_size=DEFAULT_WRITE_BUFFER_SIZE,
+):
+    """
+    Generate queries based on the specifications provided in the specs dictionary.
+
+    The queries are generated by iter_queries and merged by specification. They are appended to the output file
+    through a query sink as they are generated, see open_query_sink.
+
+    Args:
+        db_name (str): The name of the database.
+        schema (dict or Schema): The schema of the database.
+        pk (list): The primary key columns.
+        fk (list): The foreign key columns.
+        schema_types (dict): The data types of the schema.
+        specs (dict, optional): The specifications for generating queries. Defaults to None.
+        max_num (int, optional): The maximum number of queries to generate. Defaults to 1000.
+        must_be_in_select (list, optional): The attributes that must be included in the SELECT clause. Defaults to None.
+        must_be_in_where (list, optional): The attributes that must be included in the WHERE clause. Defaults to None.
+        write_to_csv (bool, optional): Whether to write the generated queries to the output file. Defaults to True.
+        is_subquery (bool, optional): Whether the generated queries are subqueries. Defaults to False.
+        testing_with_one_spec (bool, optional): Whether to test with one specification. Defaults to False.
+        random_choice (bool, optional): Whether to use random choice for certain query components. Defaults to False.
+        return_select_fields (bool, optional): Whether to also return the select fields and their types of the last
+            query of every specification. Defaults to False.
+        return_table_exp_attributes (bool, optional): Whether to also return the attributes of the table expression.
+            Defaults to False.
+        return_unique_tables (bool, optional): Whether to also return the tables of the table expression. Defaults
+            to False.
+        seed (int or str, optional): The global seed, see iter_queries. Defaults to None.
+        shard (tuple, optional): The (index, number of shards) of the specifications, see iter_queries. Defaults to
+            None.
+        csv_file_name (str, optional): The CSV file, or JSON Lines file if it ends in .jsonl, the queries are written
+            to. Defaults to output/res.csv.
+        write_buffer_size (int, optional): The number of rows buffered before they are written to the output file.
+            Defaults to DEFAULT_WRITE_BUFFER_SIZE.
+
+    Returns:
+        dict: A dictionary containing the generated queries, and the dictionary of the select fields of every
+            specification if return_select_fields is set.
+    """
+    logger.info("Start generating queries")
+    merged_queries = {}
+    return_select_fields_dict = {}
+    sink = (
+        open_query_sink(csv_file_name, buffer_size=write_buffer_size)
+        if write_to_csv
+        else contextlib.nullcontext()
+    )
+    with sink:
+        for hash, query, metadata in iter_queries(
+            db_name,
+            schema,
+            pk,
+            fk,
+            schema_types,
+            specs=specs,
+            must_be_in_select=must_be_in_select,
+            must_be_in_where=must_be_in_where,
+            is_subquery=is_subquery,
+            testing_with_one_spec=testing_with_one_spec,
+            random_choice=random_choice,
+            seed=seed,
+            shard=shard,
+        ):
+            if write_to_csv:
+                sink.write(hash, metadata["spec"], query)
+
+            spec = str(metadata["spec"])
+            if spec in merged_queries:
+                merged_queries[spec] += "\n" + query
+            else:
+                merged_queries[spec] = query
+            if return_select_fields and "select_fields" in metadata:
+                return_select_fields_dict[hash] = {
+                    "select_fields": metadata["select_fields"],
+                    "select_fields_types": metadata["select_fields_types"],
+                }
+                if return_table_exp_attributes:
+                    return_select_fields_dict[hash]["table_exp_attributes"] = metadata[
+                        "table_exp_attributes"
+                    ]
+                if return_unique_tables:
+                    return_select_fields_dict[hash]["unique_tables"] = metadata[
+                        "unique_tables"
+                    ]
+
+    logger.info("Done generating queries")
     if return_select_fields:
         return merged_queries, return_select_fields_dict
     return merged_queries
 
 
-# File path for schema
-current_dir = os.path.dirname(__file__)
-file_name = os.path.join(current_dir, "../spider/tables.json")
-# Read schema information
-schema, pk, fk, schema_types = read_schema_pk_fk_types("farm", file_name)
-# print(schema)
-# print(pk)
-# print(fk)
-# print(schema_types)
-query_generator(
-    "farm",
+def streaming_query_generator(
+    db_name,
     schema,
     pk,
     fk,
     schema_types,
-    testing_with_one_spec=True,
-    random_choice=True,
-)
+    specs=None,
+    testing_with_one_spec=False,
+    random_choice=False,
+    seed=None,
+    shard=None,
+    csv_file_name=None,
+    write_buffer_size=DEFAULT_WRITE_BUFFER_SIZE,
+):
+    """
+    Generate queries in this process and write them to an output file as they are generated.
+
+    The queries of iter_queries are written straight to a query sink, without being collected as query_generator
+    does, so the memory used does not grow with the number of queries. The output file is the same as the one of
+    query_generator with the same arguments.
+
+    Args:
+        db_name (str): The name of the database.
+        schema (dict or Schema): The schema of the database.
+        pk (list): The primary key columns.
+        fk (list): The foreign key columns.
+        schema_types (dict): The data types of the schema.
+        specs (dict, optional): The specifications for generating queries. Defaults to None.
+        testing_with_one_spec (bool, optional): Whether to test with one specification. Defaults to False.
+        random_choice (bool, optional): Whether to use random choice for certain query components. Defaults to False.
+        seed (int or str, optional): The global seed, see iter_queries. Defaults to None.
+        shard (tuple, optional): The (index, number of shards) of the specifications, see iter_queries. Defaults to
+            None.
+        csv_file_name (str, optional): The CSV file, or JSON Lines file if it ends in .jsonl, the queries are written
+            to. Defaults to output/res.csv.
+        write_buffer_size (int, optional): The number of rows buffered before they are written to the output file.
+            Defaults to DEFAULT_WRITE_BUFFER_SIZE.
+
+    Returns:
+        int: The number of queries written.
+    """
+    logger.info("Start generating queries")
+    num_queries = 0
+    with open_query_sink(csv_file_name, buffer_size=write_buffer_size) as sink:
+        for hash, query, metadata in iter_queries(
+            db_name,
+            schema,
+            pk,
+            fk,
+            schema_types,
+            specs=specs,
+            testing_with_one_spec=testing_with_one_spec,
+            random_choice=random_choice,
+            seed=seed,
+            shard=shard,
+        ):
+            sink.write(hash, metadata["spec"], query)
+            num_queries += 1
+    logger.info("Done generating %d queries", num_queries)
+    return num_queries
+
+
+def _init_query_worker(db_file, db_name, use_schema_cache):
+    # Load the schema once per worker process, and give every worker its own random stream
+    global _worker_schema
+    schema, pk, fk, schema_types = open_schema_catalog(
+        db_file, use_cache=use_schema_cache
+    ).read_schema_pk_fk_types(db_name)
+    _worker_schema = (Schema.from_dicts(schema, pk, fk, schema_types), pk, fk, schema_types)
+    random.seed()
+
+
+def _generate_queries_task(task):
+    # Generate the queries of a chunk of specifications in a worker process
+    chunk_index, db_name, chunk_specs, seed = task
+    schema, pk, fk, schema_types = _worker_schema
+    records = [
+        (hash, metadata["spec"], query)
+        for hash, query, metadata in iter_queries(
+            db_name,
+            schema,
+            pk,
+            fk,
+            schema_types,
+            specs={db_name: chunk_specs},
+            testing_with_one_spec=True,
+            random_choice=True,
+            seed=seed,
+        )
+    ]
+    return chunk_index, records
+
+
+def parallel_query_generator(
+    db_name,
+    db_file,
+    specs=None,
+    max_workers=None,
+    seed=None,
+    shard=None,
+    csv_file_name=None,
+    write_buffer_size=DEFAULT_WRITE_BUFFER_SIZE,
+    chunk_size=PARALLEL_CHUNK_SIZE,
+    use_schema_cache=True,
+    rebuild_schema_cache=False,
+):
+    """
+    Generate the queries of the specifications of a database in a process pool and write them to an output file.
+
+    The specifications are split into chunks of consecutive specifications, which the workers generate the queries
+    of, every worker having loaded the schema once. The queries of a chunk are written as soon as the chunks before
+    it are, so the output file lists the specifications in the same order as query_generator. With a seed, every
+    specification reseeds the random stream (see iter_queries), so the output file is the same as the one of
+    query_generator with the same seed, whatever the number of workers.
+
+    Args:
+        db_name (str): The name of the database.
+        db_file (str): The schema file, see open_schema_catalog.
+        specs (dict, optional): The specifications for generating queries. Defaults to None, for the specifications
+            of output/{db_name}.json.
+        max_workers (int, optional): The number of worker processes. Defaults to None, for the number of CPUs.
+        seed (int or str, optional): The global seed, see iter_queries. Defaults to None.
+        shard (tuple, optional): The (index, number of shards) of the specifications, see iter_queries. Defaults to
+            None.
+        csv_file_name (str, optional): The CSV file, or JSON Lines file if it ends in .jsonl, the queries are written
+            to. Defaults to output/res.csv.
+        write_buffer_size (int, optional): The number of rows buffered before they are written to the output file.
+            Defaults to DEFAULT_WRITE_BUFFER_SIZE.
+        chunk_size (int, optional): The number of specifications of a task. Defaults to PARALLEL_CHUNK_SIZE.
+        use_schema_cache (bool, optional): Whether to use the compiled schema cache. Defaults to True.
+        rebuild_schema_cache (bool, optional): Whether to rebuild the compiled schema cache, once, before starting
+            the workers. Defaults to False.
+
+    Returns:
+        int: The number of queries written.
+    """
+    if specs is None:
+        file_name = os.path.join(os.path.dirname(__file__), f"output/{db_name}.json")
+        with open(file_name) as json_file:
+            specs = json.load(json_file)
+    spec_hashes = list(specs[db_name])
+    if shard is not None:
+        start, end = shard_bounds(len(spec_hashes), *shard)
+        spec_hashes = spec_hashes[start:end]
+    chunks = [
+        {hash: specs[db_name][hash] for hash in spec_hashes[start : start + chunk_size]}
+        for start in range(0, len(spec_hashes), chunk_size)
+    ]
+    if rebuild_schema_cache:
+        open_schema_catalog(db_file, use_cache=True, rebuild_cache=True)
+
+    logger.info(
+        "Generating the queries of %d specifications in %d chunks",
+        len(spec_hashes),
+        len(chunks),
+    )
+    num_queries = 0
+    # The records of the chunks completed before the chunks preceding them, by chunk index
+    completed_chunks = {}
+    next_chunk_index = 0
+    with open_query_sink(csv_file_name, buffer_size=write_buffer_size) as sink:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_query_worker,
+            initargs=(db_file, db_name, use_schema_cache),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _generate_queries_task, (chunk_index, db_name, chunk, seed)
+                )
+                for chunk_index, chunk in enumerate(chunks)
+            ]
+            for future in as_completed(futures):
+                chunk_index, records = future.result()
+                completed_chunks[chunk_index] = records
+                while next_chunk_index in completed_chunks:
+                    for hash, spec, query in completed_chunks.pop(next_chunk_index):
+                        sink.write(hash, spec, query)
+                        num_queries += 1
+                    next_chunk_index += 1
+                    logger.info(
+                        "[%d/%d] chunks written", next_chunk_index, len(chunks)
+                    )
+    logger.info("Done generating %d queries", num_queries)
+    return num_queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate queries from the generated specifications."
+    )
+    parser.add_argument(
+        "--rebuild-schema-cache",
+        action="store_true",
+        help="Rebuild the compiled schema cache stored next to tables.json.",
+    )
+    parser.add_argument(
+        "--no-schema-cache",
+        action="store_true",
+        help="Parse tables.json without reading or writing the compiled schema cache.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="Read the schema from a SQLite file or a directory of SQLite files instead of tables.json.",
+    )
+    parser.add_argument(
+        "--from-spec-file",
+        action="store_true",
+        help="Generate queries for the specifications of output/farm.json instead of the built-in test specification.",
+    )
+    parser.add_argument(
+        "--seed",
+        help="Reseed the random stream from this seed and the specification id before every specification.",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="INDEX/COUNT",
+        help="Only generate the queries of the INDEX-th of COUNT consecutive ranges of specifications, e.g. 0/4.",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        help="The CSV file, or JSON Lines file if it ends in .jsonl, to write the queries to. Defaults to output/res.csv.",
+    )
+    parser.add_argument(
+        "--write-buffer",
+        type=int,
+        default=DEFAULT_WRITE_BUFFER_SIZE,
+        metavar="ROWS",
+        help="The number of rows buffered before they are written to the output file.",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="The level of the messages logged. DEBUG logs every step of the generation. Defaults to WARNING.",
+    )
+    parser.add_argument(
+        "--stage-report",
+        action="store_true",
+        help="Record the time and counters of every generation stage and print them at the end of the run.",
+    )
+    parser.add_argument(
+        "--stage-report-json",
+        metavar="FILE",
+        help="Also write the stage report to this JSON file.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Generate the queries of --from-spec-file in this many worker processes. 0 uses every CPU. Defaults to 1, "
+        "which generates them in this process.",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        nargs="+",
+        metavar="FILE",
+        help="Concatenate the output files of the shards, in shard order, into --output and exit.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    if args.workers != 1 and not args.from_spec_file:
+        parser.error("--workers needs --from-spec-file")
+    if args.workers != 1 and (args.stage_report or args.stage_report_json):
+        parser.error("--stage-report needs --workers 1")
+
+    if args.merge_shards:
+        merge_query_files(
+            args.merge_shards,
+            args.output or os.path.join(os.path.dirname(__file__), "output/res.csv"),
+        )
+        raise SystemExit
+
+    # File path for schema
+    current_dir = os.path.dirname(__file__)
+    file_name = args.sqlite or os.path.join(current_dir, "../spider/tables.json")
+    shard = tuple(map(int, args.shard.split("/"))) if args.shard else None
+    if args.workers != 1:
+        parallel_query_generator(
+            "farm",
+            file_name,
+            max_workers=args.workers or None,
+            seed=args.seed,
+            shard=shard,
+            csv_file_name=args.output,
+            write_buffer_size=args.write_buffer,
+            use_schema_cache=not args.no_schema_cache,
+            rebuild_schema_cache=args.rebuild_schema_cache,
+        )
+        raise SystemExit
+    # Read schema information
+    schema, pk, fk, schema_types = open_schema_catalog(
+        file_name,
+        use_cache=not args.no_schema_cache,
+        rebuild_cache=args.rebuild_schema_cache,
+    ).read_schema_pk_fk_types("farm")
+    # print(schema)
+    # print(pk)
+    # print(fk)
+    # print(schema_types)
+    stage_stats = (
+        StageStats()
+        if args.stage_report or args.stage_report_json
+        else contextlib.nullcontext()
+    )
+    with stage_stats:
+        streaming_query_generator(
+            "farm",
+            schema,
+            pk,
+            fk,
+            schema_types,
+            testing_with_one_spec=not args.from_spec_file,
+            random_choice=True,
+            seed=args.seed,
+            shard=shard,
+            csv_file_name=args.output,
+            write_buffer_size=args.write_buffer,
+        )
+    if args.stage_report or args.stage_report_json:
+        print(stage_stats.format_report())
+    if args.stage_report_json:
+        stage_stats.write_json(args.stage_report_json)
@@ -1 +1,3 @@
 from .read_schema import *
+from .schema_model import *
+from .sqlite_schema import *
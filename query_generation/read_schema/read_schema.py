@@ -1,6 +1,14 @@
 import contextlib
+import hashlib
 import json
 import os
+import pickle
+import tempfile
+from collections.abc import Mapping
+
+from .schema_model import Schema
+
+SCHEMA_CACHE_VERSION = 1
 
 
 def update_list_of_lists(lst, c):
@@ -21,46 +29,286 @@ def update_list_of_lists(lst, c):
     lst.append([c, 1])
 
 
-def convert_json_to_schema(file_name):
+class SchemaCatalog(Mapping):
+    """
+    Read-only mapping from db_id to the schema, primary keys, foreign keys and schema types of that database.
+
+    The JSON file is parsed once and the raw records are indexed by db_id. The schema dictionaries of a
+    database are only constructed the first time that database is requested, so the cost of a catalog
+    scales with the databases that are actually used. The constructed dictionaries are shared between
+    callers and must not be modified.
+
+    A catalog can also be built from records in the tables.json format that were read elsewhere, e.g. from SQLite
+    files with read_sqlite_catalog.
+
+    Examples:
+        >>> catalog = SchemaCatalog.from_file("spider/tables.json")
+        >>> catalog["farm"]["primary_keys"]["city"]
+        'City_ID'
+        >>> "farm" in catalog
+        True
+    """
+
+    _catalogs = {}
+
+    def __init__(self, file_name, databases=None, records=None):
+        self.file_name = file_name
+        self._records = {}
+        self._databases = {}
+        if databases is not None:
+            self._databases = dict(databases)
+        else:
+            if records is None:
+                with open(file_name, "r") as f:
+                    records = json.load(f)
+            self._records = {db["db_id"]: db for db in records}
+        self._db_ids = list(self._records or self._databases)
+        self._schemas = {}
+
+    @classmethod
+    def from_file(cls, file_name, use_cache=False, rebuild_cache=False):
+        """
+        Get the catalog of a JSON file, parsing the file only the first time it is requested in this process.
+
+        Args:
+            file_name (str): The name of the JSON file containing the data.
+            use_cache (bool, optional): Whether to load the databases from the compiled schema cache next to the file,
+                and to write the cache if it is missing or stale. Defaults to False.
+            rebuild_cache (bool, optional): Whether to ignore any existing catalog and cache and rebuild them. Defaults to False.
+
+        Returns:
+            SchemaCatalog: The catalog of the file.
+        """
+        key = os.path.abspath(file_name)
+        if rebuild_cache:
+            cls._catalogs.pop(key, None)
+        if key not in cls._catalogs:
+            databases = None
+            if use_cache and not rebuild_cache:
+                databases = load_schema_cache(file_name)
+            catalog = cls(file_name, databases)
+            if (use_cache or rebuild_cache) and databases is None:
+                write_schema_cache(file_name, catalog.build_all())
+            cls._catalogs[key] = catalog
+        return cls._catalogs[key]
+
+    def __getitem__(self, db_name):
+        if db_name not in self._databases:
+            db = self._records[db_name]
+            buckets = bucket_columns_by_table(db)
+            self._databases[db_name] = {
+                "schema": construct_schema(db, buckets),
+                "primary_keys": construct_primary_keys(db),
+                "foreign_keys": construct_foreign_keys(db),
+                "schema_types": construct_schema_types(db, buckets),
+            }
+        return self._databases[db_name]
+
+    def __contains__(self, db_name):
+        return db_name in self._records or db_name in self._databases
+
+    def __iter__(self):
+        return iter(self._db_ids)
+
+    def __len__(self):
+        return len(self._db_ids)
+
+    def build_all(self):
+        """
+        Construct the schema dictionaries of every database in the catalog.
+
+        Returns:
+            dict: A dictionary mapping every db_id to its schema, primary keys, foreign keys and schema types.
+        """
+        return {db_name: self[db_name] for db_name in self}
+
+    def get_schema(self, db_name):
+        """
+        Get the compact schema model of a given database.
+
+        Args:
+            db_name (str): The name of the database.
+
+        Returns:
+            Schema: The schema model, built once per database.
+        """
+        if db_name not in self._schemas:
+            self._schemas[db_name] = Schema.from_dicts(
+                *self.read_schema_pk_fk_types(db_name)
+            )
+        return self._schemas[db_name]
+
+    def read_schema_pk_fk_types(self, db_name):
+        """
+        Read the schema, primary keys, foreign keys, and schema types for a given database.
+
+        Args:
+            db_name (str): The name of the database.
+
+        Returns:
+            tuple: A tuple containing the schema, primary keys, foreign keys, and schema types.
+        """
+        db = self[db_name]
+        return db["schema"], db["primary_keys"], db["foreign_keys"], db["schema_types"]
+
+
+def convert_json_to_schema(file_name, use_cache=False, rebuild_cache=False):
     """
     Convert JSON data to a database schema.
 
     Args:
         file_name (str): The name of the JSON file containing the data.
+        use_cache (bool, optional): Whether to use the compiled schema cache next to the file. Defaults to False.
+        rebuild_cache (bool, optional): Whether to rebuild the compiled schema cache. Defaults to False.
 
     Returns:
         dict: A dictionary representing the database schema.
     """
-    with open(file_name, "r") as f:
-        json_data = json.load(f)
-        all_db = {}
-        for db in json_data:
-            all_db[db["db_id"]] = {}
-            schema = construct_schema(db)
-            primary_keys = construct_primary_keys(db)
-            foreign_keys = construct_foreign_keys(db)
-            schema_types = construct_schema_types(db)
-            all_db[db["db_id"]]["schema"] = schema
-            all_db[db["db_id"]]["primary_keys"] = primary_keys
-            all_db[db["db_id"]]["foreign_keys"] = foreign_keys
-            all_db[db["db_id"]]["schema_types"] = schema_types
-        return all_db
-
-
-def construct_schema(db):
+    catalog = SchemaCatalog.from_file(
+        file_name, use_cache=use_cache, rebuild_cache=rebuild_cache
+    )
+    return catalog.build_all()
+
+
+def get_schema_cache_file_name(file_name):
+    """
+    Get the name of the compiled schema cache that belongs to a JSON schema file.
+
+    Args:
+        file_name (str): The name of the JSON file containing the data.
+
+    Returns:
+        str: The name of the cache file, stored next to the JSON file.
+
+    Examples:
+        >>> get_schema_cache_file_name("spider/tables.json")
+        'spider/tables.schema_cache.pkl'
+    """
+    return f"{os.path.splitext(file_name)[0]}.schema_cache.pkl"
+
+
+def calculate_file_hash(file_name):
+    """
+    Calculate the SHA-1 hash of the content of a file.
+
+    Args:
+        file_name (str): The name of the file.
+
+    Returns:
+        str: SHA-1 hash value as a hexadecimal string.
+    """
+    with open(file_name, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_schema_cache(file_name):
+    """
+    Load the compiled schema of a JSON schema file from its cache.
+
+    The cache is used as is when the size and modification time of the JSON file match the ones stored in the cache.
+    If only the modification time differs, the content hash is compared and the cache is refreshed when the content
+    did not change.
+
+    Args:
+        file_name (str): The name of the JSON file containing the data.
+
+    Returns:
+        dict or None: The databases as returned by convert_json_to_schema, or None if there is no valid cache.
+    """
+    try:
+        with open(get_schema_cache_file_name(file_name), "rb") as f:
+            cache = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != SCHEMA_CACHE_VERSION:
+        return None
+
+    stat = os.stat(file_name)
+    if cache["size"] != stat.st_size:
+        return None
+    if cache["mtime_ns"] != stat.st_mtime_ns:
+        content_hash = calculate_file_hash(file_name)
+        if cache["content_hash"] != content_hash:
+            return None
+        write_schema_cache(file_name, cache["databases"], content_hash=content_hash)
+    return cache["databases"]
+
+
+def write_schema_cache(file_name, databases, content_hash=None):
+    """
+    Write the compiled schema of a JSON schema file to its cache.
+
+    The cache is written atomically, and failing to write it (e.g. on a read-only directory) is not an error.
+
+    Args:
+        file_name (str): The name of the JSON file containing the data.
+        databases (dict): The databases as returned by convert_json_to_schema.
+        content_hash (str, optional): The content hash of the JSON file, if it is already known. Defaults to None.
+
+    Returns:
+        None
+    """
+    stat = os.stat(file_name)
+    cache = {
+        "version": SCHEMA_CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": content_hash or calculate_file_hash(file_name),
+        "databases": databases,
+    }
+    cache_file = get_schema_cache_file_name(file_name)
+    with contextlib.suppress(OSError):
+        fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, cache_file)
+        except BaseException:
+            os.remove(temp_file)
+            raise
+
+
+def bucket_columns_by_table(db):
+    """
+    Group the column indexes of the given database by the index of their table.
+
+    Args:
+        db (dict): The database dictionary.
+
+    Returns:
+        list: A list with, for each table, the indexes of its columns in db["column_names_original"].
+
+    Examples:
+        >>> db = {
+        ...     "table_names_original": ["city", "farm"],
+        ...     "column_names_original": [[-1, "*"], [0, "City_ID"], [1, "Farm_ID"], [0, "Name"]],
+        ... }
+        >>> bucket_columns_by_table(db)
+        [[1, 3], [2]]
+    """
+    buckets = [[] for _ in db["table_names_original"]]
+    for column_index, (table_index, _) in enumerate(db["column_names_original"]):
+        if 0 <= table_index < len(buckets):
+            buckets[table_index].append(column_index)
+    return buckets
+
+
+def construct_schema(db, buckets=None):
     """
     Construct the schema dictionary from the given database.
 
     Args:
         db (dict): The database dictionary.
+        buckets (list, optional): The column indexes per table, as returned by bucket_columns_by_table. Defaults to None.
 
     Returns:
         dict: The schema dictionary representing the tables and their columns.
     """
+    if buckets is None:
+        buckets = bucket_columns_by_table(db)
+    column_names = db["column_names_original"]
     return {
-        table_name: [
-            column[1] for column in db["column_names_original"] if column[0] == index
-        ]
+        table_name: [column_names[column_index][1] for column_index in buckets[index]]
         for index, table_name in enumerate(db["table_names_original"])
     }
 
@@ -88,6 +336,10 @@ def construct_foreign_keys(db):
     """
     Construct the foreign keys dictionary from the given database.
 
+    Tables are visited from the most to the least referenced one, and each foreign key pair is assigned to the first
+    visited table it belongs to. Within the pass of a table, the pair that directly follows an assigned pair is left
+    for a later table, as the original in-place removal did, so the resulting dictionary is unchanged.
+
     Args:
         db (dict): The database dictionary.
 
@@ -96,89 +348,188 @@ def construct_foreign_keys(db):
     """
     foreign_keys = {}
     if db["foreign_keys"]:
-        counting_tables = []
+        counting_tables = {}
         pairs = []
+        table_names = db["table_names_original"]
+        column_names = db["column_names_original"]
 
-        for foreign_key in db["foreign_keys"]:
-            local_column_index = foreign_key[0]
-            local_column_index2 = foreign_key[1]
-
-            table1 = db["table_names_original"][
-                db["column_names_original"][local_column_index][0]
-            ]
-            column1 = db["column_names_original"][local_column_index][1]
-            table2 = db["table_names_original"][
-                db["column_names_original"][local_column_index2][0]
-            ]
-            column2 = db["column_names_original"][local_column_index2][1]
-
-            update_list_of_lists(counting_tables, table1)
-            update_list_of_lists(counting_tables, table2)
+        for local_column_index, local_column_index2 in db["foreign_keys"]:
+            table1 = table_names[column_names[local_column_index][0]]
+            column1 = column_names[local_column_index][1]
+            table2 = table_names[column_names[local_column_index2][0]]
+            column2 = column_names[local_column_index2][1]
+
+            counting_tables[table1] = counting_tables.get(table1, 0) + 1
+            counting_tables[table2] = counting_tables.get(table2, 0) + 1
             pairs.append((table1, column1, table2, column2))
 
         sorted_counting_tables = sorted(
-            counting_tables, key=lambda x: x[1], reverse=True
+            counting_tables, key=counting_tables.get, reverse=True
         )
 
         for table in sorted_counting_tables:
-            flag = False
-            foreign_keys[table[0]] = {}
+            table_foreign_keys = {}
+            remaining_pairs = []
+            skip_next = False
 
             for pair in pairs:
-                if pair[0] == table[0]:
-                    flag = True
-                    foreign_keys[table[0]][pair[1]] = (pair[2], pair[3])
-                    pairs.remove(pair)
-                elif pair[2] == table[0]:
-                    flag = True
-                    foreign_keys[table[0]][pair[3]] = (pair[0], pair[1])
-                    pairs.remove(pair)
-
-            if not flag:
-                foreign_keys.pop(table[0])
+                if skip_next:
+                    skip_next = False
+                    remaining_pairs.append(pair)
+                elif pair[0] == table:
+                    table_foreign_keys[pair[1]] = (pair[2], pair[3])
+                    skip_next = True
+                elif pair[2] == table:
+                    table_foreign_keys[pair[3]] = (pair[0], pair[1])
+                    skip_next = True
+                else:
+                    remaining_pairs.append(pair)
+
+            if len(remaining_pairs) != len(pairs):
+                foreign_keys[table] = table_foreign_keys
+            pairs = remaining_pairs
 
     return foreign_keys
 
 
-def construct_schema_types(db):
+def construct_schema_types(db, buckets=None):
     """
     Construct the schema types dictionary from the given database.
 
     Args:
         db (dict): The database dictionary.
+        buckets (list, optional): The column indexes per table, as returned by bucket_columns_by_table. Defaults to None.
 
     Returns:
         dict: The schema types dictionary representing the tables and their column types.
     """
+    if buckets is None:
+        buckets = bucket_columns_by_table(db)
+    column_names = db["column_names_original"]
+    column_types = db["column_types"]
     schema_types = {}
     for index, table_name in enumerate(db["table_names_original"]):
-        columns_for_table = [
-            column for column in db["column_names_original"] if column[0] == index
-        ]
-        schema_types[table_name] = {
-            column[1]: db["column_types"][db["column_names_original"].index(column)]
-            for column in columns_for_table
-        }
+        types_for_table = {}
+        for column_index in buckets[index]:
+            # Repeated column names keep the type of their first occurrence
+            types_for_table.setdefault(
+                column_names[column_index][1], column_types[column_index]
+            )
+        schema_types[table_name] = types_for_table
     return schema_types
 
 
-def read_schema_pk_fk_types(db_name, file_name):
+def iter_json_records(file_name, chunk_size=1 << 16):
+    """
+    Iterate over the objects of a JSON array file, parsing the file incrementally.
+
+    Only the object being parsed and one chunk of the file are kept in memory, so stopping the iteration early
+    avoids reading the rest of the file.
+
+    Args:
+        file_name (str): The name of the JSON file, containing an array of objects.
+        chunk_size (int, optional): The number of characters read at a time. Defaults to 65536.
+
+    Yields:
+        dict: The objects of the array, in file order.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_name, "r") as f:
+        buffer = ""
+        position = 0
+        started = False
+        read_size = chunk_size
+        while True:
+            # Skip the whitespace and the separators between the objects
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise ValueError(f"Unexpected end of JSON array in {file_name}")
+                buffer, position = chunk, 0
+                continue
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError(f"{file_name} does not contain a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The object is not complete yet, read more of it, doubling the read size so that large objects are
+                # decoded a logarithmic number of times
+                chunk = f.read(read_size)
+                if not chunk:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+                read_size *= 2
+                continue
+            read_size = chunk_size
+            position = end
+            yield record
+
+
+def stream_database_record(file_name, db_name, chunk_size=1 << 16):
+    """
+    Extract the record of one database from a JSON file in the tables.json format without parsing the whole file.
+
+    The file is scanned incrementally and the scan stops as soon as the requested database has been parsed.
+
+    Args:
+        file_name (str): The name of the JSON file containing the data.
+        db_name (str): The db_id of the database.
+        chunk_size (int, optional): The number of characters read at a time. Defaults to 65536.
+
+    Returns:
+        dict: The record of the database, as stored in the JSON file.
+
+    Raises:
+        KeyError: If the database is not in the file.
+
+    Examples:
+        >>> stream_database_record("spider/tables.json", "farm")["table_names_original"]
+        ['city', 'farm', 'farm_competition', 'competition_record']
+    """
+    for record in iter_json_records(file_name, chunk_size):
+        if record.get("db_id") == db_name:
+            return record
+    raise KeyError(db_name)
+
+
+def read_schema_pk_fk_types(
+    db_name, file_name, use_cache=False, rebuild_cache=False, stream=False
+):
     """
     Read the schema, primary keys, foreign keys, and schema types for a given database.
 
     Args:
         db_name (str): The name of the database.
         file_name (str): The name of the file containing the schema information.
+        use_cache (bool, optional): Whether to use the compiled schema cache next to the file. Defaults to False.
+        rebuild_cache (bool, optional): Whether to rebuild the compiled schema cache. Defaults to False.
+        stream (bool, optional): Whether to only parse the file up to the requested database, for callers that need
+            a single database. The catalog of the file is used instead if it is already loaded in this process,
+            and the compiled schema cache is neither read nor written. Defaults to False.
 
     Returns:
         tuple: A tuple containing the schema, primary keys, foreign keys, and schema types.
     """
-    all_db = convert_json_to_schema(file_name)
-    schema = all_db[db_name]["schema"]
-    pk = all_db[db_name]["primary_keys"]
-    fk = all_db[db_name]["foreign_keys"]
-    schema_types = all_db[db_name]["schema_types"]
-    return schema, pk, fk, schema_types
+    if stream and not rebuild_cache:
+        catalog = SchemaCatalog._catalogs.get(os.path.abspath(file_name))
+        if catalog is None:
+            record = stream_database_record(file_name, db_name)
+            catalog = SchemaCatalog(file_name, records=[record])
+        return catalog.read_schema_pk_fk_types(db_name)
+
+    catalog = SchemaCatalog.from_file(
+        file_name, use_cache=use_cache, rebuild_cache=rebuild_cache
+    )
+    return catalog.read_schema_pk_fk_types(db_name)
 
 
 # all = convert_json_to_schema(
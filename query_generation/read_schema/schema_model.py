@@ -0,0 +1,267 @@
+from collections.abc import Mapping
+
+
+class Column:
+    """
+    A column of a table.
+
+    Attributes:
+        id (int): The index of the column in Schema.columns.
+        name (str): The name of the column.
+        table (Table): The table the column belongs to.
+        type (str): The type of the column, e.g. "number" or "text".
+    """
+
+    __slots__ = ("id", "name", "table", "type")
+
+    def __init__(self, id, name, table, type):
+        self.id = id
+        self.name = name
+        self.table = table
+        self.type = type
+
+    def __repr__(self):
+        return f"Column({self.table.name}.{self.name}: {self.type})"
+
+
+class Table:
+    """
+    A table of a schema.
+
+    Attributes:
+        id (int): The index of the table in Schema.tables.
+        name (str): The name of the table.
+        columns (tuple): The columns of the table.
+        column_names (list): The names of the columns of the table, in schema order.
+        number_columns (tuple): The names of the numeric columns of the table.
+        text_columns (tuple): The names of the text columns of the table.
+        primary_key (str or None): The name of the primary key column of the table.
+        foreign_keys (dict): The foreign keys of the table, mapping a column name to the referenced (table, column).
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "columns",
+        "column_names",
+        "number_columns",
+        "text_columns",
+        "primary_key",
+        "foreign_keys",
+    )
+
+    def __init__(self, id, name, primary_key=None, foreign_keys=None):
+        self.id = id
+        self.name = name
+        self.columns = ()
+        self.column_names = []
+        self.number_columns = ()
+        self.text_columns = ()
+        self.primary_key = primary_key
+        self.foreign_keys = foreign_keys or {}
+
+    def __repr__(self):
+        return f"Table({self.name}, {len(self.columns)} columns)"
+
+
+class Schema(Mapping):
+    """
+    Compact model of a database schema shared by every generation stage.
+
+    A Schema is a read-only mapping from table name to the list of its column names, so it can be passed wherever the
+    schema dictionary is expected. It additionally keeps integer column ids, the numeric and text columns of every
+    table, a reverse index from column name to the tables containing it, and primary and foreign key lookups.
+
+    Attributes:
+        tables (tuple): The tables of the schema.
+        columns (tuple): The columns of every table, indexed by column id.
+        primary_keys (dict): The primary keys dictionary the schema was built from.
+        foreign_keys (dict): The foreign keys dictionary the schema was built from.
+        schema_types (dict): The schema types dictionary the schema was built from.
+
+    Examples:
+        >>> schema = Schema.from_dicts(
+        ...     {"city": ["City_ID", "Name"], "farm_competition": ["Competition_ID", "Host_city_ID"]},
+        ...     {"city": "City_ID", "farm_competition": "Competition_ID"},
+        ...     {"farm_competition": {"Host_city_ID": ("city", "City_ID")}},
+        ...     {
+        ...         "city": {"City_ID": "number", "Name": "text"},
+        ...         "farm_competition": {"Competition_ID": "number", "Host_city_ID": "number"},
+        ...     },
+        ... )
+        >>> schema["city"]
+        ['City_ID', 'Name']
+        >>> schema.table("city").text_columns
+        ('Name',)
+        >>> schema.tables_of_column("City_ID")
+        ['city']
+    """
+
+    __slots__ = (
+        "tables",
+        "columns",
+        "primary_keys",
+        "foreign_keys",
+        "schema_types",
+        "_tables_by_name",
+        "_tables_by_column_name",
+        "_join_definitions",
+    )
+
+    def __init__(self, tables, primary_keys, foreign_keys, schema_types):
+        self.tables = tuple(tables)
+        self.columns = tuple(column for table in self.tables for column in table.columns)
+        self.primary_keys = primary_keys
+        self.foreign_keys = foreign_keys
+        self.schema_types = schema_types
+        self._tables_by_name = {table.name: table for table in self.tables}
+        self._tables_by_column_name = {}
+        for table in self.tables:
+            for column_name in dict.fromkeys(table.column_names):
+                self._tables_by_column_name.setdefault(column_name, []).append(
+                    table.name
+                )
+        self._join_definitions = None
+
+    @classmethod
+    def from_dicts(cls, schema, primary_keys, foreign_keys, schema_types):
+        """
+        Build a Schema from the dictionaries returned by read_schema_pk_fk_types.
+
+        Args:
+            schema (dict): The schema dictionary representing the tables and their columns.
+            primary_keys (dict): The primary keys dictionary representing the tables and their primary key columns.
+            foreign_keys (dict): The foreign keys dictionary representing the tables and their foreign key relationships.
+            schema_types (dict): The schema types dictionary representing the tables and their column types.
+
+        Returns:
+            Schema: The schema model.
+        """
+        if isinstance(schema, cls):
+            return schema
+        tables = []
+        column_id = 0
+        for table_id, (table_name, column_names) in enumerate(schema.items()):
+            table = Table(
+                table_id,
+                table_name,
+                primary_key=primary_keys.get(table_name),
+                foreign_keys=foreign_keys.get(table_name, {}),
+            )
+            types = schema_types.get(table_name, {})
+            columns = []
+            for column_name in column_names:
+                columns.append(
+                    Column(column_id, column_name, table, types.get(column_name))
+                )
+                column_id += 1
+            table.columns = tuple(columns)
+            table.column_names = list(column_names)
+            table.number_columns = tuple(
+                column_name
+                for column_name in column_names
+                if types.get(column_name) == "number"
+            )
+            table.text_columns = tuple(
+                column_name
+                for column_name in column_names
+                if types.get(column_name) == "text"
+            )
+            tables.append(table)
+        return cls(tables, primary_keys, foreign_keys, schema_types)
+
+    def to_dicts(self):
+        """
+        Convert the schema back to the dictionaries returned by read_schema_pk_fk_types.
+
+        Returns:
+            tuple: A tuple containing the schema, primary keys, foreign keys, and schema types.
+        """
+        schema = {table.name: list(table.column_names) for table in self.tables}
+        return schema, self.primary_keys, self.foreign_keys, self.schema_types
+
+    def __getitem__(self, table_name):
+        return self._tables_by_name[table_name].column_names
+
+    def __contains__(self, table_name):
+        return table_name in self._tables_by_name
+
+    def __iter__(self):
+        return iter(self._tables_by_name)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __repr__(self):
+        return f"Schema({', '.join(self._tables_by_name)})"
+
+    def table(self, table_name):
+        """
+        Get a table by name.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            Table: The table.
+        """
+        return self._tables_by_name[table_name]
+
+    def tables_of_column(self, column_name):
+        """
+        Get the names of the tables that contain a column with the given name.
+
+        Args:
+            column_name (str): The name of the column.
+
+        Returns:
+            list: The names of the tables containing the column, in schema order.
+        """
+        return list(self._tables_by_column_name.get(column_name, ()))
+
+    def primary_key(self, table_name):
+        """
+        Get the primary key column of a table.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            str or None: The name of the primary key column, or None if the table has none.
+        """
+        return self._tables_by_name[table_name].primary_key
+
+    def foreign_key(self, table_name, column_name):
+        """
+        Get the table and column referenced by a foreign key column.
+
+        Args:
+            table_name (str): The name of the table.
+            column_name (str): The name of the foreign key column.
+
+        Returns:
+            tuple or None: The referenced (table, column), or None if the column is not a foreign key.
+        """
+        return self._tables_by_name[table_name].foreign_keys.get(column_name)
+
+    def join_definitions(self):
+        """
+        Get the join definitions of the foreign key relationships, as returned by create_graph_from_schema.
+
+        The list is built once per schema and shared, so it must not be modified.
+
+        Returns:
+            list: List of dictionaries with the keys "table1", "table2", "first_key" and "second_key".
+        """
+        if self._join_definitions is None:
+            self._join_definitions = [
+                {
+                    "table1": table,
+                    "table2": referenced[0],
+                    "first_key": column,
+                    "second_key": referenced[1],
+                }
+                for table in self.foreign_keys
+                for column, referenced in self.foreign_keys[table].items()
+            ]
+        return self._join_definitions
@@ -0,0 +1,211 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import pathname2url
+
+from .read_schema import SchemaCatalog
+
+
+def convert_sqlite_type(column_type):
+    """
+    Convert the declared type of a SQLite column to the column types used in tables.json.
+
+    Args:
+        column_type (str): The declared type of the column, as returned by PRAGMA table_info.
+
+    Returns:
+        str: One of "number", "text", "time", "boolean" or "others".
+
+    Examples:
+        >>> convert_sqlite_type("varchar(20)")
+        'text'
+        >>> convert_sqlite_type("REAL")
+        'number'
+    """
+    column_type = column_type.lower()
+    if "bool" in column_type or column_type == "bit":
+        return "boolean"
+    if any(word in column_type for word in ("int", "real", "num", "floa", "doub", "dec")):
+        return "number"
+    if any(word in column_type for word in ("date", "time", "year")):
+        return "time"
+    if any(word in column_type for word in ("char", "text", "clob", "string")):
+        return "text"
+    return "others"
+
+
+def find_sqlite_files(path):
+    """
+    Find the SQLite files of a path.
+
+    Args:
+        path (str): A SQLite file, or a directory searched recursively for *.sqlite files (e.g. spider/database).
+
+    Returns:
+        list: The sorted paths of the SQLite files.
+    """
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(root, file_name)
+        for root, _, file_names in os.walk(path)
+        for file_name in file_names
+        if file_name.endswith(".sqlite")
+    )
+
+
+def _quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def read_sqlite_record(db_file):
+    """
+    Read the schema of a SQLite file as a database record in the tables.json format.
+
+    The file is opened read-only. Tables and columns are listed with PRAGMA table_info and foreign keys with
+    PRAGMA foreign_key_list. Unlike tables.json, "primary_keys" has exactly one entry per table, which is None for
+    tables without a primary key, so that construct_primary_keys maps every table to its own primary key.
+
+    Args:
+        db_file (str): The path to the SQLite file. Its name without extension is used as the db_id.
+
+    Returns:
+        dict: The database record, with the keys "db_id", "table_names_original", "column_names_original",
+            "column_types", "primary_keys" and "foreign_keys".
+    """
+    db_id = os.path.splitext(os.path.basename(db_file))[0]
+    uri = f"file:{pathname2url(os.path.abspath(db_file))}?mode=ro"
+    connection = sqlite3.connect(uri, uri=True)
+    try:
+        table_names = [
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+            )
+        ]
+        column_names = [[-1, "*"]]
+        column_types = ["text"]
+        primary_keys = []
+        column_indexes = {}
+        for table_index, table_name in enumerate(table_names):
+            primary_key = None
+            for _, column_name, column_type, _, _, pk in connection.execute(
+                f"PRAGMA table_info({_quote_identifier(table_name)})"
+            ):
+                column_indexes[(table_name.lower(), column_name.lower())] = len(
+                    column_names
+                )
+                if pk == 1:
+                    primary_key = len(column_names)
+                column_names.append([table_index, column_name])
+                column_types.append(convert_sqlite_type(column_type))
+            primary_keys.append(primary_key)
+
+        foreign_keys = []
+        for table_index, table_name in enumerate(table_names):
+            for row in connection.execute(
+                f"PRAGMA foreign_key_list({_quote_identifier(table_name)})"
+            ):
+                referenced_table, column_name, referenced_column = row[2], row[3], row[4]
+                if referenced_column is None:
+                    # The foreign key references the primary key of the other table
+                    referenced_index = next(
+                        (
+                            primary_keys[index]
+                            for index, name in enumerate(table_names)
+                            if name.lower() == referenced_table.lower()
+                        ),
+                        None,
+                    )
+                else:
+                    referenced_index = column_indexes.get(
+                        (referenced_table.lower(), referenced_column.lower())
+                    )
+                column_index = column_indexes.get((table_name.lower(), column_name.lower()))
+                if column_index is not None and referenced_index is not None:
+                    foreign_keys.append([column_index, referenced_index])
+    finally:
+        connection.close()
+
+    return {
+        "db_id": db_id,
+        "table_names_original": table_names,
+        "column_names_original": column_names,
+        "column_types": column_types,
+        "primary_keys": primary_keys,
+        "foreign_keys": foreign_keys,
+    }
+
+
+def read_sqlite_records(db_files, max_workers=None):
+    """
+    Read the schemas of many SQLite files concurrently, with one read-only connection per file.
+
+    Args:
+        db_files (list): The paths to the SQLite files.
+        max_workers (int, optional): The number of threads. Defaults to the ThreadPoolExecutor default.
+
+    Returns:
+        list: The database records in the tables.json format, in the order of db_files.
+    """
+    if len(db_files) <= 1:
+        return [read_sqlite_record(db_file) for db_file in db_files]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_sqlite_record, db_files))
+
+
+def read_sqlite_catalog(path, max_workers=None):
+    """
+    Build a schema catalog from SQLite files instead of tables.json.
+
+    Args:
+        path (str): A SQLite file, or a directory searched recursively for *.sqlite files.
+        max_workers (int, optional): The number of threads used to read the files. Defaults to None.
+
+    Returns:
+        SchemaCatalog: The catalog, mapping the name of every SQLite file to its schema, primary keys,
+            foreign keys and schema types.
+
+    Examples:
+        >>> catalog = read_sqlite_catalog("spider/farm")
+        >>> catalog["farm"]["foreign_keys"]["competition_record"]
+        {'Farm_ID': ('farm', 'Farm_ID')}
+    """
+    records = read_sqlite_records(find_sqlite_files(path), max_workers=max_workers)
+    return SchemaCatalog(path, records=records)
+
+
+def read_sqlite_schema_pk_fk_types(db_file):
+    """
+    Read the schema, primary keys, foreign keys, and schema types of a SQLite file.
+
+    Args:
+        db_file (str): The path to the SQLite file.
+
+    Returns:
+        tuple: A tuple containing the schema, primary keys, foreign keys, and schema types.
+    """
+    record = read_sqlite_record(db_file)
+    catalog = SchemaCatalog(db_file, records=[record])
+    return catalog.read_schema_pk_fk_types(record["db_id"])
+
+
+def open_schema_catalog(path, use_cache=False, rebuild_cache=False, max_workers=None):
+    """
+    Open the schema catalog of a tables.json file, of a SQLite file, or of a directory of SQLite files.
+
+    Args:
+        path (str): The path to a JSON file in the tables.json format, to a SQLite file, or to a directory of SQLite files.
+        use_cache (bool, optional): Whether to use the compiled schema cache of a JSON file. Defaults to False.
+        rebuild_cache (bool, optional): Whether to rebuild the compiled schema cache of a JSON file. Defaults to False.
+        max_workers (int, optional): The number of threads used to read SQLite files. Defaults to None.
+
+    Returns:
+        SchemaCatalog: The schema catalog.
+    """
+    if path.endswith(".json"):
+        return SchemaCatalog.from_file(
+            path, use_cache=use_cache, rebuild_cache=rebuild_cache
+        )
+    return read_sqlite_catalog(path, max_workers=max_workers)
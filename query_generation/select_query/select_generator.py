@@ -1,3 +1,4 @@
+import logging
 import random
 
 from subquery_generator import generate_subquery
@@ -11,6 +12,8 @@ from .select_helper_funcs import (
     handle_string_func_exp,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def complete_query_with_select(
     schema,
@@ -111,9 +114,9 @@ def generate_select_clause(
     Returns:
         list: The list of select clauses.
     """
-    print("START SELECT")
-    print(select_statement_type)
-    print(is_subquery)
+    logger.debug("START SELECT")
+    logger.debug("%s", select_statement_type)
+    logger.debug("%s", is_subquery)
     if select_statement_type == "*":
         return [
             [
@@ -150,7 +153,7 @@ def generate_select_clause(
         )
 
     else:
-        print("EEEE")
+        logger.debug("EEEE")
         return generate_value_expressions(
             schema,
             schema_types,
@@ -225,7 +228,7 @@ def generate_select_clause_with_group_by(
         select_fields += select_fields_temp
         select_statement += ", "
         select_statement += ", ".join(must_have_attributes)
-        print(select_fields, "!!!!!!!!!!!!!")
+        logger.debug("%s !!!!!!!!!!!!!", select_fields)
 
         select_statement = select_statement.removesuffix(", ")
         queries.append([select_statement, select_fields, num_value_exps, temp[3]])
@@ -283,7 +286,7 @@ def generate_value_expressions(
     Returns:
         list: The list of select statements.
     """
-    print("SELECT STATEMENT TYPE")
+    logger.debug("SELECT STATEMENT TYPE")
     select_fields_types = {}
     select_statements = []  # List to store the generated SELECT statements
     repeat_num = (
@@ -300,7 +303,7 @@ def generate_value_expressions(
         select_fields = []  # List to store the select fields
 
         for col_type in select_statement_type:
-            print(col_type)
+            logger.debug("%s", col_type)
             num_value_exp = 0  # Number of value expressions
             random_column = random.choice(
                 attributes["number"] + attributes["text"]
@@ -331,7 +334,7 @@ def generate_value_expressions(
                 num_value_exp = 1  # Increment the number of value expressions
 
             elif col_type.startswith("arithmatic_exp"):
-                print("ARITH EXP")
+                logger.debug("ARITH EXP")
                 select_statement, select_fields, num_value_exp = handle_arithmatic_exp(
                     select_statement,
                     select_fields,
@@ -352,7 +355,7 @@ def generate_value_expressions(
                 )  # Handle string function expression and update select_statement and select_fields
 
             elif col_type.startswith("agg_exp"):
-                print("AGG EXP")
+                logger.debug("AGG EXP")
                 select_statement, select_fields, num_value_exp = handle_agg_exp(
                     select_statement,
                     select_fields,
@@ -376,7 +379,7 @@ def generate_value_expressions(
                     select_fields_types,
                 )  # Handle count distinct expression and update select_statement and select_fields
             elif col_type.startswith("subquery"):
-                print("SUBQUERY")
+                logger.debug("SUBQUERY")
                 subquery_in_select_clauses = generate_subquery(
                     schema,
                     schema_types,
@@ -388,8 +391,8 @@ def generate_value_expressions(
                     min_max_depth_in_subquery=min_max_depth_in_subquery,
                     query_generator_func=query_generator_func,
                 )
-                print("SUBQUERY IN SELECT CLAUSES")
-                print(subquery_in_select_clauses)
+                logger.debug("SUBQUERY IN SELECT CLAUSES")
+                logger.debug("%s", subquery_in_select_clauses)
                 queries = []
                 for clause, tables, attributes in subquery_in_select_clauses:
                     # attributes = get_all_attributes_for_from_subquery()
@@ -410,5 +413,5 @@ def generate_value_expressions(
         select_statements.append(
             [select_statement, select_fields, num_value_exps, select_fields_types]
         )  # Add the generated select_statement and select_fields to select_statements
-    print(select_statements)
+    logger.debug("%s", select_statements)
     return select_statements
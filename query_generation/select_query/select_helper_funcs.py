@@ -1,7 +1,10 @@
+import logging
 import random
 
 from helper_funcs import generate_arithmetic_expression
 
+logger = logging.getLogger(__name__)
+
 
 def handle_single_exp(select_statement, select_fields, number_or_text, attributes):
     """
@@ -52,7 +55,7 @@ def handle_arithmatic_exp(
         select_statement += f"{arithmatic_exp} AS {alias_name}, "
         select_fields.append(alias_name)
         select_fields_types[alias_name] = "number"
-    print("select_statement", select_statement)
+    logger.debug("select_statement %s", select_statement)
     return select_statement, select_fields, 1
 
 
@@ -0,0 +1,3 @@
+from .spec_space import *
+from .feasibility import *
+from .profiles import *
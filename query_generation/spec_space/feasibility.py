@@ -0,0 +1,273 @@
+from collections import Counter
+
+from join import get_join_index
+from read_schema import Schema
+
+from .spec_space import SpecSpace
+
+# The column type every table expression needs for where types of these names, as required by the where clause
+WHERE_TYPE_COLUMN_TYPES = {
+    "between": "number",
+    "basic_comparison": "number",
+    "pattern_matching": "text",
+}
+
+# The column type every table expression needs for value expressions of these types, as required by the select clause
+VALUE_EXP_COLUMN_TYPES = {
+    "single_exp_number": "number",
+    "single_exp_text": "text",
+    "string_func_exp": "text",
+    "string_func_exp_alias": "text",
+}
+
+# Table expression types without joins
+SINGLE_TABLE_EXP_TYPES = ("single_table", "single_table_with_name_changing")
+
+
+class SchemaStatistics:
+    """
+    The statistics of a database schema that bound the specifications its queries can satisfy.
+
+    Attributes:
+        num_tables (int): The number of tables.
+        max_joins (int): The largest number of joins along foreign keys.
+        has_number_columns (bool): Whether some table has a number column.
+        has_text_columns (bool): Whether some table has a text column.
+        non_pk_column_counts (list): The numbers of number and text columns of every table that are not its primary
+            key, largest first. These are the columns GROUP BY can use.
+
+    Examples:
+        >>> schema = Schema.from_dicts(
+        ...     {"city": ["City_ID", "Name"], "farm_competition": ["Competition_ID", "Host_city_ID"]},
+        ...     {"city": "City_ID", "farm_competition": "Competition_ID"},
+        ...     {"farm_competition": {"Host_city_ID": ("city", "City_ID")}},
+        ...     {
+        ...         "city": {"City_ID": "number", "Name": "text"},
+        ...         "farm_competition": {"Competition_ID": "number", "Host_city_ID": "number"},
+        ...     },
+        ... )
+        >>> statistics = SchemaStatistics(schema)
+        >>> statistics.max_joins, statistics.max_group_by_columns(0), statistics.max_group_by_columns(1)
+        (1, 1, 2)
+    """
+
+    def __init__(self, schema):
+        self.num_tables = len(schema.tables)
+        self.max_joins = get_join_index(schema, schema.foreign_keys).max_joins
+        self.has_number_columns = any(table.number_columns for table in schema.tables)
+        self.has_text_columns = any(table.text_columns for table in schema.tables)
+        self.non_pk_column_counts = sorted(
+            (
+                sum(
+                    column != table.primary_key
+                    for column in table.number_columns + table.text_columns
+                )
+                for table in schema.tables
+            ),
+            reverse=True,
+        )
+
+    def has_columns(self, column_type):
+        """
+        Check whether some table has a column of a type.
+
+        Args:
+            column_type (str): "number" or "text".
+
+        Returns:
+            bool: Whether some table has a column of the type.
+        """
+        if column_type == "number":
+            return self.has_number_columns
+        return self.has_text_columns
+
+    def max_group_by_columns(self, num_joins):
+        """
+        Get an upper bound on the number of columns GROUP BY can use in a table expression.
+
+        Args:
+            num_joins (int): The number of joins of the table expression.
+
+        Returns:
+            int: The number of non primary key columns of the num_joins + 1 largest tables.
+        """
+        return sum(self.non_pk_column_counts[: num_joins + 1])
+
+
+def count_joins(table_exp_type):
+    """
+    Count the joins of a table expression type.
+
+    Args:
+        table_exp_type (str): The table expression type, e.g. "single_table" or "INNER JOIN_LEFT JOIN".
+
+    Returns:
+        int or None: The number of joins, or None for a subquery, whose columns are not known in advance.
+
+    Examples:
+        >>> count_joins("INNER JOIN_LEFT JOIN"), count_joins("single_table"), count_joins("subquery")
+        (2, 0, None)
+    """
+    if table_exp_type in SINGLE_TABLE_EXP_TYPES:
+        return 0
+    if table_exp_type == "subquery":
+        return None
+    return len(table_exp_type.split("_"))
+
+
+def where_type_names(where_type):
+    """
+    Get the names of the where types a where type is made of.
+
+    Args:
+        where_type (str or dict): The where type.
+
+    Returns:
+        list: The names of the where types, e.g. ["between", "pattern_matching"] for a logical operator.
+
+    Examples:
+        >>> where_type_names({"logical_operator": ["AND", "between", "pattern_matching"]})
+        ['between', 'pattern_matching']
+        >>> where_type_names({"null_check": "IS NULL"})
+        ['null_check']
+    """
+    if isinstance(where_type, dict):
+        ((name, details),) = where_type.items()
+        if name == "logical_operator":
+            return list(details[1:])
+        return [name]
+    return [where_type]
+
+
+def _feasible_joins(statistics, fixed, table_exp_type):
+    num_joins = count_joins(table_exp_type)
+    if not num_joins:
+        return True
+    if fixed.get("meaningful_joins") == "yes":
+        return num_joins <= statistics.max_joins
+    # Joins that do not follow foreign keys pick distinct tables
+    return num_joins + 1 <= statistics.num_tables
+
+
+def _feasible_group_by(statistics, fixed, table_exp_type):
+    num_joins = count_joins(table_exp_type)
+    if num_joins is None or "number_of_value_exp_in_group_by" not in fixed:
+        return True
+    return fixed["number_of_value_exp_in_group_by"] <= statistics.max_group_by_columns(
+        num_joins
+    )
+
+
+def _feasible_where_columns(statistics, fixed, where_type):
+    return all(
+        statistics.has_columns(WHERE_TYPE_COLUMN_TYPES[name])
+        for name in where_type_names(where_type)
+        if name in WHERE_TYPE_COLUMN_TYPES
+    )
+
+
+def _feasible_value_exp_columns(statistics, fixed, value_exp_types):
+    if not isinstance(value_exp_types, list):
+        return True
+    return all(
+        statistics.has_columns(VALUE_EXP_COLUMN_TYPES[value_exp_type])
+        for value_exp_type in value_exp_types
+        if value_exp_type in VALUE_EXP_COLUMN_TYPES
+    )
+
+
+# The reasons a specification cannot be satisfied, with the field whose choices they rule out
+FEASIBILITY_RULES = (
+    ("joins_exceed_schema", "table_exp_type", _feasible_joins),
+    ("group_by_exceeds_columns", "table_exp_type", _feasible_group_by),
+    ("where_type_missing_columns", "where_type", _feasible_where_columns),
+    ("value_exp_missing_columns", "value_exp_types", _feasible_value_exp_columns),
+)
+
+
+def prune_spec_space(space, schema):
+    """
+    Remove the specifications that no query of a database can satisfy from a specification space.
+
+    The checks only use statistics of the schema and only rule out specifications that the query generator is
+    bound to fail on: more joins than tables (or than the joins along foreign keys for meaningful joins), more
+    GROUP BY columns than the tables of the table expression have, and where types or value expressions needing
+    number or text columns when the schema has none. The blocks of the space are split by meaningful joins, and
+    the infeasible choices are removed from every block, so the pruned space can be sampled as before.
+
+    Args:
+        space (SpecSpace): The specification space.
+        schema (Schema): The schema of the database.
+
+    Returns:
+        tuple: The pruned SpecSpace and a Counter of the number of specifications removed for every reason. A
+            specification infeasible for several reasons is counted for the first one, in the order of
+            FEASIBILITY_RULES.
+    """
+    statistics = SchemaStatistics(schema)
+    pruned = Counter()
+    blocks = []
+    weights = []
+    for block_index, block in enumerate(space.blocks):
+        block_weight = None if space.weights is None else space.weights[block_index]
+        meaningful_joins = block.get("meaningful_joins", [None])
+        for meaningful_joins_type in meaningful_joins:
+            sub_block = dict(block)
+            if "meaningful_joins" in block:
+                sub_block["meaningful_joins"] = [meaningful_joins_type]
+            fixed = {
+                field: choices[0]
+                for field, choices in sub_block.items()
+                if len(choices) == 1
+            }
+            size = _block_size(sub_block)
+            original_size = size
+            for reason, field, is_feasible in FEASIBILITY_RULES:
+                if field not in sub_block:
+                    continue
+                choices = sub_block[field]
+                feasible_choices = [
+                    choice
+                    for choice in choices
+                    if is_feasible(statistics, fixed, choice)
+                ]
+                if len(feasible_choices) < len(choices):
+                    sub_block[field] = feasible_choices
+                    new_size = _block_size(sub_block)
+                    pruned[reason] += size - new_size
+                    size = new_size
+            blocks.append(sub_block)
+            if block_weight is not None:
+                weights.append(
+                    block_weight / len(meaningful_joins) * size / original_size
+                    if original_size
+                    else 0
+                )
+    return SpecSpace(blocks, None if space.weights is None else weights), pruned
+
+
+def format_pruning_report(pruned, size):
+    """
+    Format the report of prune_spec_space as text.
+
+    Args:
+        pruned (Counter): The number of specifications removed for every reason.
+        size (int): The size of the space before pruning.
+
+    Returns:
+        str: The report.
+    """
+    total = sum(pruned.values())
+    reasons = ", ".join(f"{reason} {count}" for reason, count in pruned.most_common())
+    return (
+        f"Pruned {total} of {size} specifications "
+        f"({100 * total / max(size, 1):.1f}%) that no query can satisfy"
+        + (f": {reasons}" if reasons else "")
+    )
+
+
+def _block_size(block):
+    size = 1
+    for choices in block.values():
+        size *= len(choices)
+    return size
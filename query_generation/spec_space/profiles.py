@@ -0,0 +1,209 @@
+from .feasibility import count_joins, where_type_names
+
+# The where and having types that nest a subquery
+SUBQUERY_CONDITION_TYPES = (
+    "in_with_subquery",
+    "not_in_with_subquery",
+    "comparison_with_subquery",
+    "exists_subquery",
+    "not_exists_subquery",
+)
+
+# The value expression types that nest a subquery
+SUBQUERY_VALUE_EXP_TYPES = ("subquery_exp", "subquery_exp_alias")
+
+
+def spec_choice_features(field, choice):
+    """
+    Get the features of a choice of a specification field that weights can be given to.
+
+    The features of a join table expression are its number of joins, as "join_<n>", and its join types, e.g.
+    ["join_2", "INNER JOIN", "FULL OUTER JOIN"]. The features of a where type are the names of the where types it
+    is made of, with "logical_operator" and the operator for a where type combined with a logical operator. The
+    features of other choices are their names, e.g. the value expression types of a list of value expressions,
+    repeated as many times as they appear.
+
+    Args:
+        field (str): The field, e.g. "table_exp_type".
+        choice: The choice.
+
+    Returns:
+        list: The features of the choice.
+
+    Examples:
+        >>> spec_choice_features("table_exp_type", "FULL OUTER JOIN_FULL OUTER JOIN")
+        ['join_2', 'FULL OUTER JOIN', 'FULL OUTER JOIN']
+        >>> spec_choice_features("where_type", {"logical_operator": ["AND", "between", "in_with_subquery"]})
+        ['logical_operator', 'AND', 'between', 'in_with_subquery']
+        >>> spec_choice_features("value_exp_types", ["agg_exp", "agg_exp"])
+        ['agg_exp', 'agg_exp']
+    """
+    if field == "table_exp_type" and count_joins(choice):
+        join_types = choice.split("_")
+        return [f"join_{len(join_types)}"] + join_types
+    if field in ("where_type", "having_type"):
+        if isinstance(choice, dict) and "logical_operator" in choice:
+            return ["logical_operator", choice["logical_operator"][0]] + where_type_names(
+                choice
+            )
+        return where_type_names(choice)
+    if isinstance(choice, list):
+        return list(choice)
+    return [choice]
+
+
+def choice_weight_function(field_weights):
+    """
+    Make the function weighting the choices of a specification space by the weights of their features.
+
+    The weight of a choice is the product of the weights of its features, as given by spec_choice_features, and
+    features without a weight have weight 1. The weight of a choice with a feature of weight 0 is 0.
+
+    Args:
+        field_weights (dict): For every field, the weights of its features, e.g.
+            {"table_exp_type": {"subquery": 0.5, "join_3": 0.1}}.
+
+    Returns:
+        callable: The function giving the weight of a choice of a field, for SpecSpace.set_choice_weights.
+
+    Examples:
+        >>> weight_of = choice_weight_function({"table_exp_type": {"join_2": 0.5, "FULL OUTER JOIN": 0.2}})
+        >>> weight_of("table_exp_type", "INNER JOIN_FULL OUTER JOIN")
+        0.1
+        >>> weight_of("table_exp_type", "single_table"), weight_of("where_type", "between")
+        (1, 1)
+    """
+
+    def weight_of(field, choice):
+        weights = field_weights.get(field)
+        if not weights:
+            return 1
+        weight = 1
+        for feature in spec_choice_features(field, choice):
+            weight *= weights.get(feature, 1)
+        return weight
+
+    return weight_of
+
+
+def count_subqueries(spec):
+    """
+    Count the subqueries a specification nests directly, in its table expression, where clause, having clause and
+    value expressions.
+
+    Args:
+        spec (dict): The specification.
+
+    Returns:
+        int: The number of subqueries.
+
+    Examples:
+        >>> count_subqueries(
+        ...     {
+        ...         "table_exp_type": "subquery",
+        ...         "where_type": {"logical_operator": ["OR", "exists_subquery", "between"]},
+        ...         "having_type": "none",
+        ...         "value_exp_types": ["subquery_exp_alias", "agg_exp"],
+        ...     }
+        ... )
+        3
+    """
+    count = int(spec.get("table_exp_type") == "subquery")
+    for field in ("where_type", "having_type"):
+        if field in spec:
+            count += sum(
+                name in SUBQUERY_CONDITION_TYPES
+                for name in where_type_names(spec[field])
+            )
+    value_exp_types = spec.get("value_exp_types")
+    if isinstance(value_exp_types, list):
+        count += sum(
+            value_exp_type in SUBQUERY_VALUE_EXP_TYPES
+            for value_exp_type in value_exp_types
+        )
+    return count
+
+
+def expected_subquery_nodes(spec):
+    """
+    Estimate the number of subqueries the query of a specification has, nested subqueries included.
+
+    Every subquery the specification nests directly starts a chain of nested subqueries whose depth is drawn
+    between the min and max depth in subquery, so it counts for their mean, and for 1 when the max depth is 0.
+
+    Args:
+        spec (dict): The specification.
+
+    Returns:
+        float: The expected number of subqueries.
+
+    Examples:
+        >>> expected_subquery_nodes(
+        ...     {"table_exp_type": "subquery", "where_type": "exists_subquery", "min_max_depth_in_subquery": [3, 5]}
+        ... )
+        8.0
+    """
+    min_depth, max_depth = spec.get("min_max_depth_in_subquery", [0, 0])
+    return count_subqueries(spec) * max(1.0, (min_depth + max_depth) / 2)
+
+
+def _spec_joins(spec):
+    return count_joins(spec.get("table_exp_type", "single_table")) or 0
+
+
+# The costs of a specification that can be capped, by name
+SPEC_COSTS = {
+    "subquery_nodes": expected_subquery_nodes,
+    "joins": _spec_joins,
+}
+
+
+def cost_cap_function(cost_caps):
+    """
+    Make the function checking that a specification is within caps on its costs.
+
+    Args:
+        cost_caps (dict): The cap on every cost, by name in SPEC_COSTS, e.g. {"subquery_nodes": 4, "joins": 2}.
+
+    Returns:
+        callable: The function telling whether a specification is within the caps, for SpecSpace.accept.
+
+    Raises:
+        ValueError: If a cost is unknown.
+
+    Examples:
+        >>> within_caps = cost_cap_function({"joins": 1})
+        >>> within_caps({"table_exp_type": "INNER JOIN"}), within_caps({"table_exp_type": "INNER JOIN_LEFT JOIN"})
+        (True, False)
+    """
+    unknown = sorted(set(cost_caps) - set(SPEC_COSTS))
+    if unknown:
+        raise ValueError(
+            f"Unknown specification costs {unknown}, expected some of {sorted(SPEC_COSTS)}"
+        )
+    caps = [(SPEC_COSTS[name], cap) for name, cap in cost_caps.items()]
+
+    def within_caps(spec):
+        return all(cost(spec) <= cap for cost, cap in caps)
+
+    return within_caps
+
+
+def apply_spec_profile(space, specs):
+    """
+    Shape the sampling of a specification space with the weights and cost caps of a query configuration.
+
+    Args:
+        space (SpecSpace): The specification space. It is changed in place.
+        specs (dict): The configuration of the query. The optional "weights" maps fields to the weights of the
+            features of their choices, see choice_weight_function, and the optional "cost_caps" maps costs to
+            their caps, see cost_cap_function.
+
+    Returns:
+        SpecSpace: The space.
+    """
+    if specs.get("weights"):
+        space.set_choice_weights(choice_weight_function(specs["weights"]))
+    if specs.get("cost_caps"):
+        space.accept = cost_cap_function(specs["cost_caps"])
+    return space
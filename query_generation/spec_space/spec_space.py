@@ -0,0 +1,923 @@
+import bisect
+import itertools
+import json
+import random
+import sys
+from collections.abc import Sequence
+
+from helper_funcs import (
+    ChainedSequence,
+    MultisetCombinations,
+    calculate_spec_hash,
+    hash_spec_items,
+    spec_item_encoding,
+)
+
+# The order of the fields of a specification, as written to the specification files
+SPEC_FIELDS = (
+    "meaningful_joins",
+    "table_exp_type",
+    "where_type",
+    "number_of_value_exp_in_group_by",
+    "having_type",
+    "orderby_type",
+    "limit_type",
+    "value_exp_types",
+    "distinct_type",
+    "min_max_depth_in_subquery",
+)
+
+# A single value expression cannot be ordered by multiple columns
+SINGLE_VALUE_EXP_ORDERBY_TYPES = ["ASC", "DESC", "number_ASC", "number_DESC", "none"]
+
+
+def unique_choices(choices):
+    """
+    Remove the duplicate choices of a list, keeping the first occurrence of each.
+
+    Choices are compared by their JSON representation, as the specification hashes are, so unhashable choices such
+    as dictionaries and lists are supported.
+
+    Args:
+        choices (list): The choices.
+
+    Returns:
+        list: The unique choices, in their original order.
+
+    Examples:
+        >>> unique_choices(["none", {"null_check": "IS NULL"}, "none", {"null_check": "IS NULL"}])
+        ['none', {'null_check': 'IS NULL'}]
+    """
+    unique = {}
+    for choice in choices:
+        unique.setdefault(json.dumps(choice, sort_keys=True), choice)
+    return list(unique.values())
+
+
+def spec_choice_levels(field, choice):
+    """
+    Get the levels of a choice, the values a covering array has to combine with the levels of the other fields.
+
+    A choice with an operator (a dictionary) is represented by its type, e.g. "null_check" or "logical_operator",
+    and a list of choices, e.g. the value expression types of a query, has the levels of all its items. Other choices
+    are their own level. This keeps the levels close to the types listed in the configuration, so that a covering
+    array stays small even though the number of choices of some fields grows quickly.
+
+    Args:
+        field (str): The field of the choice. It is not used, but lets other level functions coarsen fields
+            differently.
+        choice: The choice.
+
+    Returns:
+        tuple: The distinct levels of the choice.
+
+    Examples:
+        >>> spec_choice_levels("where_type", {"logical_operator": ["AND", "between", "IN"]})
+        ('logical_operator',)
+        >>> spec_choice_levels("value_exp_types", ["agg_exp", "single_exp_text", "agg_exp"])
+        ('agg_exp', 'single_exp_text')
+    """
+    if isinstance(choice, dict):
+        return tuple(choice)
+    if isinstance(choice, (list, tuple)):
+        return tuple(
+            dict.fromkeys(
+                level for item in choice for level in spec_choice_levels(field, item)
+            )
+        )
+    return (choice,)
+
+
+def split_value_exp_types(value_exp_types):
+    """
+    Split the value expression types into the single value expressions and the multiple value expressions.
+
+    The combinations of value expression types generated lazily by MultisetCombinations are kept lazy, and only the
+    other choices are listed and deduplicated.
+
+    Args:
+        value_exp_types (list or ChainedSequence): The value expression types.
+
+    Returns:
+        tuple: The sequences of the value expression types of length 1 (including "*") and of the other ones.
+
+    Examples:
+        >>> split_value_exp_types(["*", ["agg_exp"], ["agg_exp", "alias_exp"], "*"])
+        (ChainedSequence([['*', ['agg_exp']]]), ChainedSequence([[['agg_exp', 'alias_exp']]]))
+    """
+    parts = (
+        value_exp_types.sequences
+        if isinstance(value_exp_types, ChainedSequence)
+        else [value_exp_types]
+    )
+    single_parts = []
+    multiple_parts = []
+    other_choices = []
+    seen_combinations = set()
+    for part in parts:
+        if isinstance(part, MultisetCombinations):
+            key = (tuple(part.elements), part.length)
+            if key not in seen_combinations:
+                seen_combinations.add(key)
+                (single_parts if part.length == 1 else multiple_parts).append(part)
+        else:
+            other_choices.extend(part)
+    other_choices = unique_choices(other_choices)
+    single_parts.insert(0, [choice for choice in other_choices if len(choice) == 1])
+    multiple_parts.insert(0, [choice for choice in other_choices if len(choice) != 1])
+    return (
+        ChainedSequence(part for part in single_parts if len(part)),
+        ChainedSequence(part for part in multiple_parts if len(part)),
+    )
+
+
+class LogicalOperatorTypes(Sequence):
+    """
+    Lazy sequence of the where types combining two simple where types with a logical operator.
+
+    Every pair of distinct simple where types, except "none" and pairs of two where types with an operator (which are
+    dictionaries), is combined with AND and with OR, as {"logical_operator": [operator, first_type, second_type]},
+    where a where type with an operator is represented by its name. Where types with an operator that share a name
+    form a single type, so the pairs are distinct. The pairs are decoded on demand from their position, so the
+    quadratic number of compound where types is never materialized.
+
+    Args:
+        where_clause_types (list): The simple where types.
+        logical_operators (list, optional): The logical operators. Defaults to ["AND", "OR"].
+
+    Examples:
+        >>> where_types = LogicalOperatorTypes(
+        ...     ["none", "between", {"null_check": "IS NULL"}, {"null_check": "IS NOT NULL"}, "IN"]
+        ... )
+        >>> len(where_types)
+        6
+        >>> where_types[0], where_types[5]
+        ({'logical_operator': ['AND', 'between', 'null_check']}, {'logical_operator': ['OR', 'null_check', 'IN']})
+    """
+
+    def __init__(self, where_clause_types, logical_operators=("AND", "OR")):
+        self.logical_operators = list(logical_operators)
+        # The distinct where types, as (name, has an operator)
+        slots = {}
+        for where_type in where_clause_types:
+            if where_type == "none":
+                continue
+            if isinstance(where_type, dict):
+                slots.setdefault(("dict", next(iter(where_type))), None)
+            else:
+                slots.setdefault(("str", json.dumps(where_type)), where_type)
+        self._items = [
+            json.loads(name) if kind == "str" else name for kind, name in slots
+        ]
+        self._has_operator = [kind == "dict" for kind, _ in slots]
+        self._simple_positions = [
+            position
+            for position, has_operator in enumerate(self._has_operator)
+            if not has_operator
+        ]
+        # Number of pairs whose first where type comes before every position
+        self._pair_offsets = [0]
+        for position, has_operator in enumerate(self._has_operator):
+            self._pair_offsets.append(
+                self._pair_offsets[-1] + self._count_second_types(position)
+            )
+        self._num_pairs = self._pair_offsets[-1]
+
+    def _count_second_types(self, position):
+        # Where types after position that can be combined with the one at position
+        if self._has_operator[position]:
+            return len(self._simple_positions) - bisect.bisect_right(
+                self._simple_positions, position
+            )
+        return len(self._items) - position - 1
+
+    def __len__(self):
+        return self._num_pairs * len(self.logical_operators)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("where type index out of range")
+        pair_index, operator_index = divmod(index, len(self.logical_operators))
+        first = bisect.bisect_right(self._pair_offsets, pair_index) - 1
+        rank = pair_index - self._pair_offsets[first]
+        if self._has_operator[first]:
+            second = self._simple_positions[
+                bisect.bisect_right(self._simple_positions, first) + rank
+            ]
+        else:
+            second = first + 1 + rank
+        return {
+            "logical_operator": [
+                self.logical_operators[operator_index],
+                self._items[first],
+                self._items[second],
+            ]
+        }
+
+    def __repr__(self):
+        return f"LogicalOperatorTypes({len(self)} where types)"
+
+
+class SpecSpace:
+    """
+    The space of all the distinct specifications that can be drawn from a set of choices.
+
+    The space is a disjoint union of blocks. Every block is the Cartesian product of one sequence of choices per
+    field, and a specification of a block is numbered as a mixed-radix number whose digits are the positions of
+    its choices, the first field being the most significant. The size of the space is therefore known exactly,
+    the specification with a given number is decoded in O(number of fields), and distinct specifications are drawn
+    by sampling distinct numbers.
+
+    By default every specification is equally likely to be drawn. Blocks can be given weights instead, in which case
+    a block is chosen in proportion to its weight for every draw, and the specifications of a block are equally
+    likely. The choices can also be given weights with set_choice_weights, in which case the choice of every field
+    is drawn in proportion to its weight, and specifications can be restricted with accept, in which case the
+    specifications it rejects are drawn again.
+
+    Attributes:
+        blocks (list): The blocks of the space, each a dictionary mapping every field to its sequence of choices.
+        weights (list or None): The weights of the blocks, or None if every specification is equally likely.
+        size (int): The number of specifications in the space.
+        choice_weights (list or None): For every block, the cumulative weights of the choices of every field, or
+            None if the choices are equally likely.
+        accept (callable or None): The function telling whether a drawn specification is kept, or None.
+
+    Examples:
+        >>> space = SpecSpace(
+        ...     [
+        ...         {"where_type": ["none", "between"], "limit_type": ["none"]},
+        ...         {"where_type": ["in_set"], "limit_type": ["none", "with_offset"]},
+        ...     ]
+        ... )
+        >>> space.size
+        4
+        >>> space[3]
+        {'where_type': 'in_set', 'limit_type': 'with_offset'}
+    """
+
+    def __init__(self, blocks, weights=None):
+        self.blocks = [dict(block) for block in blocks]
+        self.weights = None if weights is None else list(weights)
+        self._offsets = []
+        self._sizes = []
+        self._radices = []
+        self._hash_fields = [None] * len(self.blocks)
+        self._choice_codes = {}
+        self.choice_weights = None
+        self.accept = None
+        self.size = 0
+        for block in self.blocks:
+            self._offsets.append(self.size)
+            radices = [len(choices) for choices in block.values()]
+            block_size = 1
+            for radix in radices:
+                block_size *= radix
+            self._radices.append(radices)
+            self._sizes.append(block_size)
+            self.size += block_size
+
+    @classmethod
+    def from_choices(
+        cls,
+        table_exp_types,
+        where_types,
+        number_of_value_exps_in_group_by,
+        having_types_without_group_by,
+        having_types_with_group_by,
+        orderby_types,
+        limit_types,
+        meaningful_joins,
+        distinct_types,
+        value_exp_types,
+        min_max_depth_in_subquery,
+        logical_operator_weight=None,
+    ):
+        """
+        Build the space of the specifications of a query from the choices of every field.
+
+        The choices depending on other fields are split into blocks: queries without GROUP BY only take the having
+        types without group by, and queries with a single value expression and without GROUP BY cannot be ordered by
+        multiple columns. Duplicate choices are removed, so every specification of the space is distinct.
+
+        The where types combined with a logical operator (LogicalOperatorTypes) get blocks of their own, so that
+        their share of the specifications can be set with logical_operator_weight instead of growing with the
+        square of the number of simple where types.
+
+        Args:
+            table_exp_types (list): The table expression types with types of joins.
+            where_types (list or ChainedSequence): The where clause types, including LogicalOperatorTypes.
+            number_of_value_exps_in_group_by (list): The numbers of value expressions in group by.
+            having_types_without_group_by (list): The having types of queries without group by.
+            having_types_with_group_by (list): The having types of queries with group by.
+            orderby_types (list): The orderby types.
+            limit_types (list): The limit types.
+            meaningful_joins (list): The meaningful joins types.
+            distinct_types (list): The distinct types.
+            value_exp_types (list or ChainedSequence): The value expression types.
+            min_max_depth_in_subquery (list): The min and max depth in subquery, shared by every specification.
+            logical_operator_weight (float, optional): The probability that a drawn specification has a where type
+                combined with a logical operator. Defaults to None, where every specification is equally likely,
+                as they also are when there are no simple or no compound where types.
+
+        Returns:
+            SpecSpace: The space of the specifications.
+        """
+        single_value_exp_types, multiple_value_exp_types = split_value_exp_types(
+            value_exp_types
+        )
+        where_parts = (
+            where_types.sequences
+            if isinstance(where_types, ChainedSequence)
+            else [where_types]
+        )
+        simple_where_types = unique_choices(
+            where_type
+            for part in where_parts
+            if not isinstance(part, LogicalOperatorTypes)
+            for where_type in part
+        )
+        compound_where_types = ChainedSequence(
+            part for part in where_parts if isinstance(part, LogicalOperatorTypes)
+        )
+        group_by_types = unique_choices(number_of_value_exps_in_group_by)
+        shared_choices = {
+            "meaningful_joins": unique_choices(meaningful_joins),
+            "table_exp_type": unique_choices(table_exp_types),
+            "limit_type": unique_choices(limit_types),
+            "distinct_type": unique_choices(distinct_types),
+            "min_max_depth_in_subquery": [min_max_depth_in_subquery],
+        }
+        orderby_types = unique_choices(orderby_types)
+
+        blocks = []
+        compound = []
+        for group_by_type in group_by_types:
+            having_types = unique_choices(
+                having_types_without_group_by
+                if group_by_type == 0
+                else having_types_with_group_by
+            )
+            for block_value_exp_types, block_orderby_types in (
+                (
+                    single_value_exp_types,
+                    SINGLE_VALUE_EXP_ORDERBY_TYPES
+                    if group_by_type == 0
+                    else orderby_types,
+                ),
+                (multiple_value_exp_types, orderby_types),
+            ):
+                for block_where_types in (simple_where_types, compound_where_types):
+                    block = dict(shared_choices)
+                    block["where_type"] = block_where_types
+                    block["number_of_value_exp_in_group_by"] = [group_by_type]
+                    block["having_type"] = having_types
+                    block["orderby_type"] = block_orderby_types
+                    block["value_exp_types"] = block_value_exp_types
+                    blocks.append({field: block[field] for field in SPEC_FIELDS})
+                    compound.append(block_where_types is compound_where_types)
+        space = cls(blocks)
+        compound_size = sum(
+            size for size, is_compound in zip(space._sizes, compound) if is_compound
+        )
+        simple_size = space.size - compound_size
+        # Without simple or without compound where types, every specification stays equally likely
+        if logical_operator_weight is not None and compound_size and simple_size:
+            # Spread the weight of the simple and of the compound where types over their blocks by size
+            space.weights = [
+                (
+                    logical_operator_weight * size / compound_size
+                    if is_compound
+                    else (1 - logical_operator_weight) * size / simple_size
+                )
+                if size
+                else 0
+                for size, is_compound in zip(space._sizes, compound)
+            ]
+        return space
+
+    def __len__(self):
+        return self.size
+
+    def _locate(self, index):
+        # The block of a specification number and the positions of its choices
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("specification index out of range")
+        block_index = bisect.bisect_right(self._offsets, index) - 1
+        radices = self._radices[block_index]
+        remainder = index - self._offsets[block_index]
+        digits = [0] * len(radices)
+        for position in range(len(radices) - 1, -1, -1):
+            remainder, digits[position] = divmod(remainder, radices[position])
+        return block_index, digits
+
+    def __getitem__(self, index):
+        block_index, digits = self._locate(index)
+        return {
+            field: choices[digit]
+            for (field, choices), digit in zip(
+                self.blocks[block_index].items(), digits
+            )
+        }
+
+    def spec_hash(self, index):
+        """
+        Calculate the id of a specification from its number, as calculate_spec_hash does from the specification.
+
+        The encodings of the choices are cached by their numbers, so the id costs one hash of the encodings of the
+        fields, without looking at the specification.
+
+        Args:
+            index (int): The number of the specification.
+
+        Returns:
+            str: The id of the specification.
+        """
+        block_index, digits = self._locate(index)
+        if self._hash_fields[block_index] is None:
+            # The fields sorted by name, with a cache of the encodings of their choices
+            block = self.blocks[block_index]
+            positions = {field: position for position, field in enumerate(block)}
+            self._hash_fields[block_index] = [
+                (
+                    positions[field],
+                    field,
+                    block[field],
+                    self._choice_codes.setdefault((field, id(block[field])), {}),
+                )
+                for field in sorted(block)
+            ]
+        parts = []
+        for position, field, choices, codes in self._hash_fields[block_index]:
+            digit = digits[position]
+            code = codes.get(digit)
+            if code is None:
+                code = spec_item_encoding(field, choices[digit])
+                codes[digit] = code
+            parts.append(code)
+        return hash_spec_items(parts)
+
+    def sample_with_ids(self, k, sha1=False):
+        """
+        Draw distinct specifications as sample does, together with their ids.
+
+        Args:
+            k (int): The number of specifications. At most the size of the space are drawn.
+            sha1 (bool, optional): Whether to use the SHA-1 hashes of calculate_hash as ids instead of the ids of
+                spec_hash. Defaults to False.
+
+        Returns:
+            list: The (id, specification) pairs.
+        """
+        return self.specs_with_ids(self.sample_indexes(k), sha1=sha1)
+
+    def specs_with_ids(self, indexes, sha1=False):
+        """
+        Get the specifications with the given numbers, together with their ids.
+
+        Args:
+            indexes (iterable): The numbers of the specifications.
+            sha1 (bool, optional): Whether to use the SHA-1 hashes of calculate_hash as ids instead of the ids of
+                spec_hash. Defaults to False.
+
+        Returns:
+            list: The (id, specification) pairs.
+        """
+        if sha1:
+            return [
+                (calculate_spec_hash(self[index], sha1=True), self[index])
+                for index in indexes
+            ]
+        return [(self.spec_hash(index), self[index]) for index in indexes]
+
+    def set_choice_weights(self, weight_of):
+        """
+        Weight the choices of every field, so that sample draws them in proportion to their weights.
+
+        A block is then chosen in proportion to its weight if the blocks have weights, and to the sum of the weights
+        of its specifications otherwise, the weight of a specification being the product of the weights of its
+        choices.
+
+        Args:
+            weight_of (callable): The function giving the weight of a choice of a field, called as
+                weight_of(field, choice). Choices of weight 0 are never drawn.
+
+        Returns:
+            None
+
+        Examples:
+            >>> space = SpecSpace([{"where_type": ["none", "between"], "limit_type": ["none", "with_offset"]}])
+            >>> space.set_choice_weights(lambda field, choice: 0 if choice == "between" else 1)
+            >>> sorted(spec["where_type"] for spec in space.sample(4))
+            ['none', 'none']
+        """
+        weights_by_sequence = {}
+        self.choice_weights = []
+        for block in self.blocks:
+            block_weights = []
+            for field, choices in block.items():
+                key = (field, id(choices))
+                if key not in weights_by_sequence:
+                    weights_by_sequence[key] = list(
+                        itertools.accumulate(weight_of(field, choice) for choice in choices)
+                    )
+                block_weights.append(weights_by_sequence[key])
+            self.choice_weights.append(block_weights)
+
+    def sample_indexes(self, k):
+        """
+        Draw distinct specification numbers at random, without replacement.
+
+        Specifications are equally likely unless the blocks or the choices have weights. With weights or accept,
+        they are drawn one at a time, drawing again the ones already drawn or rejected, and fewer than k are returned
+        if too many draws in a row are wasted.
+
+        Args:
+            k (int): The number of specification numbers. At most the size of the space are drawn.
+
+        Returns:
+            list: The distinct specification numbers, in random order.
+        """
+        if self.choice_weights is not None or self.accept is not None:
+            return self._sample_weighted_indexes(k)
+        if self.weights is None:
+            return self._sample_range(0, self.size, k)
+
+        # Choose the block of every draw by weight, among the blocks that are not exhausted
+        counts = [0] * len(self.blocks)
+        available = [
+            block_index
+            for block_index, (size, weight) in enumerate(zip(self._sizes, self.weights))
+            if size and weight > 0
+        ]
+        for _ in range(k):
+            if not available:
+                break
+            block_index = random.choices(
+                available, [self.weights[index] for index in available]
+            )[0]
+            counts[block_index] += 1
+            if counts[block_index] == self._sizes[block_index]:
+                available.remove(block_index)
+        indexes = []
+        for block_index, count in enumerate(counts):
+            if count:
+                indexes.extend(
+                    self._sample_range(
+                        self._offsets[block_index], self._sizes[block_index], count
+                    )
+                )
+        random.shuffle(indexes)
+        return indexes
+
+    def _sample_weighted_indexes(self, k, max_wasted_draws=1000):
+        # Draw the block, then the choice of every field, by weight, until k distinct accepted numbers are drawn
+        block_weights = []
+        for block_index, radices in enumerate(self._radices):
+            if self.choice_weights is None:
+                weight = self._sizes[block_index]
+            else:
+                weight = _product(
+                    cumulative[-1] if cumulative else 0
+                    for cumulative in self.choice_weights[block_index]
+                )
+            if self.weights is not None:
+                weight = self.weights[block_index] if weight else 0
+            block_weights.append(weight)
+        if not any(block_weights):
+            return []
+        cumulative_block_weights = list(itertools.accumulate(block_weights))
+
+        indexes = {}
+        wasted_draws = 0
+        while len(indexes) < min(k, self.size) and wasted_draws < max_wasted_draws:
+            block_index = bisect.bisect_right(
+                cumulative_block_weights, random.random() * cumulative_block_weights[-1]
+            )
+            block_index = min(block_index, len(self.blocks) - 1)
+            index = 0
+            for position, radix in enumerate(self._radices[block_index]):
+                if self.choice_weights is None:
+                    digit = random.randrange(radix)
+                else:
+                    cumulative = self.choice_weights[block_index][position]
+                    digit = min(
+                        bisect.bisect_right(cumulative, random.random() * cumulative[-1]),
+                        radix - 1,
+                    )
+                index = index * radix + digit
+            index += self._offsets[block_index]
+            if index in indexes or (
+                self.accept is not None and not self.accept(self[index])
+            ):
+                wasted_draws += 1
+                continue
+            wasted_draws = 0
+            indexes[index] = None
+        return list(indexes)
+
+    @staticmethod
+    def _sample_range(start, size, k):
+        k = min(k, size)
+        if size <= sys.maxsize:
+            return random.sample(range(start, start + size), k)
+        # range cannot be sampled beyond sys.maxsize, draw numbers until k distinct ones are found
+        indexes = {}
+        while len(indexes) < k:
+            indexes.setdefault(start + random.randrange(size), None)
+        return list(indexes)
+
+    def sample(self, k):
+        """
+        Draw distinct specifications uniformly at random, without replacement.
+
+        Args:
+            k (int): The number of specifications. At most the size of the space are drawn.
+
+        Returns:
+            list: The distinct specifications.
+        """
+        return [self[index] for index in self.sample_indexes(k)]
+
+    def covering_indexes(self, strength=2, levels=spec_choice_levels, candidates=10):
+        """
+        Choose distinct specifications that combine every t levels of t different fields at least once.
+
+        Every tuple of levels of `strength` different fields that some specification of the space has is covered by
+        at least one of the chosen specifications, with few specifications: the covering array is built greedily,
+        one specification at a time, as in AETG. Every candidate specification starts from a tuple that is not
+        covered yet and its other fields are filled one by one with the choice covering the most new tuples, and the
+        best of several candidates is kept. Random sampling needs many more specifications for the same coverage.
+
+        Args:
+            strength (int, optional): The number of fields whose levels are combined. Defaults to 2 (pairwise).
+            levels (callable, optional): The function giving the levels of a choice of a field. Defaults to
+                spec_choice_levels.
+            candidates (int, optional): The number of candidates built for every specification. Defaults to 10.
+
+        Returns:
+            list: The distinct specification numbers, in the order they were chosen.
+
+        Examples:
+            >>> space = SpecSpace(
+            ...     [
+            ...         {
+            ...             "where_type": ["none", "between", "in_set"],
+            ...             "limit_type": ["none", "with_offset"],
+            ...             "distinct_type": ["none", "distinct"],
+            ...         }
+            ...     ]
+            ... )
+            >>> indexes = space.covering_indexes()
+            >>> len(indexes) < space.size
+            True
+            >>> space.coverage(indexes)["covered"] == space.coverage(indexes)["tuples"]
+            True
+        """
+        dimensions, block_levels, tuples = self._covering_tuples(strength, levels)
+        uncovered = set(tuples)
+        pending = iter(tuples)
+        # The choices of every field of every block grouped by their levels
+        block_classes = [
+            {
+                field: _group_digits_by_levels(field_levels)
+                for field, field_levels in fields.items()
+                if field in dimensions
+            }
+            for fields in block_levels
+        ]
+        indexes = []
+        while uncovered:
+            seed = next(key for key in pending if key in uncovered)
+            seed_blocks = [
+                block_index
+                for block_index, classes in enumerate(block_classes)
+                if self._sizes[block_index]
+                and all(
+                    field in classes
+                    and any(level in class_levels for class_levels in classes[field])
+                    for field, level in seed
+                )
+            ]
+            best_index, best_covered = None, ()
+            for _ in range(candidates):
+                block_index = random.choice(seed_blocks)
+                index, covered = self._covering_candidate(
+                    block_index,
+                    block_classes[block_index],
+                    dimensions,
+                    seed,
+                    uncovered,
+                    strength,
+                )
+                if len(covered) > len(best_covered):
+                    best_index, best_covered = index, covered
+            indexes.append(best_index)
+            uncovered.difference_update(best_covered)
+        return indexes
+
+    def _covering_tuples(self, strength, levels):
+        # The levels of the choices of every block, and the tuples of levels of different fields to cover, in a
+        # deterministic order. Fields with a single level do not need to be combined.
+        levels_by_sequence = {}
+        block_levels = []
+        all_levels = {}
+        for block in self.blocks:
+            fields = {}
+            for field, choices in block.items():
+                key = (field, id(choices))
+                if key not in levels_by_sequence:
+                    levels_by_sequence[key] = [
+                        tuple(levels(field, choice)) for choice in choices
+                    ]
+                fields[field] = levels_by_sequence[key]
+                for choice_levels in fields[field]:
+                    all_levels.setdefault(field, {}).update(
+                        dict.fromkeys(choice_levels)
+                    )
+            block_levels.append(fields)
+        dimensions = {
+            field: rank
+            for rank, field in enumerate(
+                field for field, field_levels in all_levels.items() if len(field_levels) > 1
+            )
+        }
+        tuples = {}
+        for fields, block_size in zip(block_levels, self._sizes):
+            if not block_size:
+                continue
+            block_dimensions = sorted(
+                (field for field in fields if field in dimensions), key=dimensions.get
+            )
+            for combination in itertools.combinations(block_dimensions, strength):
+                for key in itertools.product(
+                    *(
+                        [
+                            (field, level)
+                            for level in dict.fromkeys(
+                                level
+                                for choice_levels in fields[field]
+                                for level in choice_levels
+                            )
+                        ]
+                        for field in combination
+                    )
+                ):
+                    tuples.setdefault(key, None)
+        return dimensions, block_levels, list(tuples)
+
+    def _covering_candidate(
+        self, block_index, classes, dimensions, seed, uncovered, strength
+    ):
+        # Build a specification of a block covering the seed tuple, filling the other fields greedily. Returns its
+        # number and the uncovered tuples it covers.
+        def key_of(items):
+            return tuple(sorted(items, key=lambda item: dimensions[item[0]]))
+
+        digits = {}
+        items = []
+        for field, level in seed:
+            class_levels = random.choice(
+                [class_levels for class_levels in classes[field] if level in class_levels]
+            )
+            digits[field] = random.choice(classes[field][class_levels])
+            items.extend((field, class_level) for class_level in class_levels)
+        other_fields = [field for field in classes if field not in digits]
+        random.shuffle(other_fields)
+        for field in other_fields:
+            best_gain, best_classes = -1, []
+            rank = dimensions[field]
+            for class_levels in classes[field]:
+                if strength == 2:
+                    gain = sum(
+                        (
+                            (item, (field, level))
+                            if dimensions[item[0]] < rank
+                            else ((field, level), item)
+                        )
+                        in uncovered
+                        for item in items
+                        for level in class_levels
+                    )
+                else:
+                    gain = sum(
+                        key_of(combination + ((field, level),)) in uncovered
+                        for combination in itertools.combinations(items, strength - 1)
+                        for level in class_levels
+                    )
+                if gain > best_gain:
+                    best_gain, best_classes = gain, [class_levels]
+                elif gain == best_gain:
+                    best_classes.append(class_levels)
+            class_levels = random.choice(best_classes)
+            digits[field] = random.choice(classes[field][class_levels])
+            items.extend((field, level) for level in class_levels)
+
+        index = 0
+        for field, radix in zip(self.blocks[block_index], self._radices[block_index]):
+            digit = digits[field] if field in digits else random.randrange(radix)
+            index = index * radix + digit
+        covered = {
+            key_of(combination)
+            for combination in itertools.combinations(items, strength)
+        }
+        return self._offsets[block_index] + index, covered & uncovered
+
+    def coverage(self, indexes, strength=2, levels=spec_choice_levels):
+        """
+        Report how many of the tuples of levels of different fields are covered by some specifications.
+
+        Args:
+            indexes (iterable): The numbers of the specifications.
+            strength (int, optional): The number of fields whose levels are combined. Defaults to 2 (pairwise).
+            levels (callable, optional): The function giving the levels of a choice of a field. Defaults to
+                spec_choice_levels.
+
+        Returns:
+            dict: The coverage report, with the keys "strength", "specs" (the number of specifications), "tuples"
+                (the number of tuples of levels in the space), "covered" (the number of them covered), "fields"
+                (the [covered, total] tuples of every combination of fields) and "lower_bound" (a lower bound on
+                the number of specifications covering every tuple).
+        """
+        dimensions, block_levels, tuples = self._covering_tuples(strength, levels)
+        covered = set()
+        num_specs = 0
+        for index in indexes:
+            num_specs += 1
+            block_index, digits = self._locate(index)
+            fields = block_levels[block_index]
+            items = [
+                (field, level)
+                for field, digit in zip(self.blocks[block_index], digits)
+                if field in dimensions
+                for level in fields[field][digit]
+            ]
+            items.sort(key=lambda item: dimensions[item[0]])
+            covered.update(itertools.combinations(items, strength))
+
+        by_fields = {}
+        for key in tuples:
+            counts = by_fields.setdefault(tuple(field for field, _ in key), [0, 0])
+            counts[0] += key in covered
+            counts[1] += 1
+        # A specification covers at most the product of the numbers of levels of its choices of the fields
+        lower_bound = 0
+        for combination, (_, total) in by_fields.items():
+            max_covered = max(
+                _product(
+                    max(map(len, fields[field]), default=0) for field in combination
+                )
+                if all(field in fields for field in combination)
+                else 0
+                for fields in block_levels
+            )
+            lower_bound = max(lower_bound, -(-total // max_covered))
+        return {
+            "strength": strength,
+            "specs": num_specs,
+            "tuples": len(tuples),
+            "covered": sum(covered_count for covered_count, _ in by_fields.values()),
+            "fields": by_fields,
+            "lower_bound": lower_bound,
+        }
+
+
+def format_coverage_report(report):
+    """
+    Format a coverage report of SpecSpace.coverage as text.
+
+    The combinations of fields that are not fully covered are listed after the summary line.
+
+    Args:
+        report (dict): The coverage report.
+
+    Returns:
+        str: The report.
+    """
+    lines = [
+        f"{report['strength']}-wise coverage: {report['covered']}/{report['tuples']} tuples "
+        f"({100 * report['covered'] / max(report['tuples'], 1):.1f}%) with "
+        f"{report['specs']} specs (at least {report['lower_bound']} needed)"
+    ]
+    for fields, (covered, total) in report["fields"].items():
+        if covered < total:
+            lines.append(f"  {' x '.join(fields)}: {covered}/{total}")
+    return "\n".join(lines)
+
+
+def _group_digits_by_levels(choice_levels):
+    # The positions of the choices of a field grouped by their levels
+    classes = {}
+    for digit, levels in enumerate(choice_levels):
+        classes.setdefault(levels, []).append(digit)
+    return classes
+
+
+def _product(numbers):
+    result = 1
+    for number in numbers:
+        result *= number
+    return result
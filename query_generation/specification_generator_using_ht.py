@@ -1,83 +1,315 @@
+import argparse
 import json
 import os
-
-from helper_funcs import calculate_hash, select_combinations, write_hash_table_to_json
-from join import get_max_joins_and_join_definitions
-from read_schema.read_schema import convert_json_to_schema
-
-current_dir = os.path.dirname(__file__)
-file_name = os.path.join(current_dir, "../spider/tables.json")
-all_db = convert_json_to_schema(file_name)
-
 import random
-
-
-def complete_specs(db_file, config_file, db_name=None):
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from helper_funcs import (
+    ChainedSequence,
+    MultisetCombinations,
+    append_hash_table_to_json,
+    calculate_spec_hash,
+    read_spec_index,
+    write_hash_table_to_json,
+)
+from join import get_max_joins_and_join_definitions
+from read_schema import Schema, open_schema_catalog
+from spec_space import (
+    LogicalOperatorTypes,
+    SpecSpace,
+    apply_spec_profile,
+    format_coverage_report,
+    format_pruning_report,
+    prune_spec_space,
+)
+
+# Incremental generation appends at most this many specifications at a time, so memory does not grow with the corpus
+INCREMENTAL_BATCH_SIZE = 10000
+# Incremental generation stops once this many batches in a row only produced specifications already in the corpus
+INCREMENTAL_MAX_ROUNDS_WITHOUT_NEW_SPECS = 3
+
+
+def complete_specs(
+    db_file,
+    config_file,
+    db_name=None,
+    use_schema_cache=True,
+    rebuild_schema_cache=False,
+    sha1_spec_ids=False,
+    max_workers=None,
+    num_specs=100,
+    incremental=False,
+):
     """
     Generate specifications for queries based on the given database schema and configuration.
 
+    When db_name is None, the specifications of every database of the catalog are generated in a process pool, each
+    worker writing output/{db}.json on its own, and a summary with the time spent on every database is printed.
+
     Args:
-        db_file (str): The path to the JSON file containing the database schema.
+        db_file (str): The path to the JSON file containing the database schema, or to a SQLite file or a directory
+            of SQLite files to read the schemas from.
         config_file (str): The path to the JSON file containing the configuration for generating specifications.
         db_name (str, optional): The name of the specific database to generate specifications for. Defaults to None.
+        use_schema_cache (bool, optional): Whether to load the schema from the compiled schema cache. Defaults to True.
+        rebuild_schema_cache (bool, optional): Whether to rebuild the compiled schema cache. Defaults to False.
+        sha1_spec_ids (bool, optional): Whether to identify the specifications by SHA-1 hashes, for compatibility with
+            specification files keyed by them, instead of the faster 128-bit ids. Defaults to False.
+        max_workers (int, optional): The number of processes used when generating the specifications of every
+            database. 1 generates them in the current process. Defaults to the number of CPUs.
+        num_specs (int, optional): The number of specifications of every database. Defaults to 100.
+        incremental (bool, optional): Whether to keep the specifications already in the output files and append new
+            ones until every file has num_specs of them, instead of overwriting the files. Defaults to False.
 
     Returns:
         None
     """
-    all_db = convert_json_to_schema(db_file)
-    specs = {}
+    all_db = open_schema_catalog(
+        db_file, use_cache=use_schema_cache, rebuild_cache=rebuild_schema_cache
+    )
 
     with open(config_file, "r") as f:
         spec_config = json.load(f)
 
+    current_dir = os.path.dirname(__file__)
     if db_name:
         print(db_name)
-        specs[db_name] = generate_specifications_for_queries(
-            all_db[db_name]["schema"],
-            all_db[db_name]["foreign_keys"],
+        generate_database_specs(
+            db_name,
+            all_db[db_name],
             spec_config,
+            os.path.join(current_dir, f"output/{db_name}.json"),
+            sha1_spec_ids,
+            num_specs,
+            incremental,
         )
+        return
 
-        current_dir = os.path.dirname(__file__)
-        file_name = os.path.join(current_dir, f"output/{db_name}.json")
-        write_hash_table_to_json(specs, file_name)
+    tasks = [
+        (
+            db,
+            all_db[db],
+            spec_config,
+            os.path.join(current_dir, f"output/{db}.json"),
+            sha1_spec_ids,
+            num_specs,
+            incremental,
+        )
+        for db in all_db
+    ]
+    start_time = time.perf_counter()
+    timings = {}
+    failures = {}
+    if max_workers == 1:
+        results = (_generate_database_specs_task(task) for task in tasks)
+        report_database_results(results, len(tasks), timings, failures)
     else:
-        for db in all_db:
-            specs[db_name] = generate_specifications_for_queries(
-                all_db[db_name]["schema"],
-                all_db[db_name]["foreign_keys"],
-                spec_config,
-            )
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=random.seed
+        ) as executor:
+            futures = [
+                executor.submit(_generate_database_specs_task, task) for task in tasks
+            ]
+            results = (future.result() for future in as_completed(futures))
+            report_database_results(results, len(tasks), timings, failures)
+
+    print(
+        f"Generated specifications for {len(timings)} of {len(tasks)} databases in "
+        f"{time.perf_counter() - start_time:.2f}s "
+        f"({sum(timings.values()):.2f}s spent in the databases)"
+    )
+    for db, seconds in sorted(timings.items(), key=lambda item: -item[1])[:5]:
+        print(f"  slowest: {db} {seconds:.2f}s")
+    for db, error in failures.items():
+        print(f"  failed: {db}: {error}")
+
+
+def generate_database_specs(
+    db_name,
+    db,
+    spec_config,
+    file_name,
+    sha1_spec_ids=False,
+    num=100,
+    incremental=False,
+):
+    """
+    Generate the specifications of one database and write them to a JSON file.
+
+    In incremental mode, the ids of the specifications already in the file are read from its index and new distinct
+    specifications are generated in batches of at most INCREMENTAL_BATCH_SIZE and appended to the file, until it
+    holds num specifications or the generation stops finding new ones. The spaces of the specifications are built
+    once for all the batches, and the file must be keyed by the same kind of ids as the new specifications.
+
+    Args:
+        db_name (str): The name of the database.
+        db (dict): The schema, primary keys, foreign keys and schema types of the database, as stored in a
+            SchemaCatalog.
+        spec_config (dict): The configuration for generating specifications.
+        file_name (str): The JSON file to write the specifications to, keyed by the database name.
+        sha1_spec_ids (bool, optional): Whether to identify the specifications by SHA-1 hashes. Defaults to False.
+        num (int, optional): The number of specifications. Defaults to 100.
+        incremental (bool, optional): Whether to append to the specifications already in the file. Defaults to
+            False.
+
+    Returns:
+        int: The number of specifications written.
+
+    Raises:
+        ValueError: In incremental mode, if the file is keyed by the other kind of ids.
+    """
+    schema = Schema.from_dicts(
+        db["schema"], db["primary_keys"], db["foreign_keys"], db["schema_types"]
+    )
+    if not incremental:
+        specs = generate_specifications_for_queries(
+            schema,
+            db["foreign_keys"],
+            spec_config,
+            num=num,
+            sha1_spec_ids=sha1_spec_ids,
+        )
+        write_hash_table_to_json({db_name: specs}, file_name)
+        return len(specs)
+
+    spec_ids = read_spec_index(file_name, sha1_spec_ids)
+    spaces = {}
+    num_written = 0
+    rounds_without_new_specs = 0
+    while (
+        len(spec_ids) < num
+        and rounds_without_new_specs < INCREMENTAL_MAX_ROUNDS_WITHOUT_NEW_SPECS
+    ):
+        specs = generate_specifications_for_queries(
+            schema,
+            db["foreign_keys"],
+            spec_config,
+            num=min(num - len(spec_ids), INCREMENTAL_BATCH_SIZE),
+            sha1_spec_ids=sha1_spec_ids,
+            spaces=spaces,
+        )
+        new_specs = {
+            spec_id: spec for spec_id, spec in specs.items() if spec_id not in spec_ids
+        }
+        new_specs = dict(list(new_specs.items())[: num - len(spec_ids)])
+        append_hash_table_to_json({db_name: new_specs}, file_name, sha1_spec_ids)
+        spec_ids.update(new_specs)
+        num_written += len(new_specs)
+        rounds_without_new_specs = 0 if new_specs else rounds_without_new_specs + 1
+    return num_written
+
+
+def _generate_database_specs_task(task):
+    # Run generate_database_specs in a worker and return its outcome instead of raising, so that one database
+    # cannot stop the others
+    db_name = task[0]
+    start_time = time.perf_counter()
+    try:
+        num_specs = generate_database_specs(*task)
+    except Exception as error:
+        return db_name, None, time.perf_counter() - start_time, repr(error)
+    return db_name, num_specs, time.perf_counter() - start_time, None
+
+
+def report_database_results(results, num_databases, timings, failures):
+    """
+    Print the progress of the databases as their specifications are generated.
 
-            current_dir = os.path.dirname(__file__)
-            file_name_for_write = os.path.join(current_dir, f"output/{db}.json")
-            write_hash_table_to_json(specs[db], file_name_for_write)
+    Args:
+        results (iterable): The (db_name, number of specifications, seconds, error) tuples of the databases.
+        num_databases (int): The total number of databases.
+        timings (dict): Dictionary filled with the seconds spent on every database that succeeded.
+        failures (dict): Dictionary filled with the error of every database that failed.
+
+    Returns:
+        None
+    """
+    for done, (db_name, num_specs, seconds, error) in enumerate(results, 1):
+        if error is None:
+            timings[db_name] = seconds
+            print(
+                f"[{done}/{num_databases}] {db_name}: {num_specs} specs in {seconds:.2f}s"
+            )
+        else:
+            failures[db_name] = error
+            print(
+                f"[{done}/{num_databases}] {db_name}: failed after {seconds:.2f}s: "
+                f"{error}"
+            )
 
 
-def generate_specifications_for_queries(schema, foreign_keys, specs, num=100):
+def generate_specifications_for_queries(
+    schema, foreign_keys, specs, num=100, sha1_spec_ids=False, spaces=None
+):
     set_ops_types = specs["set_op_types"]
+    # The spaces of the queries are kept in spaces, if given, so that repeated calls build and report them once
+    if spaces is None:
+        spaces = {}
+    for query in ("first_query", "second_query"):
+        if query in specs and query not in spaces:
+            spaces[query] = generate_spec_space(schema, foreign_keys, specs[query])
 
     first_spec = generate_specifications_for_queries_without_set_ops(
-        schema, foreign_keys, specs["first_query"], num
+        schema,
+        foreign_keys,
+        specs["first_query"],
+        num,
+        sha1_spec_ids,
+        space=spaces["first_query"],
     )
 
     if "second_query" in specs:
         second_spec = generate_specifications_for_queries_without_set_ops(
-            schema, foreign_keys, specs["second_query"], num
+            schema,
+            foreign_keys,
+            specs["second_query"],
+            num,
+            sha1_spec_ids,
+            space=spaces["second_query"],
         )
 
-    hash_table = {}
-
-    for _ in range(num):
-        set_op_type = random.choice(set_ops_types)
-        if set_op_type == "none":
+    details = []
+    if specs["first_query"].get("covering_strength"):
+        # Every specification of the covering array is the first query of one specification, so none of the
+        # covered combinations is lost, and the set operations take turns
+        second_specs = list(second_spec.values()) if "second_query" in specs else []
+        for position, spec1 in enumerate(first_spec.values()):
             detail = {
-                "set_op_type": set_op_type,
-                "first_query": first_spec[random.choice(list(first_spec))],
+                "set_op_type": set_ops_types[position % len(set_ops_types)],
+                "first_query": spec1,
             }
-        else:
-            spec1 = first_spec[random.choice(list(first_spec))]
-            spec2 = second_spec[random.choice(list(second_spec))]
+            if detail["set_op_type"] != "none":
+                detail["second_query"] = random.choice(second_specs)
+            details.append((None, detail))
+    else:
+        # The set operation of every specification is chosen uniformly, then the specifications of every set
+        # operation are drawn without replacement
+        num_specs_by_set_op_type = Counter(
+            random.choice(set_ops_types) for _ in range(num)
+        )
+        for set_op_type, num_specs in num_specs_by_set_op_type.items():
+            block = {
+                "set_op_type": [set_op_type],
+                "first_query": list(first_spec.values()),
+            }
+            if set_op_type == "none":
+                details.extend(
+                    SpecSpace([block]).sample_with_ids(num_specs, sha1=sha1_spec_ids)
+                )
+            else:
+                block["second_query"] = list(second_spec.values())
+                details.extend(
+                    (None, detail) for detail in SpecSpace([block]).sample(num_specs)
+                )
+
+    # The ids not known yet are calculated once, after the queries of the set operations are adjusted
+    hash_table = {}
+    for hash_value, detail in details:
+        if detail["set_op_type"] != "none":
+            spec1 = dict(detail["first_query"])
+            spec2 = dict(detail["second_query"])
 
             if (
                 spec1["number_of_value_exp_in_group_by"] != 0
@@ -92,12 +324,10 @@ def generate_specifications_for_queries(schema, foreign_keys, specs, num=100):
             spec2["min_max_depth_in_subquery"] = [0, 0]
             spec1["value_exp_types"] = spec2["value_exp_types"]
 
-            detail = {
-                "set_op_type": set_op_type,
-                "first_query": spec1,
-                "second_query": spec2,
-            }
-        hash_value = calculate_hash(detail)
+            detail["first_query"] = spec1
+            detail["second_query"] = spec2
+        if hash_value is None:
+            hash_value = calculate_spec_hash(detail, sha1=sha1_spec_ids)
 
         if hash_value not in hash_table:
             hash_table[hash_value] = detail
@@ -105,22 +335,69 @@ def generate_specifications_for_queries(schema, foreign_keys, specs, num=100):
 
 
 def generate_specifications_for_queries_without_set_ops(
-    schema, foreign_keys, specs, num=100
+    schema, foreign_keys, specs, num=100, sha1_spec_ids=False, space=None
 ):
     """
     Generate specifications for queries based on the given schema, primary keys, foreign keys, schema types, and specifications.
 
+    The specifications are drawn without replacement from the space of all the specifications, so exactly num
+    distinct specifications are generated, or all of them if the space is smaller. With "weights" or "cost_caps"
+    in the configuration, they are drawn by weight among the specifications within the caps, and fewer are
+    generated if too few specifications are within the caps.
+
+    If the configuration sets "covering_strength" to t, the specifications form a covering array instead: every
+    combination of the levels (see spec_choice_levels) of t different fields is covered by some specification, and
+    the coverage is printed. Random specifications are added if the covering array has fewer than num of them. The
+    covering array itself ignores the weights and cost caps, only the added specifications honor them.
+
     Args:
         schema (dict): The schema dictionary representing the tables and their columns.
-        primary_keys (dict): The primary keys dictionary representing the tables and their primary key columns.
         foreign_keys (dict): The foreign keys dictionary representing the tables and their foreign key relationships.
-        schema_types (dict): The schema types dictionary representing the tables and their column types.
         specs (dict): The specifications for generating queries.
         num (int, optional): The number of specifications to generate. Defaults to 100.
+        sha1_spec_ids (bool, optional): Whether to identify the specifications by the SHA-1 hashes of calculate_hash
+            instead of the ids of calculate_spec_hash. Defaults to False.
+        space (SpecSpace, optional): The space of the specifications built by generate_spec_space from the same
+            configuration, to draw from it without building it again. Defaults to None.
 
     Returns:
         dict: The generated specifications as a hash table.
     """
+    if space is None:
+        space = generate_spec_space(schema, foreign_keys, specs)
+    covering_strength = specs.get("covering_strength")
+    if not covering_strength:
+        return dict(space.sample_with_ids(num, sha1=sha1_spec_ids))
+
+    indexes = space.covering_indexes(covering_strength)
+    print(format_coverage_report(space.coverage(indexes, covering_strength)))
+    if len(indexes) < num:
+        chosen = set(indexes)
+        extra_indexes = [
+            index for index in space.sample_indexes(num) if index not in chosen
+        ]
+        indexes.extend(extra_indexes[: num - len(indexes)])
+    return dict(space.specs_with_ids(indexes, sha1=sha1_spec_ids))
+
+
+def generate_spec_space(schema, foreign_keys, specs):
+    """
+    Build the space of all the specifications of a query allowed by the configuration.
+
+    If the schema is a Schema model, which also knows the primary keys and column types, the specifications that no
+    query of the database can satisfy are pruned with prune_spec_space and the pruned counts are printed, unless
+    the configuration sets "prune_infeasible" to false. The sampling of the space is then shaped by the optional
+    "weights" and "cost_caps" of the configuration, see apply_spec_profile.
+
+    Args:
+        schema (dict or Schema): The schema dictionary representing the tables and their columns.
+        foreign_keys (dict): The foreign keys dictionary representing the tables and their foreign key relationships.
+        specs (dict): The configuration of the query, e.g. "first_query" of config_file.json. The optional
+            "logical_operator_weight" sets the probability of a where type combined with a logical operator.
+
+    Returns:
+        SpecSpace: The space of the specifications.
+    """
     table_exp_types = specs["table_exp_types"]
     where_clause_types = specs["where_clause_types"]
     number_of_valu_exps_in_group_by = specs["number_of_valu_exps_in_group_by"]
@@ -161,8 +438,12 @@ def generate_specifications_for_queries_without_set_ops(
         ),
     }
     if "logical_operators" in where_clause_types:
-        add_logical_operator_combinations(
-            completed_specifications["where_clause_types"]
+        # The compound where types are generated on demand from the simple ones
+        completed_specifications["where_clause_types"] = ChainedSequence(
+            [
+                completed_specifications["where_clause_types"],
+                LogicalOperatorTypes(completed_specifications["where_clause_types"]),
+            ]
         )
 
     completed_specifications[
@@ -188,8 +469,7 @@ def generate_specifications_for_queries_without_set_ops(
         number_of_value_exps_in_select,
     )
 
-    return generate_hash_table(
-        num,
+    space = SpecSpace.from_choices(
         table_exp_types_with_types_of_joins,
         completed_specifications["where_clause_types"],
         number_of_valu_exps_in_group_by,
@@ -201,7 +481,13 @@ def generate_specifications_for_queries_without_set_ops(
         distinct_types,
         all_value_exp_types,
         min_max_depth_in_subquery,
+        logical_operator_weight=specs.get("logical_operator_weight"),
     )
+    if isinstance(schema, Schema) and specs.get("prune_infeasible", True):
+        pruned_space, pruned = prune_spec_space(space, schema)
+        print(format_pruning_report(pruned, space.size))
+        space = pruned_space
+    return apply_spec_profile(space, specs)
 
 
 def generate_table_expression_types(
@@ -233,7 +519,7 @@ def generate_table_expression_types(
     for table_exp_type in table_exp_types:
         if table_exp_type.startswith("join"):
             _, join_num = table_exp_type.split("_")
-            type_of_joins = select_combinations(join_types, int(join_num))
+            type_of_joins = MultisetCombinations(join_types, int(join_num))
             table_exp_types_with_types_of_joins.extend(
                 "_".join(type_of_join) for type_of_join in type_of_joins
             )
@@ -293,43 +579,6 @@ def generate_where_clause_types(
     return generated_where_clause_types
 
 
-def add_logical_operator_combinations(where_clause_types):
-    """
-    Add logical operator combinations to the where clause types.
-
-    Args:
-        where_clause_types (list): The list of where clause types.
-
-    Returns:
-        None
-    """
-    max_combination = len(where_clause_types)
-
-    for i in range(max_combination):
-        for j in range(i + 1, max_combination):
-            if where_clause_types[i] == "none" or where_clause_types[j] == "none":
-                continue
-            if isinstance(where_clause_types[i], dict) and isinstance(
-                where_clause_types[j], dict
-            ):
-                continue
-
-            first_item = where_clause_types[i]
-            second_item = where_clause_types[j]
-            if isinstance(where_clause_types[i], dict):
-                first_item = list(where_clause_types[i].keys())[0]
-            if isinstance(where_clause_types[j], dict):
-                second_item = list(where_clause_types[j].keys())[0]
-
-            where_clause_types.append(
-                {"logical_operator": ["AND", first_item, second_item]}
-            )
-
-            where_clause_types.append(
-                {"logical_operator": ["OR", first_item, second_item]}
-            )
-
-
 def generate_having_types(
     having_types_with_having_group_by,
     aggregate_functions_for_having,
@@ -376,11 +625,15 @@ def generate_all_value_exp_types(
         agg_func_col_types (list): The list of aggregate function column types.
         string_func_col_types (list): The list of string function column types.
         arithmatic_col_types (list): The list of arithmetic column types.
+        number_of_value_exps_in_select (list): The numbers of value expressions in select, or "*".
 
     Returns:
-        list: The generated value expression types.
+        ChainedSequence: The generated value expression types, "*" and the combinations of value expression types of
+            every number of value expressions.
     """
 
+    # The configuration is shared by every database, so its list is left as it is
+    value_exp_types = list(value_exp_types)
     all_value_exp_types = []
     if "subquery_exp" in value_exp_types:
         value_exp_types.remove("subquery_exp")
@@ -413,100 +666,66 @@ def generate_all_value_exp_types(
         ):
             value_exp_types.remove("arithmatic_exp")
 
+    # The combinations are generated lazily, so that large numbers of value expressions stay cheap
     for i in number_of_value_exps_in_select:
         if i == "*":
-            all_value_exp_types.append("*")
+            all_value_exp_types.append(["*"])
             continue
-        all_combinations = select_combinations(value_exp_types, i)
-        all_value_exp_types.extend(all_combinations)
-    return all_value_exp_types
-
-
-def generate_hash_table(
-    num,
-    table_exp_types_with_types_of_joins,
-    where_clause_types,
-    number_of_valu_exps_in_group_by,
-    having_types_without_having_group_by,
-    having_types_with_having_group_by,
-    orderby_types,
-    limit_types,
-    meaningful_joins,
-    distinct_types,
-    all_value_exp_types,
-    min_max_depth_in_subquery,
-):
-    """
-    Generate the hash table of specifications.
-
-    Args:
-        num (int): The number of specifications to generate.
-        table_exp_types_with_types_of_joins (list): The list of table expression types with types of joins.
-        where_clause_types (list): The list of where clause types.
-        number_of_valu_exps_in_group_by (list): The list of number of value expressions in group by.
-        having_types_without_having_group_by (list): The list of having types without having group by.
-        having_types_with_having_group_by (list): The list of having types with having group by.
-        orderby_types (list): The list of orderby types.
-        limit_types (list): The list of limit types.
-        meaningful_joins (list): The list of meaningful joins.
-        distinct_types (list): The list of distinct types.
-        all_value_exp_types (list): The list of all value expression types.
-        min_max_depth_in_subquery (list): The list of min and max depth in subquery.
-
-    Returns:
-        dict: The generated hash table of specifications.
-    """
-    hash_table = {}
-
-    for _ in range(num):
-        table_exp_type = random.choice(table_exp_types_with_types_of_joins)
-        where_type = random.choice(where_clause_types)
-        group_by_type = random.choice(number_of_valu_exps_in_group_by)
-
-        having_type = (
-            random.choice(having_types_without_having_group_by)
-            if group_by_type == 0
-            else random.choice(having_types_with_having_group_by)
-        )
-        orderby_type = random.choice(orderby_types)
-        limit_type = random.choice(limit_types)
-        type_of_join = random.choice(meaningful_joins)
-        distinct_type = random.choice(distinct_types)
-        value_exp_type = random.choice(all_value_exp_types)
-        if len(value_exp_type) == 1 and group_by_type == 0:
-            orderby_type = random.choice(
-                ["ASC", "DESC", "number_ASC", "number_DESC", "none"]
-            )  # It cannot be multiple
-        detail = {
-            "meaningful_joins": type_of_join,
-            "table_exp_type": table_exp_type,
-            "where_type": where_type,
-            "number_of_value_exp_in_group_by": group_by_type,
-            "having_type": having_type,
-            "orderby_type": orderby_type,
-            "limit_type": limit_type,
-            "value_exp_types": value_exp_type,
-            "distinct_type": distinct_type,
-            "min_max_depth_in_subquery": min_max_depth_in_subquery,
-        }
-
-        hash_value = calculate_hash(detail)
-
-        if hash_value not in hash_table:
-            hash_table[hash_value] = detail
-
-    return hash_table
+        all_value_exp_types.append(MultisetCombinations(value_exp_types, i))
+    return ChainedSequence(all_value_exp_types)
 
 
 if __name__ == "__main__":
-    schema = all_db["farm"]["schema"]
-    pk = all_db["farm"]["primary_keys"]
-    fk = all_db["farm"]["foreign_keys"]
-    schema_types = all_db["farm"]["schema_types"]
+    parser = argparse.ArgumentParser(
+        description="Generate query specifications from the configuration file."
+    )
+    parser.add_argument(
+        "--rebuild-schema-cache",
+        action="store_true",
+        help="Rebuild the compiled schema cache stored next to tables.json.",
+    )
+    parser.add_argument(
+        "--no-schema-cache",
+        action="store_true",
+        help="Parse tables.json without reading or writing the compiled schema cache.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="Read the schemas from a SQLite file or a directory of SQLite files instead of tables.json.",
+    )
+    parser.add_argument(
+        "--sha1-spec-ids",
+        action="store_true",
+        help="Identify the specifications by SHA-1 hashes, for specification files keyed by them.",
+    )
+    parser.add_argument(
+        "--all-databases",
+        action="store_true",
+        help="Generate the specifications of every database instead of farm only.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of processes used with --all-databases. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--num-specs",
+        type=int,
+        default=100,
+        help="Number of specifications of every database. Defaults to 100.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Keep the specifications already generated and append new ones up to --num-specs.",
+    )
+    args = parser.parse_args()
     # change dynamic path to config_file.json
 
     current_dir = os.path.dirname(__file__)
-    dataset_path = os.path.join(current_dir, "../spider/tables.json")
+    dataset_path = args.sqlite or os.path.join(current_dir, "../spider/tables.json")
     config_file = os.path.abspath(os.path.join(current_dir, "config_file.json"))
     # config_file = file_path = os.path.abspath(
     #     "query_generator/query_generation/config_file.json"
@@ -514,5 +733,11 @@ if __name__ == "__main__":
     complete_specs(
         dataset_path,
         config_file,
-        db_name="farm",
+        db_name=None if args.all_databases else "farm",
+        use_schema_cache=not args.no_schema_cache,
+        rebuild_schema_cache=args.rebuild_schema_cache,
+        sha1_spec_ids=args.sha1_spec_ids,
+        max_workers=args.workers,
+        num_specs=args.num_specs,
+        incremental=args.incremental,
     )
@@ -1,9 +1,18 @@
 import copy
 import json
+import logging
 import os
 import random
 
-from helper_funcs import get_table_name_from_column, print_attributes, read_random_specs
+from helper_funcs import (
+    first_generated_query,
+    get_table_name_from_column,
+    print_attributes,
+    read_random_specs,
+)
+from instrumentation import run_stage
+
+logger = logging.getLogger(__name__)
 
 
 def generate_subquery(
@@ -19,7 +28,7 @@ def generate_subquery(
     query_generator_func=None,
     having=False,
 ):
-    print("generate_subquery")
+    logger.debug("generate_subquery")
     if min_max_depth_in_subquery is None:
         min_max_depth_in_subquery = [0, 0]
     current_dir = os.path.dirname(__file__)
@@ -87,7 +96,7 @@ def generate_subquery(
         )
 
     elif subquery_type == "subquery_exp_alias":
-        print("subquery_exp_alias!!!")
+        logger.debug("subquery_exp_alias!!!")
         return generate_subquery_exp_alias(
             file_name,
             schema,
@@ -132,22 +141,23 @@ def generate_in_or_not_in_subquery(
 
     dict_spec = {db_name: {spec_hash: spec}}
 
-    merged_queries = query_generator_func(
-        schema=schema,
-        schema_types=schema_types,
-        pk=pk,
-        fk=fk,
-        specs=dict_spec,
-        db_name=db_name,
-        must_be_in_select=must_be_in_select,
-        write_to_csv=False,
-        is_subquery=True,
-        testing_with_one_spec=True,
-        random_choice=True,
+    sub_query, _ = run_stage(
+        "subquery",
+        first_generated_query,
+        query_generator_func(
+            schema=schema,
+            schema_types=schema_types,
+            pk=pk,
+            fk=fk,
+            specs=dict_spec,
+            db_name=db_name,
+            must_be_in_select=must_be_in_select,
+            is_subquery=True,
+            testing_with_one_spec=True,
+            random_choice=True,
+        ),
     )
 
-    sub_query = list(merged_queries.values())[0].split("\n")[0]
-
     where_clause = f"{random_column} {in_or_not_in} ({sub_query})"
 
     return [where_clause]
@@ -188,24 +198,25 @@ def generate_comparison_subquery(
 
     dict_spec = {db_name: {spec_hash: spec}}
 
-    merged_queries = query_generator_func(
-        schema=schema,
-        schema_types=schema_types,
-        pk=pk,
-        fk=fk,
-        specs=dict_spec,
-        db_name=db_name,
-        must_be_in_select=must_be_in_select,
-        write_to_csv=False,
-        is_subquery=True,
-        testing_with_one_spec=True,
-        random_choice=True,
+    sub_query, _ = run_stage(
+        "subquery",
+        first_generated_query,
+        query_generator_func(
+            schema=schema,
+            schema_types=schema_types,
+            pk=pk,
+            fk=fk,
+            specs=dict_spec,
+            db_name=db_name,
+            must_be_in_select=must_be_in_select,
+            is_subquery=True,
+            testing_with_one_spec=True,
+            random_choice=True,
+        ),
     )
 
-    sub_query = list(merged_queries.values())[0].split("\n")[0]
-
     where_clause = f"{random_column} {comp_clause} ({sub_query})"
-    print("where_clause", where_clause)
+    logger.debug("where_clause %s", where_clause)
 
     return [where_clause]
 
@@ -241,23 +252,24 @@ def generate_exists_subquery(
     )
     dict_spec = {db_name: {spec_hash: spec}}
 
-    merged_queries = query_generator_func(
-        schema=schema,
-        schema_types=schema_types,
-        pk=pk,
-        fk=fk,
-        specs=dict_spec,
-        db_name=db_name,
-        must_be_in_select=must_be_in_select,
-        must_be_in_where=must_be_in_where,
-        write_to_csv=False,
-        is_subquery=True,
-        testing_with_one_spec=True,
-        random_choice=True,
+    sub_query, _ = run_stage(
+        "subquery",
+        first_generated_query,
+        query_generator_func(
+            schema=schema,
+            schema_types=schema_types,
+            pk=pk,
+            fk=fk,
+            specs=dict_spec,
+            db_name=db_name,
+            must_be_in_select=must_be_in_select,
+            must_be_in_where=must_be_in_where,
+            is_subquery=True,
+            testing_with_one_spec=True,
+            random_choice=True,
+        ),
     )
 
-    sub_query = list(merged_queries.values())[0].split("\n")[0]
-
     where_clause = f"{exist_or_not_exist} ({sub_query})"
 
     return [where_clause]
@@ -281,31 +293,30 @@ def generate_subquery_for_from_clause(
 
     dict_spec = {db_name: {spec_hash: spec}}
 
-    merged_queries, select_fields = query_generator_func(
-        schema=schema,
-        schema_types=schema_types,
-        pk=pk,
-        fk=fk,
-        specs=dict_spec,
-        db_name=db_name,
-        write_to_csv=False,
-        is_subquery=False,
-        testing_with_one_spec=True,
-        random_choice=True,
-        return_select_fields=True,
-        return_table_exp_attributes=True,
-        return_unique_tables=True,
+    sub_query, select_fields = run_stage(
+        "subquery",
+        first_generated_query,
+        query_generator_func(
+            schema=schema,
+            schema_types=schema_types,
+            pk=pk,
+            fk=fk,
+            specs=dict_spec,
+            db_name=db_name,
+            is_subquery=False,
+            testing_with_one_spec=True,
+            random_choice=True,
+        ),
     )
-    print("HIIII")
-    print(select_fields)
-    hash = list(select_fields.keys())[0]
-    select_fields_list = select_fields[hash]["select_fields"]
-    print("PPPPP", select_fields_list)
-    query_attrs = select_fields[hash]["table_exp_attributes"]
-    unique_tables = select_fields[hash]["unique_tables"]
-    select_fields_types = select_fields[hash]["select_fields_types"]
-    print(select_fields_types)
-    print("))))))")
+    logger.debug("HIIII")
+    logger.debug("%s", select_fields)
+    select_fields_list = select_fields["select_fields"]
+    logger.debug("PPPPP %s", select_fields_list)
+    query_attrs = select_fields["table_exp_attributes"]
+    unique_tables = select_fields["unique_tables"]
+    select_fields_types = select_fields["select_fields_types"]
+    logger.debug("%s", select_fields_types)
+    logger.debug("))))))")
     attributes = {"number": [], "text": []}
     alias_name = random.choice("abcdefghijklmnopqrstuvwxyz")
 
@@ -317,13 +328,12 @@ def generate_subquery_for_from_clause(
         elif field in select_fields_types:
             attributes[select_fields_types[field]].append(f"{alias_name}.{field}")
 
-    print("attributes", attributes)
-    print("attr", query_attrs)
-    print("select_fields", select_fields)
-    sub_query = list(merged_queries.values())[0].split("\n")[0]
+    logger.debug("attributes %s", attributes)
+    logger.debug("attr %s", query_attrs)
+    logger.debug("select_fields %s", select_fields)
 
     from_clause_subquery = f"({sub_query}) AS {alias_name}"
-    print("from_clause_subquery", from_clause_subquery)
+    logger.debug("from_clause_subquery %s", from_clause_subquery)
 
     return [
         [
@@ -346,7 +356,7 @@ def generate_subquery_exp_alias(
     min_max_depth_in_subquery=None,
     query_generator_func=None,
 ):
-    print("generate_subquery_exp_alias")
+    logger.debug("generate_subquery_exp_alias")
     spec, spec_hash, must_be_in_where = read_random_specs(
         file_name,
         db_name,
@@ -356,36 +366,35 @@ def generate_subquery_exp_alias(
         min_max_depth_in_subquery,
         subquery_in_select_statement=True,
     )
-    print("spec", spec)
+    logger.debug("spec %s", spec)
 
     dict_spec = {db_name: {spec_hash: spec}}
-    print(query_generator_func)
-
-    merged_queries, select_fields = query_generator_func(
-        schema=schema,
-        schema_types=schema_types,
-        pk=pk,
-        fk=fk,
-        specs=dict_spec,
-        db_name=db_name,
-        write_to_csv=False,
-        is_subquery=False,
-        testing_with_one_spec=True,
-        random_choice=True,
-        return_select_fields=True,
-        return_table_exp_attributes=True,
-        return_unique_tables=True,
+    logger.debug("%s", query_generator_func)
+
+    sub_query, select_fields = run_stage(
+        "subquery",
+        first_generated_query,
+        query_generator_func(
+            schema=schema,
+            schema_types=schema_types,
+            pk=pk,
+            fk=fk,
+            specs=dict_spec,
+            db_name=db_name,
+            is_subquery=False,
+            testing_with_one_spec=True,
+            random_choice=True,
+        ),
     )
-    print("HIIII")
-    print(select_fields)
-    hash = list(select_fields.keys())[0]
-    select_fields_list = select_fields[hash]["select_fields"]
-    print("PPPPP", select_fields_list)
-    query_attrs = select_fields[hash]["table_exp_attributes"]
-    unique_tables = select_fields[hash]["unique_tables"]
-    select_fields_types = select_fields[hash]["select_fields_types"]
-    print(select_fields_types)
-    print("))))))")
+    logger.debug("HIIII")
+    logger.debug("%s", select_fields)
+    select_fields_list = select_fields["select_fields"]
+    logger.debug("PPPPP %s", select_fields_list)
+    query_attrs = select_fields["table_exp_attributes"]
+    unique_tables = select_fields["unique_tables"]
+    select_fields_types = select_fields["select_fields_types"]
+    logger.debug("%s", select_fields_types)
+    logger.debug("))))))")
     attributes = {"number": [], "text": []}
     alias_name = random.choice("abcdefghijklmnopqrstuvwxyz")
 
@@ -397,13 +406,12 @@ def generate_subquery_exp_alias(
         elif field in select_fields_types:
             attributes[select_fields_types[field]].append(f"{alias_name}.{field}")
 
-    print("attributes", attributes)
-    print("attr", query_attrs)
-    print("select_fields", select_fields)
-    sub_query = list(merged_queries.values())[0].split("\n")[0]
+    logger.debug("attributes %s", attributes)
+    logger.debug("attr %s", query_attrs)
+    logger.debug("select_fields %s", select_fields)
 
     from_clause_subquery = f"({sub_query}) AS {alias_name}"
-    print("from_clause_subquery", from_clause_subquery)
+    logger.debug("from_clause_subquery %s", from_clause_subquery)
 
     return [
         [
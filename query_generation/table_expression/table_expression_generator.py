@@ -1,9 +1,8 @@
 import itertools
+import logging
 import random
 import sys
 
-import networkx as nx
-
 sys.path.append("..")
 
 import random
@@ -19,6 +18,8 @@ from .table_expression_helper_funcs import (
     handle_table_expression_for_subquery,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def create_table_expression(
     schema,
@@ -35,7 +36,7 @@ def create_table_expression(
     Generate SQL table expression based on the specified type.
 
     Args:
-        schema (dict): Database schema with table names and their columns.
+        schema (dict or Schema): Database schema with table names and their columns.
         pk (dict): Primary keys for tables.
         fk (dict): Foreign keys for tables.
         schema_types (dict): Data types of columns in the schema.
@@ -85,12 +86,12 @@ def create_table_expression(
             query_generator_func=query_generator_func,
             having=True,
         )
-        print("FROM CLAUSES")
-        print(from_clauses)
+        logger.debug("FROM CLAUSES")
+        logger.debug("%s", from_clauses)
         queries = []
         for from_clause, tables, attributes in from_clauses:
-            print("GHG")
-            print(from_clause)
+            logger.debug("GHG")
+            logger.debug("%s", from_clause)
             query = f" FROM {from_clause}"
             # attributes = get_all_attributes_for_from_subquery()
             # queries.append([query, attributes, must_have_attributes])
@@ -2,8 +2,6 @@ import itertools
 import random
 import sys
 
-import networkx as nx
-
 sys.path.append("..")
 
 from helper_funcs import all_colms
@@ -1,4 +1,5 @@
 import json
+import logging
 import random
 import string
 
@@ -10,6 +11,8 @@ from helper_funcs import (
 )
 from subquery_generator import generate_subquery
 
+logger = logging.getLogger(__name__)
+
 
 def basic_comparison(colms, details, random_choice):
     if not colms["number"]:
@@ -177,7 +180,7 @@ def logical_operator(
     query_generator_func=None,
 ):
     if "subquery" in details["logical_operator"][1]:
-        print("subquery")
+        logger.debug("subquery")
         return subquery(
             schema,
             schema_types,
@@ -340,7 +343,7 @@ def complete_with_where_clause(
     Complete the given query with a WHERE clause based on the provided parameters.
 
     Args:
-        schema (dict): Dictionary containing the schema information.
+        schema (dict or Schema): Dictionary containing the schema information.
         schema_types (dict): Dictionary containing the schema types information.
         db_name (str): Name of the database.
         temp_query (str): Temporary query to be completed with the WHERE clause.
@@ -352,7 +355,8 @@ def complete_with_where_clause(
         must_be_in_where (list, optional): List containing the must-be-in-where condition. Defaults to None.
         random_choice (bool, optional): Flag indicating whether to use random choice for where clause generation. Defaults to False.
         min_max_depth_in_subquery (list, optional): List containing the minimum and maximum depth of nested subqueries. Defaults to [0, 0].
-        query_generator_func (function, optional): Function to generate queries. Defaults to None.
+        query_generator_func (function, optional): Function yielding the (specification hash, query, metadata)
+            records of the queries of a specification, such as iter_queries. Defaults to None.
 
     Returns:
         list: List of completed queries with their attributes.